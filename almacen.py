@@ -0,0 +1,399 @@
+"""
+Almacén local indexado (SQLite) de pedidos, catálogo, relaciones vendor-POS y compras
+mínimas.
+
+Los CSV se importan una sola vez al archivo ARCHIVO_ALMACEN (sincronizar_almacen): cada
+tabla registra el hash del archivo del que se importó y solo se vuelve a importar cuando
+el archivo cambia. Las tablas tienen índices por point_of_sale_id (pedidos y
+relaciones), (super_catalog_id, name) (catálogo) y (vendor_id, point_of_sale_id)
+(relaciones), así que las consultas por POS (leer_pedidos_pos, leer_catalogo_pos,
+leer_relaciones_pos) leen solo las filas de ese POS en lugar del historial completo.
+
+Cada fila guarda su posición en el archivo (_fila) y las consultas la devuelven en ese
+orden, como índice: las filas de un POS quedan igual que en el slice de la carga
+completa.
+
+Cuando el archivo de pedidos solo creció al final (sus primeros bytes son los del
+archivo importado) y las órdenes agregadas son posteriores a la marca de agua (el
+order_id más alto ya importado), sincronizar_almacen agrega solo esas órdenes con un
+upsert en lugar de volver a importar la tabla; cualquier otro cambio de un archivo es una
+importación completa. upsert (borrado de las claves recibidas e inserción en bloque, en
+una transacción, con _fila a continuación de la última) también se puede usar
+directamente: cada upsert directo incrementa version_almacen, que la recarga
+(recarga.crear_conjunto) vigila para publicar un snapshot nuevo. Una importación
+completa posterior reemplaza las filas agregadas así que no estén en el archivo.
+
+La base usa WAL: las sesiones pueden leer mientras se importa o se hace un upsert, y ven
+las tablas de antes o de después de la transacción, nunca a medias.
+
+Uso:
+    sincronizar_almacen(cargar_archivo)
+    df_pedidos_pos = leer_pedidos_pos(pos_id)
+    upsert('pedidos', df_pedidos_nuevos)
+    version_almacen()   # cambia con cada upsert directo
+"""
+import hashlib
+import os
+import sqlite3
+
+import pandas as pd
+
+from esquemas import ESQUEMAS, aplicar_esquema
+from snapshots import hash_vigente
+
+# Archivo SQLite del almacén (configurable por variable de entorno)
+ARCHIVO_ALMACEN = os.environ.get('PHARMA_ALMACEN_ARCHIVO', 'almacen.sqlite')
+
+# Incrementar si cambia la estructura de las tablas: las tablas se vuelven a crear y a
+# importar completas
+VERSION_ALMACEN = 3
+
+# Tablas del almacén: archivo de origen, clave de upsert e índices
+TABLAS = {
+    'pedidos': {
+        'archivo': 'orders_delivered_pos_vendor_geozone.csv',
+        # Un upsert reemplaza todas las líneas de cada orden recibida
+        'clave': ['order_id'],
+        # Marca de agua: las órdenes agregadas al final del archivo con un order_id mayor
+        # se importan con un upsert (sincronizar_almacen)
+        'marca': 'order_id',
+        'indices': [['point_of_sale_id'], ['order_id']],
+    },
+    'catalogo': {
+        'archivo': 'vendors_catalog.csv',
+        'clave': ['vendor_id', 'super_catalog_id', 'name'],
+        'indices': [['super_catalog_id', 'name']],
+    },
+    'relaciones': {
+        'archivo': 'vendor_pos_relations.csv',
+        'clave': ['vendor_id', 'point_of_sale_id'],
+        'indices': [['vendor_id', 'point_of_sale_id'], ['point_of_sale_id']],
+    },
+    'compras_minimas': {
+        'archivo': 'minimum_purchase.csv',
+        'clave': ['vendor_id', 'name'],
+        'indices': [['vendor_id', 'name']],
+    },
+}
+
+
+def _tipo_sql(dtype):
+    if dtype.startswith('int'):
+        return 'INTEGER'
+    if dtype.startswith('float'):
+        return 'REAL'
+    # Sin afinidad: cada valor conserva su tipo, así un categórico de enteros (status de
+    # las relaciones) vuelve con las mismas categorías que desde el CSV
+    if dtype == 'category':
+        return ''
+    return 'TEXT'
+
+
+def _columnas(tabla):
+    """Columnas de una tabla: las de su esquema (esquemas.py), en ese orden"""
+    return list(ESQUEMAS[TABLAS[tabla]['archivo']])
+
+
+def conectar(ruta=None):
+    """
+    Abre una conexión al almacén y crea las tablas e índices que falten
+
+    Args:
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        Conexión sqlite3 (una por hilo: sqlite3 no comparte conexiones entre hilos)
+    """
+    con = sqlite3.connect(ruta or ARCHIVO_ALMACEN, timeout=60)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    with con:
+        if con.execute("PRAGMA user_version").fetchone()[0] != VERSION_ALMACEN:
+            # Almacén de una versión anterior: se descartan las tablas y se reimporta todo
+            for tabla in ['archivos', *TABLAS]:
+                con.execute(f"DROP TABLE IF EXISTS {tabla}")
+            con.execute(f"PRAGMA user_version = {VERSION_ALMACEN}")
+        con.execute("CREATE TABLE IF NOT EXISTS archivos (tabla TEXT PRIMARY KEY, sha256 TEXT, version INTEGER, "
+                    "bytes INTEGER, filas INTEGER)")
+        con.execute("CREATE TABLE IF NOT EXISTS estado (clave TEXT PRIMARY KEY, valor INTEGER)")
+        for tabla, declaracion in TABLAS.items():
+            esquema = ESQUEMAS[declaracion['archivo']]
+            columnas = ', '.join(f'"{columna}" {_tipo_sql(dtype)}'.rstrip() for columna, dtype in esquema.items())
+            con.execute(f'CREATE TABLE IF NOT EXISTS {tabla} (_fila INTEGER PRIMARY KEY, {columnas})')
+            for indice in declaracion['indices']:
+                nombre = f"idx_{tabla}_{'_'.join(indice)}"
+                con.execute(f'CREATE INDEX IF NOT EXISTS {nombre} ON {tabla} ({", ".join(indice)})')
+    return con
+
+
+def _valores_sql(df, columnas):
+    """Filas de un DataFrame como tuplas para executemany, con NaN como NULL"""
+    datos = pd.DataFrame({columna: (df[columna] if columna in df.columns else None) for columna in columnas},
+                         index=df.index)
+    datos = datos.astype(object).where(datos.notna(), None)
+    return datos.itertuples(index=False, name=None)
+
+
+def _filas_sql(df, columnas, primera_fila):
+    """Como _valores_sql, con la posición _fila de cada fila al principio"""
+    return [(fila, *valores) for fila, valores
+            in zip(range(primera_fila, primera_fila + len(df)), _valores_sql(df, columnas))]
+
+
+def _insertar(con, tabla, df, primera_fila):
+    columnas = _columnas(tabla)
+    marcadores = ', '.join('?' * (len(columnas) + 1))
+    nombres = ', '.join(f'"{columna}"' for columna in columnas)
+    con.executemany(f'INSERT INTO {tabla} (_fila, {nombres}) VALUES ({marcadores})',
+                    _filas_sql(df, columnas, primera_fila))
+
+
+def _hash_prefijo(ruta, cantidad, tamano_bloque=1 << 20):
+    """Hash SHA-256 de los primeros `cantidad` bytes de un archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        while cantidad > 0:
+            bloque = f.read(min(tamano_bloque, cantidad))
+            if not bloque:
+                break
+            h.update(bloque)
+            cantidad -= len(bloque)
+    return h.hexdigest()
+
+
+def _solo_agregado(archivo, registrado):
+    """Indica si el archivo es el importado (registro de la tabla archivos) con líneas nuevas al final"""
+    if registrado is None or registrado['version'] != VERSION_ALMACEN or not registrado['bytes']:
+        return False
+    if os.path.getsize(archivo) <= registrado['bytes']:
+        return False
+    with open(archivo, 'rb') as f:
+        # Sin salto de línea al final del archivo importado, la primera línea agregada
+        # completaría su última fila
+        f.seek(registrado['bytes'] - 1)
+        if f.read(1) != b'\n':
+            return False
+    return _hash_prefijo(archivo, registrado['bytes']) == registrado['sha256']
+
+
+def _filas_nuevas(con, tabla, df, registrado):
+    """
+    Filas agregadas al final de un archivo que solo creció, o None si no se pueden
+    agregar con un upsert (alguna orden no supera la marca de agua)
+    """
+    marca = TABLAS[tabla]['marca']
+    nuevas = df.iloc[registrado['filas']:]
+    ultima = con.execute(f"SELECT MAX({marca}) FROM {tabla}").fetchone()[0]
+    if ultima is not None and not (nuevas[marca] > ultima).all():
+        return None
+    return nuevas
+
+
+def sincronizar_almacen(cargar_archivo, ruta=None):
+    """
+    Importa al almacén los archivos que cambiaron desde la última importación
+
+    Cada tabla se reemplaza completa en una transacción: mientras tanto las consultas
+    siguen viendo la versión anterior. En las tablas con marca de agua (pedidos), si el
+    archivo solo creció al final y las filas nuevas superan la marca, se agregan con un
+    upsert en lugar de reemplazar la tabla. Las tablas cuyo archivo no existe quedan
+    como están.
+
+    Args:
+        cargar_archivo: Función archivo -> DataFrame normalizado (por ejemplo
+            leer_entrada con la normalización de cada archivo)
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        Lista de tablas importadas
+    """
+    con = conectar(ruta)
+    importadas = []
+    try:
+        registradas = {tabla: {'sha256': sha256, 'version': version, 'bytes': tamano, 'filas': filas}
+                       for tabla, sha256, version, tamano, filas
+                       in con.execute("SELECT tabla, sha256, version, bytes, filas FROM archivos")}
+        for tabla, declaracion in TABLAS.items():
+            archivo = declaracion['archivo']
+            if not os.path.exists(archivo):
+                continue
+            registrado = registradas.get(tabla)
+            sha256 = hash_vigente(archivo)
+            if registrado is not None and (registrado['sha256'], registrado['version']) == (sha256, VERSION_ALMACEN):
+                continue
+            tamano = os.path.getsize(archivo)
+            agregado = 'marca' in declaracion and _solo_agregado(archivo, registrado)
+            df = cargar_archivo(archivo)
+            with con:
+                nuevas = _filas_nuevas(con, tabla, df, registrado) if agregado else None
+                if nuevas is not None:
+                    _upsert(con, tabla, nuevas)
+                else:
+                    con.execute(f"DELETE FROM {tabla}")
+                    _insertar(con, tabla, df, 0)
+                con.execute("INSERT OR REPLACE INTO archivos (tabla, sha256, version, bytes, filas) "
+                            "VALUES (?, ?, ?, ?, ?)", (tabla, sha256, VERSION_ALMACEN, tamano, len(df)))
+            importadas.append(tabla)
+        if importadas:
+            con.execute("ANALYZE")
+    finally:
+        con.close()
+    return importadas
+
+
+def _upsert(con, tabla, df):
+    """Borra las claves de df e inserta sus filas al final, dentro de la transacción de con"""
+    clave = TABLAS[tabla]['clave']
+    con.execute(f"CREATE TEMP TABLE claves ({', '.join(clave)})")
+    con.executemany(f"INSERT INTO claves VALUES ({', '.join('?' * len(clave))})",
+                    _valores_sql(df[clave].drop_duplicates(), clave))
+    # IN sobre la clave usa el índice de la tabla (en pedidos, idx_pedidos_order_id)
+    columnas = clave[0] if len(clave) == 1 else f"({', '.join(clave)})"
+    con.execute(f"DELETE FROM {tabla} WHERE {columnas} IN (SELECT {', '.join(clave)} FROM claves)")
+    con.execute("DROP TABLE claves")
+    siguiente = con.execute(f"SELECT COALESCE(MAX(_fila) + 1, 0) FROM {tabla}").fetchone()[0]
+    _insertar(con, tabla, df, siguiente)
+
+
+def upsert(tabla, df, ruta=None):
+    """
+    Inserta o reemplaza filas de una tabla por su clave, en bloque
+
+    Se borran las filas cuyas claves aparecen en df y se insertan las de df al final
+    (_fila a continuación de la última), en una sola transacción, y se incrementa
+    version_almacen para que la página publique los datos nuevos. El hash registrado del
+    archivo no cambia: si el archivo se modifica después, sincronizar_almacen vuelve a
+    importarlo (completo, salvo que solo haya crecido) y las filas agregadas con upsert
+    que no estén en el archivo se pierden.
+
+    Args:
+        tabla: Nombre de la tabla (TABLAS)
+        df: DataFrame con las columnas del esquema del archivo de la tabla
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        Cantidad de filas insertadas
+    """
+    con = conectar(ruta)
+    try:
+        with con:
+            _upsert(con, tabla, df)
+            con.execute("INSERT INTO estado (clave, valor) VALUES ('upserts', 1) "
+                        "ON CONFLICT (clave) DO UPDATE SET valor = valor + 1")
+    finally:
+        con.close()
+    return len(df)
+
+
+def version_almacen(ruta=None):
+    """
+    Versión de los datos agregados al almacén con upsert directo
+
+    Args:
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        Cantidad de upserts directos hechos sobre el almacén (0 si ninguno)
+    """
+    con = conectar(ruta)
+    try:
+        fila = con.execute("SELECT valor FROM estado WHERE clave = 'upserts'").fetchone()
+    finally:
+        con.close()
+    return fila[0] if fila is not None else 0
+
+
+def _leer(tabla, condicion='', parametros=(), ruta=None):
+    """Lee filas de una tabla en orden de _fila, con los dtypes del esquema"""
+    columnas = _columnas(tabla)
+    nombres = ', '.join(f'"{columna}"' for columna in columnas)
+    con = conectar(ruta)
+    try:
+        df = pd.read_sql_query(f'SELECT _fila, {nombres} FROM {tabla} {condicion} ORDER BY _fila',
+                               con, params=list(parametros), index_col='_fila')
+    finally:
+        con.close()
+    df.index.name = None
+    return aplicar_esquema(df, ESQUEMAS[TABLAS[tabla]['archivo']])
+
+
+def leer_tabla(tabla, ruta=None):
+    """
+    Lee una tabla completa del almacén
+
+    Args:
+        tabla: Nombre de la tabla (TABLAS)
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        DataFrame con las columnas y dtypes del esquema del archivo, indexado por _fila
+    """
+    return _leer(tabla, ruta=ruta)
+
+
+def leer_pedidos_pos(pos_id, ruta=None):
+    """
+    Lee los pedidos de un POS (índice por point_of_sale_id)
+
+    Args:
+        pos_id: ID del POS
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        DataFrame de pedidos del POS, en el orden del archivo e indexado por _fila
+    """
+    return _leer('pedidos', 'WHERE point_of_sale_id = ?', (int(pos_id),), ruta)
+
+
+def leer_catalogo_pos(pos_id, zonas, ruta=None):
+    """
+    Lee las ofertas del catálogo que pueden aplicar a los pedidos de un POS
+
+    Solo los productos que el POS pidió, con ofertas nacionales (name == 'México') o de
+    las zonas indicadas (índice por super_catalog_id y name).
+
+    Args:
+        pos_id: ID del POS
+        zonas: Zonas geográficas del POS
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        DataFrame de catálogo, en el orden del archivo e indexado por _fila
+    """
+    nombres = ['México', *[str(zona) for zona in zonas if zona != 'México']]
+    condicion = (f"WHERE name IN ({', '.join('?' * len(nombres))}) AND super_catalog_id IN "
+                 f"(SELECT DISTINCT super_catalog_id FROM pedidos WHERE point_of_sale_id = ?)")
+    return _leer('catalogo', condicion, (*nombres, int(pos_id)), ruta)
+
+
+def leer_relaciones_pos(pos_id, ruta=None):
+    """
+    Lee las relaciones vendor-POS de un POS
+
+    Args:
+        pos_id: ID del POS
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        DataFrame de relaciones del POS, en el orden del archivo e indexado por _fila
+    """
+    return _leer('relaciones', 'WHERE point_of_sale_id = ?', (int(pos_id),), ruta)
+
+
+def listar_pos(ruta=None):
+    """
+    Lista los POS con pedidos a algún vendor
+
+    Args:
+        ruta: Archivo SQLite (por defecto ARCHIVO_ALMACEN)
+
+    Returns:
+        Lista ordenada de IDs de POS
+    """
+    con = conectar(ruta)
+    try:
+        filas = con.execute("SELECT DISTINCT point_of_sale_id FROM pedidos WHERE point_of_sale_id IS NOT NULL "
+                            "AND vendor_id IS NOT NULL ORDER BY point_of_sale_id").fetchall()
+    finally:
+        con.close()
+    return [fila[0] for fila in filas]
@@ -1,3 +1,5 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,9 +7,16 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 
-# Configuración de la página
-st.set_page_config(page_title="Análisis de Compras y Productos POS", layout="wide")
-st.title("Análisis de Compras Reales vs Potenciales por Punto de Venta")
+from esquemas import leer_csv_con_esquema
+from almacen import (ARCHIVO_ALMACEN, leer_catalogo_pos, leer_pedidos_pos, leer_relaciones_pos, leer_tabla,
+                     listar_pos, sincronizar_almacen, version_almacen)
+from cache_etapas import COLUMNAS_INFORME, ejecutar_etapas
+from cache_lru import crear_cache, estadisticas_cache, obtener_o_calcular
+from etapas import etapa, guardar_registro, registrar_carga, tabla_registro
+from motor_sql import DUCKDB_DISPONIBLE, plan_clasificacion
+from recarga import crear_conjunto, iniciar_vigilancia, snapshot_actual
+from resultados_pos import guardar_resultados, huella_resultados, leer_resultados_pos, resultados_vigentes
+from snapshots import ERRORES_ESCRITURA, PARQUET_DISPONIBLE, guardar_memo, hash_vigente, leer_memo
 
 # Funciones de utilidad
 def get_status_description(status):
@@ -31,6 +40,45 @@ def get_status_description(status):
     
     return status_map.get(status, f"Status {status}")
 
+def construir_indice_status(df_vendors_pos):
+    """
+    Construye un índice de status keyed por (vendor_id, point_of_sale_id)
+    
+    Se construye una vez por carga de datos y permite resolver el status de un vendor
+    en O(1) (obtener_status_vendor) o el de una lista completa de vendors para un POS
+    en una sola llamada vectorizada (obtener_status_vendors).
+    
+    Args:
+        df_vendors_pos: DataFrame con relaciones vendor-pos
+        
+    Returns:
+        Serie de status con MultiIndex (vendor_id, point_of_sale_id); vacía si faltan columnas
+    """
+    columnas = ['vendor_id', 'point_of_sale_id', 'status']
+    if df_vendors_pos is None or not all(col in df_vendors_pos.columns for col in columnas):
+        return pd.Series(
+            [], dtype=object, name='status',
+            index=pd.MultiIndex.from_arrays([[], []], names=['vendor_id', 'point_of_sale_id'])
+        )
+    
+    # Claves numéricas (float) para que 1142, 1142.0 y '1142' resuelvan igual
+    vendor_ids = pd.to_numeric(df_vendors_pos['vendor_id'], errors='coerce').astype(float)
+    pos_ids = pd.to_numeric(df_vendors_pos['point_of_sale_id'], errors='coerce').astype(float)
+    validas = (vendor_ids.notna() & pos_ids.notna()).to_numpy()
+    
+    # Los status se guardan como object para que la búsqueda masiva devuelva los mismos
+    # valores que la individual (sin convertir enteros a float al faltar relaciones)
+    indice = pd.Series(
+        df_vendors_pos['status'].to_numpy(dtype=object)[validas],
+        index=pd.MultiIndex.from_arrays(
+            [vendor_ids.to_numpy()[validas], pos_ids.to_numpy()[validas]],
+            names=['vendor_id', 'point_of_sale_id']
+        ),
+        name='status'
+    )
+    # Si hay relaciones repetidas se conserva la primera, como en la búsqueda original
+    return indice[~indice.index.duplicated(keep='first')]
+
 def obtener_status_vendor(vendor_id, pos_id, df_vendors_pos):
     """
     Obtiene el status de un vendor para un punto de venta específico
@@ -38,47 +86,117 @@ def obtener_status_vendor(vendor_id, pos_id, df_vendors_pos):
     Args:
         vendor_id: ID del vendor
         pos_id: ID del punto de venta
-        df_vendors_pos: DataFrame con relaciones vendor-pos
+        df_vendors_pos: Índice de status (construir_indice_status) o DataFrame con relaciones vendor-pos
         
     Returns:
         Status del vendor (1: activo, 2: pendiente, 0: rechazado) o np.nan si no existe relación
     """
+    # Aceptar también el DataFrame de relaciones, construyendo el índice al vuelo
+    if isinstance(df_vendors_pos, pd.DataFrame):
+        df_vendors_pos = construir_indice_status(df_vendors_pos)
+    
     # Asegurarse de que vendor_id y point_of_sale_id sean numéricos para comparación correcta
     vendor_id = pd.to_numeric(vendor_id, errors='coerce')
     pos_id = pd.to_numeric(pos_id, errors='coerce')
+    if pd.isna(vendor_id) or pd.isna(pos_id):
+        return np.nan
     
-    # Filtrar el DataFrame para obtener la relación específica
-    if 'vendor_id' in df_vendors_pos.columns and 'point_of_sale_id' in df_vendors_pos.columns and 'status' in df_vendors_pos.columns:
-        # Asegurar que los tipos de datos sean numéricos en el DataFrame
-        df_vendors_pos_copy = df_vendors_pos.copy()
-        df_vendors_pos_copy['vendor_id'] = pd.to_numeric(df_vendors_pos_copy['vendor_id'], errors='coerce')
-        df_vendors_pos_copy['point_of_sale_id'] = pd.to_numeric(df_vendors_pos_copy['point_of_sale_id'], errors='coerce')
-        
-        # Buscar la relación
-        relacion = df_vendors_pos_copy[
-            (df_vendors_pos_copy['vendor_id'] == vendor_id) & 
-            (df_vendors_pos_copy['point_of_sale_id'] == pos_id)
-        ]
+    # Si no se encuentra la relación, devolver np.nan
+    return df_vendors_pos.get((float(vendor_id), float(pos_id)), np.nan)
+
+def obtener_status_vendors(vendor_ids, pos_id, indice_status):
+    """
+    Obtiene el status de una lista de vendors para un punto de venta en una sola llamada
+    
+    Args:
+        vendor_ids: Lista, array o Serie de IDs de vendor
+        pos_id: ID del punto de venta, o una secuencia de IDs alineada con vendor_ids
+        indice_status: Índice de status (construir_indice_status)
         
-        # Si se encuentra la relación, devolver el status
-        if not relacion.empty:
-            return relacion['status'].iloc[0]
+    Returns:
+        Array de status alineado con vendor_ids (np.nan si no existe relación)
+    """
+    vendor_ids = pd.to_numeric(pd.Series(vendor_ids, dtype=object), errors='coerce').astype(float).to_numpy()
+    if len(vendor_ids) == 0:
+        return np.array([], dtype=object)
     
-    # Si no se encuentra la relación, devolver np.nan
-    return np.nan
+    if np.ndim(pos_id) == 0:
+        pos_id = pd.to_numeric(pos_id, errors='coerce')
+        pos_ids = np.full(len(vendor_ids), float(pos_id) if pd.notna(pos_id) else np.nan)
+    else:
+        pos_ids = pd.to_numeric(pd.Series(pos_id, dtype=object), errors='coerce').astype(float).to_numpy()
+    
+    claves = pd.MultiIndex.from_arrays([vendor_ids, pos_ids], names=['vendor_id', 'point_of_sale_id'])
+    return indice_status.reindex(claves).to_numpy()
+
+# Memo persistente dirección -> zona extraída (incrementar la versión si cambia la extracción)
+MEMO_GEO_ZONAS = 'geo_zonas_v1'
+
+# Abreviaturas y variantes de estados y provincias, con el nombre usado en el catálogo y
+# en minimum_purchase.csv
+ABREVIATURAS_ZONA = {
+    # México
+    'B.C.S.': 'Baja California Sur', 'Qro.': 'Querétaro', 'Jal.': 'Jalisco',
+    'Pue.': 'Puebla', 'Méx.': 'CDMX', 'Oax.': 'Oaxaca', 'Chih.': 'Chihuahua',
+    'Coah.': 'Coahuila de Zaragoza', 'Mich.': 'Michoacán de Ocampo',
+    'Ver.': 'Veracruz de Ignacio de la Llave', 'Chis.': 'Chiapas',
+    'N.L.': 'Nuevo León', 'Hgo.': 'Hidalgo', 'Tlax.': 'Tlaxcala',
+    'Tamps.': 'Tamaulipas', 'Yuc.': 'Yucatan', 'Mor.': 'Morelos',
+    'Sin.': 'Sinaloa', 'S.L.P.': 'San Luis Potosí', 'Q.R.': 'Quintana Roo',
+    'Dgo.': 'Durango', 'B.C.': 'Baja California', 'Gto.': 'Guanajuato',
+    'Camp.': 'Campeche', 'Tab.': 'Tabasco', 'Son.': 'Sonora',
+    'Gro.': 'Guerrero', 'Zac.': 'Zacatecas', 'Ags.': 'Aguascalientes',
+    'Nay.': 'Nayarit',
+    # Argentina
+    'CABA': 'Cdad. Autónoma de Buenos Aires', 'C.A.B.A.': 'Cdad. Autónoma de Buenos Aires',
+    'Ciudad Autónoma de Buenos Aires': 'Cdad. Autónoma de Buenos Aires',
+    'Capital Federal': 'Cdad. Autónoma de Buenos Aires',
+    'Provincia de Buenos Aires': 'Buenos Aires', 'Buenos Aires Province': 'Buenos Aires',
+    'Pcia. de Buenos Aires': 'Buenos Aires', 'Bs. As.': 'Buenos Aires',
+    'Provincia de Córdoba': 'Córdoba', 'Provincia de Santa Fe': 'Santa Fe',
+    'Santa Fe Province': 'Santa Fe', 'Provincia de Mendoza': 'Mendoza',
+    'Provincia de Tucumán': 'Tucumán', 'Provincia de Formosa': 'Formosa',
+    'Santiago del Estero': 'Santiago Del Estero', 'Río Negro': 'Rio Negro',
+    'Tierra del Fuego': 'Tierra del Fuego, Antártida e Islas del Atlántico Sur',
+}
+
+def extraer_geo_zonas(direcciones):
+    """
+    Extrae la zona geográfica de cada dirección: el penúltimo elemento separado por ', '
+    (vacío si la dirección tiene un solo elemento)
+    
+    Args:
+        direcciones: Serie de direcciones completas
+        
+    Returns:
+        Serie con la zona geográfica extraída, con el mismo índice
+    """
+    partes = direcciones.str.rsplit(', ', n=2)
+    return partes.str[-2].where(partes.str.len() >= 2, '')
 
-def obtener_geo_zone(address):
+def obtener_geo_zones(direcciones):
     """
-    Extrae la zona geográfica de una dirección
+    Obtiene la zona geográfica de cada dirección usando el memo persistente dirección -> zona
+    
+    Solo se parsean las direcciones distintas que no están en el memo; las nuevas se
+    agregan al memo para los arranques siguientes.
     
     Args:
-        address: Dirección completa
+        direcciones: Serie de direcciones completas
         
     Returns:
-        Zona geográfica extraída
+        Serie con la zona geográfica extraída, con el mismo índice
     """
-    partes = address.split(', ')
-    return ', '.join(partes[-2:-1])
+    memo = leer_memo(MEMO_GEO_ZONAS)
+    memo = memo.set_index('address')['geo_zone'] if memo is not None else pd.Series(dtype=object)
+    
+    unicas = pd.Index(direcciones.dropna().unique())
+    nuevas = unicas.difference(memo.index)
+    if len(nuevas):
+        memo = pd.concat([memo, pd.Series(extraer_geo_zonas(nuevas.to_series()).to_numpy(), index=nuevas)])
+        guardar_memo(MEMO_GEO_ZONAS, memo.rename_axis('address').rename('geo_zone').reset_index())
+    
+    return pd.Series(memo.reindex(direcciones).fillna('').to_numpy(), index=direcciones.index)
 
 def unificar_productos_sin_duplicados(df_global, df_local):
     """
@@ -121,7 +239,7 @@ def load_vendors_dm():
         DataFrame con información de vendors que son drug manufacturers
     """
     try:
-        df_vendor_dm = pd.read_csv('vendors_dm.csv')
+        df_vendor_dm = leer_entrada('vendors_dm.csv')
         # Asegurarse de que las columnas estén correctamente nombradas
         if 'client_id' in df_vendor_dm.columns and 'vendor_id' not in df_vendor_dm.columns:
             df_vendor_dm.rename(columns={'client_id': 'vendor_id'}, inplace=True)
@@ -130,38 +248,60 @@ def load_vendors_dm():
         print(f"Error al procesar vendors_dm.csv: {e}")
         return pd.DataFrame(columns=['vendor_id', 'name', 'drug_manufacturer_id'])
 
-def crear_dataframe_vendors_dm(detail_table, df_vendor_dm):
+def construir_indice_vendor_dm(df_vendor_dm):
+    """
+    Construye el índice drug_manufacturer_id -> vendor_id
+    
+    Si un drug manufacturer está asociado a varios vendors se usa el primero en el orden
+    de vendors_dm.csv, ignorando las filas sin vendor_id, así que cada drug manufacturer
+    tiene un único vendor y el cruce no duplica filas.
+    
+    Args:
+        df_vendor_dm: DataFrame con relaciones vendor-drug_manufacturer
+        
+    Returns:
+        Serie con el vendor_id indexada por drug_manufacturer_id (numérico)
+    """
+    if df_vendor_dm.empty:
+        return pd.Series(dtype=float, name='vendor_id', index=pd.Index([], name='drug_manufacturer_id'))
+    
+    dm_ids = pd.to_numeric(df_vendor_dm['drug_manufacturer_id'], errors='coerce')
+    validas = (dm_ids.notna() & df_vendor_dm['vendor_id'].notna()).to_numpy()
+    indice = pd.Series(
+        df_vendor_dm['vendor_id'].to_numpy()[validas],
+        index=pd.Index(dm_ids.to_numpy()[validas], name='drug_manufacturer_id'), name='vendor_id'
+    )
+    return indice[~indice.index.duplicated(keep='first')]
+
+def crear_dataframe_vendors_dm(detail_table, df_vendor_dm, columna='Droguería/Vendor ID'):
     """
     Crea un dataframe con los vendors que también son drug manufacturers
     
+    Sirve para la tabla de detalle de un POS o para las compras de todos los POS a la vez
+    (por ejemplo pos_vendor_totals con columna='vendor_id'). No modifica detail_table.
+    
     Args:
         detail_table: DataFrame con información de compras por vendor
-        df_vendor_dm: DataFrame con relaciones vendor-drug_manufacturer
+        df_vendor_dm: DataFrame con relaciones vendor-drug_manufacturer o índice ya
+            construido (construir_indice_vendor_dm)
+        columna: Columna de detail_table con el ID de la droguería
     
     Returns:
-        DataFrame filtrado solo con vendors que son drug manufacturers
+        DataFrame filtrado solo con vendors que son drug manufacturers, con la columna
+        'Vendor Real ID' (vendor asociado a cada drug manufacturer)
     """
     if detail_table.empty or df_vendor_dm.empty:
         return pd.DataFrame()
     
-    # Obtener la lista de drug_manufacturer_ids
-    dm_ids = set(df_vendor_dm['drug_manufacturer_id'].unique())
-    
-    # Convertir a tipo numérico para comparación adecuada
-    detail_table['Droguería/Vendor ID'] = pd.to_numeric(detail_table['Droguería/Vendor ID'], errors='coerce')
-    
-    # Filtrar la tabla de detalle para incluir vendors donde "Droguería/Vendor ID" coincide con algún drug_manufacturer_id
-    dm_vendors_detail = detail_table[detail_table['Droguería/Vendor ID'].isin(dm_ids)].copy()
+    indice = df_vendor_dm if isinstance(df_vendor_dm, pd.Series) else construir_indice_vendor_dm(df_vendor_dm)
     
-    if not dm_vendors_detail.empty:
-        # Para cada fila en dm_vendors_detail, encontrar el vendor_id correspondiente
-        dm_vendors_detail['Vendor Real ID'] = None
-        for idx, row in dm_vendors_detail.iterrows():
-            dm_id = row['Droguería/Vendor ID']
-            vendor_matches = df_vendor_dm[df_vendor_dm['drug_manufacturer_id'] == dm_id]
-            if not vendor_matches.empty:
-                dm_vendors_detail.at[idx, 'Vendor Real ID'] = vendor_matches.iloc[0]['vendor_id']
+    # Comparar como número sin modificar la tabla recibida
+    dm_ids = pd.to_numeric(detail_table[columna], errors='coerce')
+    es_dm = dm_ids.isin(indice.index).to_numpy()
+    dm_vendors_detail = detail_table[es_dm].assign(**{columna: dm_ids[es_dm]})
     
+    # Cruce por clave con el índice drug_manufacturer_id -> vendor_id
+    dm_vendors_detail['Vendor Real ID'] = indice.reindex(dm_vendors_detail[columna]).to_numpy()
     return dm_vendors_detail
 
 def calcular_potencial_convertido(df_pedidos, df_vendor_dm):
@@ -207,6 +347,29 @@ def calcular_potencial_convertido(df_pedidos, df_vendor_dm):
     
     return pd.DataFrame()
 
+def _resumir_oportunidades(df):
+    """
+    Valor potencial y status (de la primera fila) por POS y vendor
+    
+    Args:
+        df: DataFrame de productos con point_of_sale_id, vendor_id y valor_total_vendedor
+        
+    Returns:
+        DataFrame con point_of_sale_id, vendor_id, valor_potencial y status, ordenado por
+        POS y vendor
+    """
+    claves = ['point_of_sale_id', 'vendor_id']
+    agrupado = df.groupby(claves)
+    resumen = agrupado['valor_total_vendedor'].sum().rename('valor_potencial').reset_index()
+    if 'status' in df.columns:
+        # Primera fila de cada grupo (aunque su status sea nulo), en el orden de los grupos;
+        # ngroup es -1 en las filas con claves nulas, que no forman grupo
+        grupos, primeras = np.unique(agrupado.ngroup().to_numpy(), return_index=True)
+        resumen['status'] = df['status'].to_numpy()[primeras[grupos >= 0]]
+    else:
+        resumen['status'] = np.nan
+    return resumen
+
 def create_simple_summary(df_products, df_local_products=None, orders_total=0, products_total=0, local_products_total=0):
     """
     Crea un DataFrame resumen con la información de potencial y ahorro
@@ -223,67 +386,50 @@ def create_simple_summary(df_products, df_local_products=None, orders_total=0, p
     """
     if df_products.empty: return pd.DataFrame()
     
-    pos_totals = df_products.groupby('point_of_sale_id')['valor_total_vendedor'].sum().to_dict()
+    hay_locales = df_local_products is not None and not df_local_products.empty
     
-    # Agregar valores de productos locales
-    if df_local_products is not None and not df_local_products.empty:
-        for pos_id in df_local_products['point_of_sale_id'].unique():
-            pos_local_total = df_local_products[df_local_products['point_of_sale_id'] == pos_id]['valor_total_vendedor'].sum()
-            pos_totals[pos_id] = pos_totals.get(pos_id, 0) + pos_local_total
+    # Total por POS: productos globales más locales
+    pos_totals = df_products.groupby('point_of_sale_id')['valor_total_vendedor'].sum()
+    if hay_locales:
+        pos_totals = pos_totals.add(df_local_products.groupby('point_of_sale_id')['valor_total_vendedor'].sum(), fill_value=0)
     
     # Calcular ahorro global
     combined_total = products_total + local_products_total
     savings_percentage = ((orders_total - combined_total) / orders_total * 100) if orders_total > 0 else 0
     
-    summary_data = []
-    
-    # Procesar productos globales
-    if not df_products.empty:
-        grouped = df_products.groupby(['point_of_sale_id', 'vendor_id'])
-        for (pos_id, vendor_id), group in grouped:
-            total_pos = pos_totals.get(pos_id, 0)
-            if total_pos > 0:
-                summary_data.append({
-                    'point_of_sale_id': pos_id,
-                    'vendor_id': vendor_id,
-                    'status': group['status'].iloc[0] if 'status' in group.columns else np.nan,
-                    'valor_potencial': group['valor_total_vendedor'].sum(),
-                    'tipo_oportunidad': 'Global',
-                    'porcentaje_ahorro': (group['valor_total_vendedor'].sum() / total_pos) * 100 * savings_percentage/100
-                })
-    
-    # Procesar productos locales
-    if df_local_products is not None and not df_local_products.empty:
-        grouped_local = df_local_products.groupby(['point_of_sale_id', 'vendor_id'])
-        for (pos_id, vendor_id), group in grouped_local:
-            total_pos = pos_totals.get(pos_id, 0)
-            if total_pos > 0:
-                # Verificar si ya existe esta combinación
-                existing_entry = next((item for item in summary_data if 
-                                      item['point_of_sale_id'] == pos_id and 
-                                      item['vendor_id'] == vendor_id), None)
-                
-                if existing_entry:
-                    # Actualizar entrada existente
-                    existing_entry['valor_potencial'] += group['valor_total_vendedor'].sum()
-                    existing_entry['tipo_oportunidad'] = 'Global y Local'
-                    existing_entry['porcentaje_ahorro'] = (existing_entry['valor_potencial'] / total_pos) * 100 * savings_percentage/100
-                else:
-                    # Crear nueva entrada
-                    status = group['status'].iloc[0] if 'status' in group.columns else np.nan
-                    summary_data.append({
-                        'point_of_sale_id': pos_id,
-                        'vendor_id': vendor_id,
-                        'status': status,
-                        'valor_potencial': group['valor_total_vendedor'].sum(),
-                        'tipo_oportunidad': 'Local',
-                        'porcentaje_ahorro': (group['valor_total_vendedor'].sum() / total_pos) * 100 * savings_percentage/100
-                    })
-    
-    # Crear DataFrame final y ordenar
-    summary_df = pd.DataFrame(summary_data)
+    # Unir los resúmenes global y local por POS y vendor
+    claves = ['point_of_sale_id', 'vendor_id']
+    resumen_local = _resumir_oportunidades(df_local_products if hay_locales else df_products.iloc[:0])
+    resumen = pd.merge(_resumir_oportunidades(df_products), resumen_local, on=claves, how='outer',
+                       suffixes=('_global', '_local'), indicator=True)
+    
+    # Mismo orden que antes de ordenar por valor: primero los globales, luego los solo locales
+    resumen = resumen.sort_values('_merge', key=lambda origen: origen == 'right_only', kind='stable')
+    total_pos = resumen['point_of_sale_id'].map(pos_totals)
+    resumen = resumen[(total_pos > 0).to_numpy()]
+    total_pos = total_pos[resumen.index]
+    
+    solo_global = (resumen['_merge'] == 'left_only').to_numpy()
+    solo_local = (resumen['_merge'] == 'right_only').to_numpy()
+    valor_potencial = np.select(
+        [solo_global, solo_local],
+        [resumen['valor_potencial_global'], resumen['valor_potencial_local']],
+        resumen['valor_potencial_global'] + resumen['valor_potencial_local']
+    )
+    summary_df = pd.DataFrame({
+        'point_of_sale_id': resumen['point_of_sale_id'].to_numpy(),
+        'vendor_id': resumen['vendor_id'].to_numpy(),
+        'status': np.where(solo_local, resumen['status_local'], resumen['status_global']),
+        'valor_potencial': valor_potencial,
+        'tipo_oportunidad': np.select([solo_global, solo_local], ['Global', 'Local'], 'Global y Local'),
+        'porcentaje_ahorro': (valor_potencial / total_pos.to_numpy()) * 100 * savings_percentage/100,
+    }).infer_objects()
+    
+    # Ordenar
     if not summary_df.empty:
         summary_df = summary_df.sort_values(['point_of_sale_id', 'valor_potencial'], ascending=[True, False])
+    else:
+        summary_df = pd.DataFrame()
     
     return summary_df
 
@@ -325,7 +471,10 @@ def mostrar_tabla_vendor_detalle(vendor_df, dm_vendors_detail):
         try:
             # Convertir las columnas de ID a numérico para asegurar una correcta comparación
             display_df_combined['Vendor ID'] = pd.to_numeric(display_df_combined['Vendor ID'], errors='coerce')
-            dm_vendors_detail['Vendor Real ID'] = pd.to_numeric(dm_vendors_detail['Vendor Real ID'], errors='coerce')
+            # Sin modificar la tabla recibida, que puede estar compartida entre sesiones
+            dm_vendors_detail = dm_vendors_detail.assign(
+                **{'Vendor Real ID': pd.to_numeric(dm_vendors_detail['Vendor Real ID'], errors='coerce')}
+            )
             
             # Crear un diccionario de drug manufacturers para facilitar el lookup
             dm_dict = {}
@@ -384,6 +533,11 @@ def agregar_columna_clasificacion(df):
     1. Verifica si el precio_minimo es menor que el precio_vendedor para cada producto en cada orden
     2. Si hay múltiples registros del mismo producto en una orden, identifica el que tiene el precio_vendedor más bajo
     
+    La clasificación se calcula de forma vectorizada: el precio_minimo de referencia
+    (primer registro de cada grupo order_id/super_catalog_id) y el precio_vendedor mínimo
+    del grupo se obtienen con transformaciones por grupo, y las reglas se aplican
+    sobre columnas completas.
+    
     Args:
         df: DataFrame con las columnas order_id, super_catalog_id, precio_minimo, precio_vendedor
         
@@ -393,33 +547,32 @@ def agregar_columna_clasificacion(df):
     # Crear una copia para no modificar el original
     result_df = df.copy()
     
-    # Inicializar la columna de clasificación
-    result_df['clasificacion'] = ""
+    if result_df.empty:
+        result_df['clasificacion'] = ""
+        return result_df
     
-    # Agrupar por order_id y super_catalog_id
-    grupos = result_df.groupby(['order_id', 'super_catalog_id'])
+    # Identificador de grupo por fila (-1 para filas con claves nulas, que no se clasifican)
+    grupo_id = result_df.groupby(['order_id', 'super_catalog_id'], sort=False).ngroup()
+    en_grupo = (grupo_id >= 0).to_numpy()
     
-    for (order_id, product_id), group in grupos:
-        # Obtener el precio mínimo del producto (debe ser el mismo para todos los registros del grupo)
-        precio_minimo = group['precio_minimo'].iloc[0]
-        
-        # Encontrar el precio_vendedor mínimo para este producto y orden
-        min_precio_vendedor = group['precio_vendedor'].min()
-        
-        # Indices de registros del grupo
-        indices = group.index
-        
-        for idx in indices:
-            precio_vendedor = result_df.loc[idx, 'precio_vendedor']
-            
-            # Aplicar las reglas de clasificación
-            if precio_minimo < precio_vendedor:
-                result_df.loc[idx, 'clasificacion'] = "Precio droguería minimo"
-            else:
-                if precio_vendedor == min_precio_vendedor:
-                    result_df.loc[idx, 'clasificacion'] = "Precio vendor minimo"
-                else:
-                    result_df.loc[idx, 'clasificacion'] = "Precio vendor no minimo"
+    # Precio mínimo de referencia: el del primer registro de cada grupo (aunque sea nulo)
+    precio_minimo = result_df['precio_minimo']
+    es_primero = ~grupo_id.duplicated()
+    precio_minimo_grupo = precio_minimo.where(es_primero).groupby(grupo_id).transform('max')
+    
+    # Precio vendedor mínimo por grupo
+    precio_vendedor = result_df['precio_vendedor']
+    min_precio_vendedor = precio_vendedor.groupby(grupo_id).transform('min')
+    
+    # Aplicar las reglas de clasificación sobre columnas completas
+    drogueria_minimo = (precio_minimo_grupo < precio_vendedor).to_numpy()
+    vendor_minimo = (precio_vendedor == min_precio_vendedor).to_numpy()
+    
+    result_df['clasificacion'] = np.select(
+        [~en_grupo, drogueria_minimo, vendor_minimo],
+        ["", "Precio droguería minimo", "Precio vendor minimo"],
+        default="Precio vendor no minimo"
+    ).astype(object)
     
     return result_df
 
@@ -447,8 +600,10 @@ def crear_grafico_oportunidades(vendor_df, df_potencial_convertido, selected_pos
     # Preparar diccionario de valores comprados como DM
     dm_values_dict = {}
     if dm_vendors_detail is not None and not dm_vendors_detail.empty and 'Vendor Real ID' in dm_vendors_detail.columns:
-        # Convertir a tipos numéricos para comparación correcta
-        dm_vendors_detail['Vendor Real ID'] = pd.to_numeric(dm_vendors_detail['Vendor Real ID'], errors='coerce')
+        # Convertir a tipos numéricos para comparación correcta (en una copia)
+        dm_vendors_detail = dm_vendors_detail.assign(
+            **{'Vendor Real ID': pd.to_numeric(dm_vendors_detail['Vendor Real ID'], errors='coerce')}
+        )
         
         # Crear diccionario de valores DM
         for _, row in dm_vendors_detail.iterrows():
@@ -523,9 +678,69 @@ def crear_grafico_oportunidades(vendor_df, df_potencial_convertido, selected_pos
     
     return fig
 
+def construir_indice_min_purchase(df_min_purchase):
+    """
+    Construye un índice de compra mínima keyed por (vendor_id, zona)
+    
+    Se construye una vez por carga de datos y permite resolver la compra mínima de todos
+    los vendors de un POS en una sola búsqueda (obtener_compras_minimas). Las filas dadas
+    de baja (deleted_at con valor) y las que no tienen zona no entran en el índice; si un
+    vendor tiene varias filas para la misma zona se conserva la primera.
+    
+    Args:
+        df_min_purchase: DataFrame con información de compra mínima
+        
+    Returns:
+        Serie min_purchase con MultiIndex (vendor_id, name); vacía si faltan columnas
+    """
+    columnas = ['vendor_id', 'name', 'min_purchase']
+    if df_min_purchase is None or not all(col in df_min_purchase.columns for col in columnas):
+        return pd.Series(
+            [], dtype=float, name='min_purchase',
+            index=pd.MultiIndex.from_arrays([[], []], names=['vendor_id', 'name'])
+        )
+    
+    vigentes = df_min_purchase['name'].notna()
+    if 'deleted_at' in df_min_purchase.columns:
+        vigentes &= df_min_purchase['deleted_at'].isna()
+    vigentes = vigentes.to_numpy()
+    
+    # Claves numéricas (float) como en construir_indice_status
+    vendor_ids = pd.to_numeric(df_min_purchase['vendor_id'], errors='coerce').astype(float).to_numpy()
+    indice = pd.Series(
+        df_min_purchase['min_purchase'].to_numpy()[vigentes],
+        index=pd.MultiIndex.from_arrays(
+            [vendor_ids[vigentes], df_min_purchase['name'].to_numpy(dtype=object)[vigentes]],
+            names=['vendor_id', 'name']
+        ),
+        name='min_purchase'
+    )
+    return indice[~indice.index.duplicated(keep='first')]
+
+def obtener_compras_minimas(vendor_ids, zonas, indice_min_purchase):
+    """
+    Obtiene la compra mínima de una lista de vendors en una zona en una sola llamada
+    
+    Args:
+        vendor_ids: Lista, array o Serie de IDs de vendor
+        zonas: Zona geográfica, o una secuencia de zonas alineada con vendor_ids
+        indice_min_purchase: Índice de compra mínima (construir_indice_min_purchase)
+        
+    Returns:
+        Array de compras mínimas alineado con vendor_ids (0 si el vendor no tiene compra
+        mínima en la zona)
+    """
+    vendor_ids = pd.to_numeric(pd.Series(vendor_ids, dtype=object), errors='coerce').astype(float).to_numpy()
+    if np.ndim(zonas) == 0:
+        zonas = np.full(len(vendor_ids), zonas, dtype=object)
+    
+    claves = pd.MultiIndex.from_arrays([vendor_ids, np.asarray(zonas, dtype=object)], names=['vendor_id', 'name'])
+    minimos = indice_min_purchase.reindex(claves).to_numpy(dtype=float)
+    return np.where(np.isnan(minimos), 0, minimos)
+
 def actualizar_vendor_analysis(productos_pos, df_vendors_pos, orders_pos, df_potencial_convertido, 
                          dm_vendors_detail, selected_pos, geo_zone, df_min_purchase, 
-                         intersection_sin_repetidos_winners):
+                         intersection_sin_repetidos_winners, indice_status=None):
     """
     Función principal para generar el análisis de vendors para un POS específico
     
@@ -537,127 +752,86 @@ def actualizar_vendor_analysis(productos_pos, df_vendors_pos, orders_pos, df_pot
         dm_vendors_detail: DataFrame con detalles de vendors que son drug manufacturers
         selected_pos: ID del POS seleccionado
         geo_zone: Zona geográfica del POS
-        df_min_purchase: DataFrame con información de compra mínima
+        df_min_purchase: Índice de compra mínima (construir_indice_min_purchase) o DataFrame
+            con información de compra mínima
         intersection_sin_repetidos_winners: DataFrame con productos ganadores (precio vendor mínimo)
+        indice_status: Índice de status prearmado (construir_indice_status); si es None se
+            construye a partir de df_vendors_pos
         
     Returns:
         DataFrame con análisis de vendors
     """
-    vendor_analysis = []
-    processed_vendors = set()
-    
-    # Crear diccionario para almacenar los valores potenciales por vendor
-    # basados en los productos ganadores (precio vendor mínimo)
-    potenciales_por_vendor = {}
+    if indice_status is None:
+        indice_status = construir_indice_status(df_vendors_pos)
+    indice_min_purchase = (df_min_purchase if isinstance(df_min_purchase, pd.Series)
+                           else construir_indice_min_purchase(df_min_purchase))
+    
+    # Valor potencial por vendor basado en los productos ganadores (precio vendor mínimo),
+    # en orden de primera aparición
+    ganadores = intersection_sin_repetidos_winners
+    if not ganadores.empty and 'vendor_id' in ganadores.columns:
+        if 'precio_total_vendedor' in ganadores.columns:
+            potenciales = ganadores.groupby('vendor_id', sort=False)['precio_total_vendedor'].sum()
+        else:
+            potenciales = pd.Series(0, index=pd.unique(ganadores['vendor_id']))
+    else:
+        potenciales = pd.Series([], dtype=float)
+    claves_potenciales = pd.to_numeric(pd.Series(potenciales.index, dtype=object), errors='coerce').astype(float)
+    potencial_por_clave = pd.Series(potenciales.to_numpy(), index=claves_potenciales.to_numpy())
     
-    # Calcular el potencial total por vendor basado en intersection_sin_repetidos_winners
-    if not intersection_sin_repetidos_winners.empty and 'vendor_id' in intersection_sin_repetidos_winners.columns:
-        for vendor_id in intersection_sin_repetidos_winners['vendor_id'].unique():
-            vendor_products = intersection_sin_repetidos_winners[intersection_sin_repetidos_winners['vendor_id'] == vendor_id]
-            valor_potencial = 0
-            if 'precio_total_vendedor' in vendor_products.columns:
-                valor_potencial = vendor_products['precio_total_vendedor'].sum()
-            potenciales_por_vendor[vendor_id] = valor_potencial
+    partes = []
+    procesados = np.array([], dtype=float)
     
-    # PARTE 1: PRIMERO AÑADIR VENDORS QUE SON DRUG MANUFACTURERS
+    # PARTE 1: PRIMERO LOS VENDORS QUE SON DRUG MANUFACTURERS, en el orden de la tabla
     if not dm_vendors_detail.empty and 'Vendor Real ID' in dm_vendors_detail.columns:
-        for _, row in dm_vendors_detail.iterrows():
-            if pd.notna(row.get('Vendor Real ID')):
-                vendor_id = row['Vendor Real ID']
-                
-                # Obtener status
-                vendor_status = obtener_status_vendor(vendor_id, selected_pos, df_vendors_pos)
-                
-                # Calcular valor potencial desde los productos ganadores
-                potential_value = potenciales_por_vendor.get(vendor_id, 0)
-                
-                # Obtener valor DM comprado directamente de dm_vendors_detail
-                comprado_como_dm = row.get('Total Comprado', 0)
-                
-                # Calcular valor convertido para drug manufacturers
-                # Solo los drug manufacturers deben tener valores convertidos
-                valor_convertido = 0
-                valor_compras_ganadores = row.get('Valor Compras Ganadores', 0)
-                
-                if pd.notna(valor_compras_ganadores) and valor_compras_ganadores > 0:
-                    # Para drug manufacturers, el valor convertido es el valor comprado como DM
-                    valor_convertido = valor_compras_ganadores
-                    
-                    # IMPORTANTE: Restar el valor convertido del potencial para no duplicar
-                    potential_value = max(0, potential_value - valor_convertido)
-                
-                # Obtener compra mínima
-                min_purchase_value = 0
-                if not df_min_purchase.empty and 'name' in df_min_purchase.columns and 'vendor_id' in df_min_purchase.columns:
-                    min_purchase_info = df_min_purchase[
-                        (df_min_purchase['vendor_id'] == vendor_id) & 
-                        (df_min_purchase['name'] == geo_zone)
-                    ]
-                    if not min_purchase_info.empty:
-                        min_purchase_value = min_purchase_info['min_purchase'].iloc[0]
-                
-                vendor_analysis.append({
-                    'Vendor ID': vendor_id,
-                    'Status': get_status_description(vendor_status),
-                    'Valor Potencial Total': potential_value,
-                    'Valor Convertido': valor_convertido,
-                    'Compra Mínima': min_purchase_value,
-                    'Es Drug Manufacturer': 'Sí',
-                    'Drug Manufacturer ID': row.get('Droguería/Vendor ID'),
-                    'Total Comprado Como DM': comprado_como_dm
-                })
-                
-                processed_vendors.add(vendor_id)
-    
-    # PARTE 2: AÑADIR VENDORS REGULARES (NO DRUG MANUFACTURERS)
-    # Usamos la información de intersection_sin_repetidos_winners para obtener los vendors relevantes
-    if not intersection_sin_repetidos_winners.empty and 'vendor_id' in intersection_sin_repetidos_winners.columns:
-        unique_vendors = intersection_sin_repetidos_winners['vendor_id'].unique()
+        dm = dm_vendors_detail[dm_vendors_detail['Vendor Real ID'].notna()]
+        procesados = pd.to_numeric(dm['Vendor Real ID'], errors='coerce').astype(float).to_numpy()
+        potencial = potencial_por_clave.reindex(procesados).fillna(0).to_numpy()
         
-        for vendor_id in unique_vendors:
-            # Omitir vendors ya procesados
-            if vendor_id in processed_vendors:
-                continue
-                
-            # Obtener status
-            vendor_status = obtener_status_vendor(vendor_id, selected_pos, df_vendors_pos)
-            
-            # Obtener compra mínima
-            min_purchase_value = 0
-            if not df_min_purchase.empty and 'name' in df_min_purchase.columns and 'vendor_id' in df_min_purchase.columns:
-                min_purchase_info = df_min_purchase[
-                    (df_min_purchase['vendor_id'] == vendor_id) & 
-                    (df_min_purchase['name'] == geo_zone)
-                ]
-                if not min_purchase_info.empty:
-                    min_purchase_value = min_purchase_info['min_purchase'].iloc[0]
-            
-            # Calcular valor potencial desde los productos ganadores
-            potential_value = potenciales_por_vendor.get(vendor_id, 0)
-            
-            # Para vendors regulares (no drug manufacturers), no hay valor convertido
-            valor_convertido = 0
-            
-            # Agregar a la lista de análisis
-            vendor_analysis.append({
-                'Vendor ID': vendor_id,
-                'Status': get_status_description(vendor_status),
-                'Valor Potencial Total': potential_value,
-                'Valor Convertido': valor_convertido,  # Para vendors regulares, siempre es 0
-                'Compra Mínima': min_purchase_value,
-                'Es Drug Manufacturer': 'No',
-                'Drug Manufacturer ID': None,
-                'Total Comprado Como DM': 0
-            })
-            
-            processed_vendors.add(vendor_id)
-    
-    # Crear DataFrame final
-    if vendor_analysis:
-        vendor_df = pd.DataFrame(vendor_analysis)
-        return vendor_df
-    else:
+        # Solo los drug manufacturers tienen valor convertido: el valor de sus compras ganadoras
+        if 'Valor Compras Ganadores' in dm.columns:
+            ganadoras = pd.to_numeric(dm['Valor Compras Ganadores'], errors='coerce').to_numpy(dtype=float)
+        else:
+            ganadoras = np.zeros(len(dm))
+        convertido = np.where(ganadoras > 0, ganadoras, 0)
+        
+        partes.append(pd.DataFrame({
+            'Vendor ID': dm['Vendor Real ID'].to_numpy(),
+            # IMPORTANTE: Restar el valor convertido del potencial para no duplicar
+            'Valor Potencial Total': np.where(convertido > 0, np.maximum(0, potencial - convertido), potencial),
+            'Valor Convertido': convertido,
+            'Es Drug Manufacturer': 'Sí',
+            'Drug Manufacturer ID': (dm['Droguería/Vendor ID'].to_numpy() if 'Droguería/Vendor ID' in dm.columns
+                                     else None),
+            'Total Comprado Como DM': dm['Total Comprado'].to_numpy() if 'Total Comprado' in dm.columns else 0,
+        }))
+    
+    # PARTE 2: VENDORS REGULARES (NO DRUG MANUFACTURERS) con productos ganadores
+    regulares = ~claves_potenciales.isin(procesados).to_numpy()
+    if regulares.any():
+        partes.append(pd.DataFrame({
+            'Vendor ID': potenciales.index[regulares],
+            'Valor Potencial Total': potenciales.to_numpy()[regulares],
+            # Para vendors regulares, el valor convertido siempre es 0
+            'Valor Convertido': 0,
+            'Es Drug Manufacturer': 'No',
+            'Drug Manufacturer ID': np.nan,
+            'Total Comprado Como DM': 0,
+        }))
+    
+    if not partes:
         return pd.DataFrame()
+    vendor_df = pd.concat(partes, ignore_index=True)
+    vendor_ids = pd.to_numeric(vendor_df['Vendor ID'])
+    vendor_df['Vendor ID'] = vendor_ids.astype('int64') if (vendor_ids % 1 == 0).all() else vendor_ids
+    
+    # Status y compra mínima de todos los vendors en una sola búsqueda cada uno
+    status = obtener_status_vendors(vendor_df['Vendor ID'], selected_pos, indice_status)
+    vendor_df['Status'] = [get_status_description(s) for s in status]
+    vendor_df['Compra Mínima'] = obtener_compras_minimas(vendor_df['Vendor ID'], geo_zone, indice_min_purchase)
+    
+    return vendor_df[COLUMNAS_VENDOR_ANALYSIS]
+
 def generar_insight_simple(vendor_df, selected_pos):
     """
     Genera un DataFrame simple con relaciones POS-vendor que tienen 
@@ -692,502 +866,1706 @@ def generar_insight_simple(vendor_df, selected_pos):
     
     return df_simple
 
-@st.cache_data
-def load_and_process_data():
-    """Función principal que procesa todos los datos necesarios"""
-    try:
-        # Cargar archivos
-        df_pos_address = pd.read_csv('pos_address.csv')
-        df_pedidos = pd.read_csv('orders_delivered_pos_vendor_geozone.csv')
-        df_proveedores = pd.read_csv('vendors_catalog.csv')
-        df_vendors_pos = pd.read_csv('vendor_pos_relations.csv')
-        df_products = pd.read_csv('top_5_productos_geozona.csv')
-        df_vendor_dm = load_vendors_dm()
-        
-        try:
-            df_min_purchase = pd.read_csv('minimum_purchase.csv')
-        except FileNotFoundError:
-            df_min_purchase = pd.DataFrame(columns=['vendor_id', 'name', 'min_purchase'])
-        
-        # Procesar dirección y geo_zone
-        df_pos_address['geo_zone'] = df_pos_address['address'].apply(obtener_geo_zone)
-        
-        if 'geo_zone' in df_pedidos.columns:
-            df_pedidos = df_pedidos.drop(columns=['geo_zone'])
-            
-        # Normalizar datos
-        df_proveedores['percentage'].fillna(0, inplace=True)
-        pos_geo_zones = df_pos_address[['point_of_sale_id', 'geo_zone']]
-        
-        # Reemplazar abreviaturas
-        abreviaturas = {
-            'B.C.S.': 'Baja California Sur', 'Qro.': 'Querétaro', 'Jal.': 'Jalisco',
-            'Pue.': 'Puebla', 'Méx.': 'CDMX', 'Oax.': 'Oaxaca', 'Chih.': 'Chihuahua',
-            'Coah.': 'Coahuila de Zaragoza', 'Mich.': 'Michoacán de Ocampo',
-            'Ver.': 'Veracruz de Ignacio de la Llave', 'Chis.': 'Chiapas',
-            'N.L.': 'Nuevo León', 'Hgo.': 'Hidalgo', 'Tlax.': 'Tlaxcala',
-            'Tamps.': 'Tamaulipas', 'Yuc.': 'Yucatan', 'Mor.': 'Morelos',
-            'Sin.': 'Sinaloa', 'S.L.P.': 'San Luis Potosí', 'Q.R.': 'Quintana Roo',
-            'Dgo.': 'Durango', 'B.C.': 'Baja California', 'Gto.': 'Guanajuato',
-            'Camp.': 'Campeche', 'Tab.': 'Tabasco', 'Son.': 'Sonora',
-            'Gro.': 'Guerrero', 'Zac.': 'Zacatecas', 'Ags.': 'Aguascalientes',
-            'Nay.': 'Nayarit'
-        }
-        pos_geo_zones['geo_zone'] = pos_geo_zones['geo_zone'].replace(abreviaturas)
-        
-        # Separar proveedores nacionales y regionales
-        df_proveedores_nacional = df_proveedores[df_proveedores['name'] == 'México'].copy()
-        df_proveedores_regional = df_proveedores[df_proveedores['name'] != 'México'].copy()
-        
-        # Unir pedidos con zonas geográficas
-        df_pedidos_zonas = pd.merge(df_pedidos, pos_geo_zones, on='point_of_sale_id', how='left')
-        df_pedidos_zonas = df_pedidos_zonas[df_pedidos_zonas['unidades_pedidas'] > 0]
+COLUMNAS_VENDOR_ANALYSIS = [
+    'Vendor ID', 'Status', 'Valor Potencial Total', 'Valor Convertido', 'Compra Mínima',
+    'Es Drug Manufacturer', 'Drug Manufacturer ID', 'Total Comprado Como DM'
+]
+
+def calcular_compras_ganadoras_dm(dm_detalle, orders, df_clasificado):
+    """
+    Cruza las compras a drug manufacturers con los productos cuyo precio de droguería es
+    mínimo, para uno o varios POS
+    
+    Reproduce el merge por POS y producto seguido de drop_duplicates('super_catalog_id') del
+    bloque "Ventas de Distribuidores que son Vendors": queda la primera compra y el primer
+    producto ganador de cada POS y producto.
+    
+    Args:
+        dm_detalle: DataFrame con point_of_sale_id y dm_id (una fila por POS y drug manufacturer)
+        orders: DataFrame de pedidos (point_of_sale_id, super_catalog_id, vendor_id)
+        df_clasificado: DataFrame clasificado (agregar_columna_clasificacion)
         
-        # Procesar con proveedores nacionales y regionales
-        df_pedidos_proveedores_nacional = pd.merge(
-            df_pedidos_zonas, df_proveedores_nacional, on='super_catalog_id', how='inner'
-        )
-        df_pedidos_proveedores_nacional = df_pedidos_proveedores_nacional[
-            df_pedidos_proveedores_nacional['unidades_pedidas'] > 0
-        ]
+    Returns:
+        DataFrame con point_of_sale_id, super_catalog_id, vendor_id (drug manufacturer de la
+        compra) y valor_vendedor (del producto ganador)
+    """
+    claves = ['point_of_sale_id', 'super_catalog_id']
+    # Solo se copian las columnas que se usan
+    ganadores_drogueria = df_clasificado.loc[
+        (df_clasificado['clasificacion'] == 'Precio droguería minimo').to_numpy(), claves + ['valor_vendedor']
+    ]
+    
+    # Compras a drug manufacturers del detalle de cada POS
+    pares_dm = pd.MultiIndex.from_frame(dm_detalle[['point_of_sale_id', 'dm_id']])
+    compras_dm = orders.loc[pd.MultiIndex.from_arrays(
+        [orders['point_of_sale_id'], pd.to_numeric(orders['vendor_id'], errors='coerce')]
+    ).isin(pares_dm), claves + ['vendor_id']]
+    
+    # Se cruzan solo la primera compra y el primer producto ganador de cada POS y producto
+    primeras_compras = compras_dm.drop_duplicates(claves)
+    primeros_ganadores = ganadores_drogueria.drop_duplicates(claves)
+    compras_ganadoras = pd.merge(primeras_compras, primeros_ganadores, on=claves, how='inner')
+    compras_ganadoras['vendor_id'] = pd.to_numeric(compras_ganadoras['vendor_id'], errors='coerce')
+    return compras_ganadoras
+
+def repartir_valor_ganadores_dm(dm_detalle, compras_ganadoras):
+    """
+    Reparte el valor de las compras ganadoras entre los drug manufacturers de cada POS
+    
+    Misma regla que tenía la página: valores individuales si su suma cuadra con el total del
+    POS (1% de tolerancia); si no, reparto proporcional a los valores individuales o, si
+    todos son cero, equitativo entre los drug manufacturers del POS.
+    
+    Args:
+        dm_detalle: DataFrame con point_of_sale_id y dm_id (una fila por POS y drug manufacturer)
+        compras_ganadoras: DataFrame de calcular_compras_ganadoras_dm
         
-        df_pedidos_proveedores_regional = pd.merge(
-            df_pedidos_zonas, df_proveedores_regional, 
-            left_on=['super_catalog_id', 'geo_zone'], right_on=['super_catalog_id', 'name'], 
-            how='inner'
-        )
-        df_pedidos_proveedores_regional = df_pedidos_proveedores_regional[
-            df_pedidos_proveedores_regional['unidades_pedidas'] > 0
-        ]
+    Returns:
+        Array con el valor de compras ganadoras alineado con las filas de dm_detalle
+    """
+    pares_dm = pd.MultiIndex.from_frame(dm_detalle[['point_of_sale_id', 'dm_id']])
+    valor_por_dm = compras_ganadoras.groupby(['point_of_sale_id', 'vendor_id'])['valor_vendedor'].sum()
+    valor_total_pos = compras_ganadoras.groupby('point_of_sale_id')['valor_vendedor'].sum()
+    
+    pos = dm_detalle['point_of_sale_id']
+    valor_dm = pd.Series(valor_por_dm.reindex(pares_dm).fillna(0).to_numpy(), index=dm_detalle.index)
+    valor_total = pos.map(valor_total_pos).fillna(0)
+    suma_valores = valor_dm.groupby(pos).transform('sum')
+    n_dm = pos.map(pos.value_counts())
+    
+    cuadra = (valor_total - suma_valores).abs() < 0.01 * valor_total
+    proporcional = valor_dm * (valor_total / suma_valores.where(suma_valores > 0))
+    equitativo = valor_total / n_dm
+    resultado = np.where(cuadra, valor_dm, np.where(suma_valores > 0, proporcional, equitativo))
+    return resultado.astype(float)
+
+def calcular_valor_compras_ganadores_dm(dm_detalle, orders, df_clasificado):
+    """
+    Calcula el 'Valor Compras Ganadores' de cada drug manufacturer para todos los POS a la vez
+    
+    Args:
+        dm_detalle: DataFrame con point_of_sale_id y dm_id (una fila por POS y drug manufacturer)
+        orders: DataFrame de pedidos (point_of_sale_id, super_catalog_id, vendor_id)
+        df_clasificado: DataFrame clasificado (agregar_columna_clasificacion)
         
-        # Convertir tipos de datos para cálculos correctos
-        df_pedidos_proveedores_nacional['base_price'] = df_pedidos_proveedores_nacional['base_price'].astype(float)
-        df_pedidos_proveedores_nacional['percentage'] = df_pedidos_proveedores_nacional['percentage'].astype(float)
+    Returns:
+        Array con el valor de compras ganadoras alineado con las filas de dm_detalle
+    """
+    if dm_detalle.empty:
+        return np.array([], dtype=float)
+    
+    compras_ganadoras = calcular_compras_ganadoras_dm(dm_detalle, orders, df_clasificado)
+    return repartir_valor_ganadores_dm(dm_detalle, compras_ganadoras)
 
-        df_pedidos_proveedores_regional['base_price'] = df_pedidos_proveedores_regional['base_price'].astype(float)
-        df_pedidos_proveedores_regional['percentage'] = df_pedidos_proveedores_regional['percentage'].astype(float)
+def asignar_compras_ganadores_dm(dm_vendors_detail, orders, df_clasificado):
+    """
+    Agrega 'Valor Compras Ganadores' y '% Compras Ganadores' a la tabla de vendors que son
+    drug manufacturers, para un POS o para todos a la vez
+    
+    Args:
+        dm_vendors_detail: DataFrame de crear_dataframe_vendors_dm sobre la tabla de detalle
+            (columnas 'POS ID', 'Droguería/Vendor ID' y 'Total Comprado')
+        orders: DataFrame de pedidos de los mismos POS
+        df_clasificado: DataFrame clasificado de los mismos POS
+        
+    Returns:
+        Tupla (tabla, resumen): la tabla con las dos columnas nuevas (sin modificar
+        dm_vendors_detail) y, por POS, el valor total de las compras a drug manufacturers
+        que son productos ganadores ('valor') y la cantidad de esos productos ('productos')
+    """
+    dm_detalle = pd.DataFrame({
+        'point_of_sale_id': dm_vendors_detail['POS ID'].to_numpy(),
+        'dm_id': dm_vendors_detail['Droguería/Vendor ID'].to_numpy(),
+    }, index=dm_vendors_detail.index)
+    compras_ganadoras = calcular_compras_ganadoras_dm(dm_detalle, orders, df_clasificado)
+    valor = repartir_valor_ganadores_dm(dm_detalle, compras_ganadoras)
+    
+    total_comprado = dm_vendors_detail['Total Comprado'].to_numpy(dtype=float)
+    porcentaje = np.divide(valor * 100, total_comprado, out=np.zeros(len(valor)), where=total_comprado > 0)
+    tabla = dm_vendors_detail.assign(**{'Valor Compras Ganadores': valor, '% Compras Ganadores': porcentaje})
+    
+    resumen = (compras_ganadoras.groupby('point_of_sale_id')['valor_vendedor']
+               .agg(valor='sum', productos='size')
+               .reindex(pd.unique(dm_detalle['point_of_sale_id']), fill_value=0))
+    return tabla, resumen
 
-        # Calcular precio_vendedor
-        df_pedidos_proveedores_nacional['precio_vendedor'] = df_pedidos_proveedores_nacional['base_price'] + (df_pedidos_proveedores_nacional['base_price'] * df_pedidos_proveedores_nacional['percentage'] / 100)
-        df_pedidos_proveedores_regional['precio_vendedor'] = df_pedidos_proveedores_regional['base_price'] + (df_pedidos_proveedores_regional['base_price'] * df_pedidos_proveedores_regional['percentage'] / 100)
+def calcular_vendor_analysis_todos_pos(pos_vendor_totals, df_original, df_clasificado, df_vendor_dm,
+                                       indice_status, pos_geo_zones, df_min_purchase, pos_ids=None):
+    """
+    Calcula el análisis de vendors (equivalente a actualizar_vendor_analysis) para todos los POS
+    en una sola pasada vectorizada
+    
+    Args:
+        pos_vendor_totals: DataFrame con el total comprado por POS y droguería
+        df_original: DataFrame de pedidos
+        df_clasificado: DataFrame clasificado (agregar_columna_clasificacion)
+        df_vendor_dm: DataFrame con relaciones vendor-drug_manufacturer
+        indice_status: Índice de status (construir_indice_status)
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        df_min_purchase: Índice de compra mínima (construir_indice_min_purchase) o DataFrame
+            con información de compra mínima
+        pos_ids: IDs de POS a analizar; por defecto todos los de pos_vendor_totals
+        
+    Returns:
+        DataFrame con point_of_sale_id y las columnas de actualizar_vendor_analysis, ordenado
+        por POS, con los drug manufacturers primero como en la página
+    """
+    columnas = ['point_of_sale_id'] + COLUMNAS_VENDOR_ANALYSIS
+    if pos_vendor_totals.empty or df_clasificado.empty or 'point_of_sale_id' not in df_clasificado.columns:
+        return pd.DataFrame(columns=columnas)
+    
+    # La página solo analiza POS con compras (pos_list sale de pos_vendor_totals)
+    todos_pos = pos_vendor_totals['point_of_sale_id'].unique()
+    pos_ids = todos_pos if pos_ids is None else np.intersect1d(todos_pos, np.asarray(pos_ids))
+    totales = pos_vendor_totals[pos_vendor_totals['point_of_sale_id'].isin(pos_ids)]
+    orders = df_original[df_original['point_of_sale_id'].isin(pos_ids)]
+    clasificado = df_clasificado[df_clasificado['point_of_sale_id'].isin(pos_ids)]
+    
+    potenciales = calcular_potenciales_por_vendor(orders, clasificado)
+    return armar_vendor_analysis(totales, potenciales, orders, clasificado, df_vendor_dm,
+                                 indice_status, pos_geo_zones, df_min_purchase)
 
-        # Unir dataframes
-        df_pedidos_proveedores = pd.concat([
-            df_pedidos_proveedores_regional, df_pedidos_proveedores_nacional
-        ], axis=0, ignore_index=True)
+def calcular_potenciales_por_vendor(orders, df_clasificado):
+    """
+    Suma el valor potencial por POS y vendor: productos con precio vendor mínimo presentes
+    en las órdenes (intersection_sin_repetidos_winners de la página)
+    
+    Args:
+        orders: DataFrame de pedidos
+        df_clasificado: DataFrame clasificado (agregar_columna_clasificacion)
         
-        # Calcular precio_total_vendedor
-        if 'precio_vendedor' in df_pedidos_proveedores.columns and 'unidades_pedidas' in df_pedidos_proveedores.columns:
-            df_pedidos_proveedores['precio_total_vendedor'] = (
-                df_pedidos_proveedores['unidades_pedidas'].astype(float) * 
-                df_pedidos_proveedores['precio_vendedor'].astype(float)
-            )
+    Returns:
+        DataFrame con point_of_sale_id, Vendor ID y potencial, en orden de primera aparición
+    """
+    claves = ['super_catalog_id', 'point_of_sale_id', 'order_id']
+    ganadores = df_clasificado[df_clasificado['clasificacion'] == 'Precio vendor minimo']
+    interseccion = pd.merge(ganadores, orders[claves], on=claves, how='inner')
+    return (interseccion
+            .groupby(['point_of_sale_id', 'vendor_id'], sort=False)['precio_total_vendedor']
+            .sum()
+            .reset_index()
+            .rename(columns={'vendor_id': 'Vendor ID', 'precio_total_vendedor': 'potencial'}))
+
+def armar_vendor_analysis(totales, potenciales, orders, df_clasificado, df_vendor_dm,
+                          indice_status, pos_geo_zones, df_min_purchase):
+    """
+    Arma el análisis de vendors de todos los POS a partir de los totales y potenciales
+    
+    Args:
+        totales: DataFrame con el total comprado por POS y droguería (pos_vendor_totals)
+        potenciales: DataFrame de calcular_potenciales_por_vendor
+        orders: Pedidos para el valor de compras ganadoras de los drug manufacturers;
+            basta con la primera compra de cada POS y producto
+        df_clasificado: Productos clasificados para el mismo cálculo; basta con el primer
+            'Precio droguería minimo' de cada POS y producto
+        df_vendor_dm: DataFrame con relaciones vendor-drug_manufacturer
+        indice_status: Índice de status (construir_indice_status)
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        df_min_purchase: Índice de compra mínima (construir_indice_min_purchase) o DataFrame
+            con información de compra mínima
         
-        # Unir con relaciones vendor-pos
-        if 'vendor_id' in df_pedidos_proveedores.columns and 'point_of_sale_id' in df_pedidos_proveedores.columns:
-            df_pedidos_proveedores = pd.merge(
-                df_pedidos_proveedores, df_vendors_pos,
-                on=['point_of_sale_id', 'vendor_id'], how='left'
-            )
+    Returns:
+        DataFrame con point_of_sale_id y las columnas de actualizar_vendor_analysis
+    """
+    columnas = ['point_of_sale_id'] + COLUMNAS_VENDOR_ANALYSIS
+    potenciales = potenciales.assign(orden=np.arange(len(potenciales)))
+    
+    # PARTE 1: vendors que son drug manufacturers, en el orden de la tabla de detalle
+    partes = []
+    procesados = pd.MultiIndex.from_arrays([[], []])
+    if not df_vendor_dm.empty:
+        detalle = totales.sort_values(['point_of_sale_id', 'total_compra'], ascending=[True, False], kind='stable')
+        dm_detalle = crear_dataframe_vendors_dm(detalle, df_vendor_dm, columna='vendor_id')
         
-        # Corregir nombres de columnas
-        df_pedidos_proveedores.rename(columns={'vendor_id':'drug_manufacturer_id', 'vendor_id_y':'vendor_id'}, inplace=True)
-        
-        # Calcular precios mínimos locales
-        cols_needed = ['point_of_sale_id', 'super_catalog_id', 'precio_minimo']
-        if all(col in df_pedidos_proveedores.columns for col in cols_needed):
-            min_prices = (df_pedidos_proveedores
-                         .groupby(['point_of_sale_id', 'order_id','super_catalog_id'])['precio_minimo']
-                         .min()
-                         .reset_index())
-            min_prices.columns = ['point_of_sale_id','order_id', 'super_catalog_id', 'precio_minimo_orders']
+        if not dm_detalle.empty:
+            dm_detalle = (dm_detalle.rename(columns={'vendor_id': 'dm_id'})
+                          [['point_of_sale_id', 'dm_id', 'total_compra', 'Vendor Real ID']].reset_index(drop=True))
+            valor_ganadores = calcular_valor_compras_ganadores_dm(dm_detalle, orders, df_clasificado)
+            dm_filas = pd.DataFrame({
+                'point_of_sale_id': dm_detalle['point_of_sale_id'],
+                'Vendor ID': pd.to_numeric(dm_detalle['Vendor Real ID'], errors='coerce'),
+                'Drug Manufacturer ID': dm_detalle['dm_id'],
+                'Total Comprado Como DM': dm_detalle['total_compra'],
+                'Valor Convertido': np.where(valor_ganadores > 0, valor_ganadores, 0.0),
+            })
+            dm_filas = dm_filas[dm_filas['Vendor ID'].notna()].reset_index(drop=True)
+            dm_filas['orden'] = np.arange(len(dm_filas))
             
-            # Unir para comparar precios
-            df_con_precios_minimos_local = pd.merge(
-                df_pedidos_proveedores, min_prices,
-                on=['point_of_sale_id', 'super_catalog_id','order_id'], how='left'
+            claves_dm = pd.MultiIndex.from_arrays(
+                [dm_filas['point_of_sale_id'].astype(float), dm_filas['Vendor ID'].astype(float)]
             )
-            
-            # Clasificar productos
-            df_clasificado = agregar_columna_clasificacion(df_con_precios_minimos_local)
-        else:
-            df_clasificado = pd.DataFrame()
-        
-        # Calcular métricas para visualización
-        df_orders = df_pedidos.copy()
-        
-        # Agregar total_compra si no existe
-        if 'total_compra' not in df_orders.columns and 'unidades_pedidas' in df_orders.columns and 'precio_minimo' in df_orders.columns:
-            df_orders['total_compra'] = df_orders['unidades_pedidas'] * df_orders['precio_minimo']
-        
-        # Calcular estadísticas por POS
-        if all(col in df_orders.columns for col in ['point_of_sale_id', 'order_id', 'total_compra']):
-            order_totals = df_orders.groupby(['point_of_sale_id', 'order_id'])['total_compra'].sum().reset_index()
-            pos_order_stats = order_totals.groupby('point_of_sale_id').agg({
-                'total_compra': ['mean', 'count']
-            }).reset_index()
-            pos_order_stats.columns = ['point_of_sale_id', 'promedio_por_orden', 'numero_ordenes']
-        else:
-            pos_order_stats = pd.DataFrame(columns=['point_of_sale_id', 'promedio_por_orden', 'numero_ordenes'])
-        
-        # Calcular totales por vendor
-        if all(col in df_orders.columns for col in ['point_of_sale_id', 'vendor_id', 'total_compra']):
-            pos_vendor_totals = df_orders.groupby(['point_of_sale_id', 'vendor_id'])['total_compra'].sum().reset_index()
-        else:
-            pos_vendor_totals = pd.DataFrame(columns=['point_of_sale_id', 'vendor_id', 'total_compra'])
+            potencial = potenciales.set_index(
+                [potenciales['point_of_sale_id'].astype(float), potenciales['Vendor ID'].astype(float)]
+            )['potencial']
+            potencial = potencial.reindex(claves_dm).fillna(0).to_numpy()
+            convertido = dm_filas['Valor Convertido'].to_numpy()
+            # IMPORTANTE: Restar el valor convertido del potencial para no duplicar
+            dm_filas['Valor Potencial Total'] = np.where(convertido > 0, np.maximum(0, potencial - convertido), potencial)
+            dm_filas['Es Drug Manufacturer'] = 'Sí'
+            dm_filas['parte'] = 1
+            partes.append(dm_filas)
+            procesados = claves_dm
+    
+    # PARTE 2: vendors regulares con productos ganadores que no se procesaron como DM
+    claves_potenciales = pd.MultiIndex.from_arrays(
+        [potenciales['point_of_sale_id'].astype(float), potenciales['Vendor ID'].astype(float)]
+    )
+    regulares = potenciales[~claves_potenciales.isin(procesados)].copy()
+    regulares['Valor Potencial Total'] = regulares['potencial']
+    regulares['Valor Convertido'] = 0.0
+    regulares['Es Drug Manufacturer'] = 'No'
+    regulares['Drug Manufacturer ID'] = None
+    regulares['Total Comprado Como DM'] = 0.0
+    regulares['parte'] = 2
+    partes.append(regulares)
+    
+    vendor_df = pd.concat(partes, ignore_index=True)
+    if vendor_df.empty:
+        return pd.DataFrame(columns=columnas)
+    vendor_df = vendor_df.sort_values(['point_of_sale_id', 'parte', 'orden'], kind='stable').reset_index(drop=True)
+    vendor_ids = pd.to_numeric(vendor_df['Vendor ID'])
+    vendor_df['Vendor ID'] = vendor_ids.astype('int64') if (vendor_ids % 1 == 0).all() else vendor_ids
+    
+    # Status de todos los pares (vendor, POS) en una sola búsqueda
+    status = obtener_status_vendors(vendor_df['Vendor ID'], vendor_df['point_of_sale_id'], indice_status)
+    vendor_df['Status'] = [get_status_description(s) for s in status]
+    
+    # Compra mínima del vendor en la zona del POS (primera coincidencia, como en la página)
+    indice_min_purchase = (df_min_purchase if isinstance(df_min_purchase, pd.Series)
+                           else construir_indice_min_purchase(df_min_purchase))
+    zonas = pos_geo_zones.drop_duplicates('point_of_sale_id').set_index('point_of_sale_id')['geo_zone']
+    vendor_df['Compra Mínima'] = obtener_compras_minimas(
+        vendor_df['Vendor ID'], vendor_df['point_of_sale_id'].map(zonas).to_numpy(dtype=object), indice_min_purchase
+    )
+    
+    return vendor_df[columnas]
+
+def generar_insights_todos_pos(vendor_df_todos):
+    """
+    Genera la tabla de oportunidades con valor potencial superior a $20,000 para todos los POS
+    
+    Args:
+        vendor_df_todos: DataFrame de calcular_vendor_analysis_todos_pos
         
-        return pos_vendor_totals, df_pedidos, pos_order_stats, df_min_purchase, df_vendor_dm, pos_geo_zones, df_clasificado
+    Returns:
+        DataFrame con POS ID, Vendor ID, Status y Valor Potencial, ordenado por POS y
+        valor potencial descendente
+    """
+    if vendor_df_todos.empty:
+        return pd.DataFrame(columns=['POS ID', 'Vendor ID', 'Status', 'Valor Potencial'])
     
-    except Exception as e:
-        import traceback
-        print("Error en load_and_process_data:", traceback.format_exc())
-        empty_df = pd.DataFrame()
-        return empty_df, empty_df, empty_df, empty_df, empty_df, empty_df, empty_df
+    oportunidades = vendor_df_todos[vendor_df_todos['Valor Potencial Total'] > 20000]
+    df_simple = pd.DataFrame({
+        'POS ID': oportunidades['point_of_sale_id'],
+        'Vendor ID': oportunidades['Vendor ID'],
+        'Status': oportunidades['Status'],
+        'Valor Potencial': oportunidades['Valor Potencial Total']
+    })
+    
+    return df_simple.sort_values(['POS ID', 'Valor Potencial'], ascending=[True, False], kind='stable').reset_index(drop=True)
 
-# Código principal
-try:    
-    pos_vendor_totals, df_original, pos_order_stats, df_min_purchase, df_vendor_dm, pos_geo_zones, df_clasificado = load_and_process_data()
+def normalizar_pos_address(df_pos_address):
+    """
+    Normaliza pos_address.csv: extrae la zona geográfica de la dirección
     
-    # Cargar el archivo vendors_dm.csv
-    df_vendor_dm = pd.DataFrame()
-    try:
-        df_vendor_dm = pd.read_csv('vendors_dm.csv')
-        # Asegurarse de que las columnas estén correctamente nombradas
-        if 'client_id' in df_vendor_dm.columns and 'vendor_id' not in df_vendor_dm.columns:
-            df_vendor_dm.rename(columns={'client_id': 'vendor_id'}, inplace=True)
-    except Exception as e:
-        print(f"Error al cargar vendors_dm.csv: {e}")
+    Args:
+        df_pos_address: DataFrame leído de pos_address.csv
+        
+    Returns:
+        DataFrame con la columna geo_zone calculada
+    """
+    df_pos_address['geo_zone'] = obtener_geo_zones(df_pos_address['address'])
+    return df_pos_address
 
-    # Cargar el archivo vendor_pos_relations.csv
-    df_vendors_pos = pd.DataFrame()
-    try:
-        df_vendors_pos = pd.read_csv('vendor_pos_relations.csv')
-    except Exception as e:
-        print(f"Error al cargar vendor_pos_relations.csv: {e}")
-        st.warning("No se pudo cargar la información de relaciones vendor-pos. Algunas funcionalidades podrían estar limitadas.")
+def normalizar_pedidos(df_pedidos):
+    """
+    Normaliza el archivo de pedidos: descarta geo_zone, que se obtiene de pos_address
+    
+    Args:
+        df_pedidos: DataFrame leído del archivo de pedidos
+        
+    Returns:
+        DataFrame de pedidos normalizado
+    """
+    if 'geo_zone' in df_pedidos.columns:
+        df_pedidos = df_pedidos.drop(columns=['geo_zone'])
+    return df_pedidos
 
-    # Filtro de punto de venta
-    st.header("Análisis Individual de POS")
-    pos_list = sorted(list(set(pos_vendor_totals['point_of_sale_id']))) if not pos_vendor_totals.empty else []
+def normalizar_proveedores(df_proveedores):
+    """
+    Normaliza vendors_catalog.csv: porcentajes nulos a 0 y precios como float
     
-    if not pos_list:
-        st.warning("No hay puntos de venta disponibles para analizar")
-    else:
-        selected_pos = st.selectbox("Seleccionar Punto de Venta", options=pos_list)
-
-        # Mostrar información del POS seleccionado
-        if selected_pos:
-            # Filtrar datos para el POS seleccionado
-            pos_data = pos_vendor_totals[pos_vendor_totals['point_of_sale_id'] == selected_pos]
-            pos_data = pos_data.sort_values('total_compra', ascending=False) if not pos_data.empty else pd.DataFrame()
-
-            # Obtener estadísticas
-            pos_stats = pos_order_stats[pos_order_stats['point_of_sale_id'] == selected_pos]
-            promedio_por_orden = pos_stats.iloc[0]['promedio_por_orden'] if not pos_stats.empty else 0
-            numero_ordenes = int(pos_stats.iloc[0]['numero_ordenes']) if not pos_stats.empty else 0
-                
-            st.subheader("Información del Punto de Venta")
-
-            # Métricas principales
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.metric(f"Total de Compras - POS {selected_pos}", 
-                          f"${pos_data['total_compra'].sum():,.2f}" if not pos_data.empty else "$0.00")
-            with col2:
-                st.metric("Promedio por Orden", f"${promedio_por_orden:,.2f}")
-            with col3:
-                st.metric("Número de Órdenes", f"{numero_ordenes:,}")
-
-            # Información adicional
-            pos_info = pos_geo_zones[pos_geo_zones['point_of_sale_id'] == selected_pos]
-            pos_country = df_original[df_original['point_of_sale_id'] == selected_pos]
-
-            country = pos_country['country'].iloc[0] if not pos_country.empty and 'country' in pos_country.columns else 'No disponible'
-            geo_zone = pos_info['geo_zone'].iloc[0] if not pos_info.empty and 'geo_zone' in pos_info.columns else 'No disponible'
-
-            info_col1, info_col2, info_col3 = st.columns(3)
-            
-            with info_col1:
-                st.metric("País", country)
-            with info_col2:
-                st.metric("Zona Geográfica", geo_zone)
-            with info_col3:
-                st.metric("Total Vendors", len(pos_data) if not pos_data.empty else 0)
-
-            # Detalle de compras
-            st.subheader("Detalle de Compras por Droguería/Vendor")
-            if not pos_data.empty:
-                pos_data['porcentaje'] = (pos_data['total_compra'] / pos_data['total_compra'].sum()) * 100    
-                detail_table = pos_data.copy()
-                detail_table.columns = ['POS ID', 'Droguería/Vendor ID', 'Total Comprado', 'Porcentaje']
-                detail_table = detail_table.round({'Porcentaje': 2})
-                
-                st.dataframe(
-                    detail_table.style.format({
-                        'Total Comprado': '${:,.2f}',
-                        'Porcentaje': '{:.2f}%'
-                    })
-                )
+    Args:
+        df_proveedores: DataFrame leído de vendors_catalog.csv
+        
+    Returns:
+        DataFrame de catálogo normalizado
+    """
+    df_proveedores['percentage'] = df_proveedores['percentage'].fillna(0).astype(float)
+    df_proveedores['base_price'] = df_proveedores['base_price'].astype(float)
+    return df_proveedores
 
-                orders_pos = df_original[df_original['point_of_sale_id'] == selected_pos]
-                productos_pos = df_clasificado[df_clasificado['point_of_sale_id'] == selected_pos] if 'point_of_sale_id' in df_clasificado.columns else pd.DataFrame()
-                df_vendor_winners = productos_pos[df_clasificado['clasificacion'] == 'Precio droguería minimo']
-                
-                # NUEVO CÓDIGO: Mostrar tabla de vendors que son drug manufacturers
-                st.subheader("Ventas de Distribuidores que son Vendors")
-                if not df_vendor_dm.empty:  
-                    dm_vendors_detail = crear_dataframe_vendors_dm(detail_table, df_vendor_dm)
-                    if not dm_vendors_detail.empty:
-                        try:
-                            # Obtener IDs de fabricantes (drug_manufacturer_ids)
-                            dm_ids = set(df_vendor_dm['drug_manufacturer_id'].unique())
-
-                            # Obtener la lista de drug_manufacturer_ids de la tabla de detalle
-                            dm_detail_ids = set(dm_vendors_detail['Droguería/Vendor ID'].unique())
-                            
-                            # Filtrar órdenes que corresponden a drug_manufacturers
-                            dm_compras = orders_pos[orders_pos['vendor_id'].isin(dm_detail_ids)].copy()
-                            
-                            # Total comprado a drug manufacturers
-                            total_comprado_dm = dm_vendors_detail['Total Comprado'].sum()
-                            
-                            # Filtrar productos ganadores
-                            productos_ganadores_pos = df_vendor_winners[productos_pos['point_of_sale_id'] == selected_pos].copy()
-                            
-                            # Merge para encontrar productos ganadores que son de drug manufacturers
-                            dm_compras_ganadores = pd.merge(
-                                dm_compras, 
-                                productos_ganadores_pos,
-                                on=['super_catalog_id', 'point_of_sale_id'],
-                                suffixes=('_comp', '_gan'),
-                                how='inner'
-                            ).drop_duplicates('super_catalog_id')
-
-                            # Calcular el valor total de compras a DMs que son productos ganadores
-                            valor_dm_compras_ganadores = 0
-                            if not dm_compras_ganadores.empty:
-                                if 'valor_total_vendedor' in dm_compras_ganadores.columns:
-                                    valor_dm_compras_ganadores = dm_compras_ganadores['valor_total_vendedor'].sum()
-                                elif 'unidades_pedidas' in dm_compras_ganadores.columns and 'precio_minimo' in dm_compras_ganadores.columns:
-                                    valor_dm_compras_ganadores = (dm_compras_ganadores['unidades_pedidas'] * dm_compras_ganadores['precio_minimo']).sum()
-                                elif 'valor_vendedor_gan' in dm_compras_ganadores.columns:
-                                    valor_dm_compras_ganadores = dm_compras_ganadores['valor_vendedor_gan'].sum()
-                            
-                            # Calcular porcentaje
-                            porcentaje_dm_compras_ganadores = (valor_dm_compras_ganadores / total_comprado_dm * 100) if total_comprado_dm > 0 else 0
-                        
-                            # Agregar esta información al dataframe de dm_vendors_detail
-                            dm_vendors_detail['Valor Compras Ganadores'] = 0.0
-                            dm_vendors_detail['% Compras Ganadores'] = 0.0
-                            
-                            vendor_valores = {}
-
-                            # Calcular valor para cada distribuidor específico
-                            for _, row in dm_vendors_detail.iterrows():
-                                dm_id = row['Droguería/Vendor ID']
-                                
-                                # Filtrar compras de este distribuidor específico que son productos ganadores
-                                vendor_compras_ganadores = dm_compras_ganadores[dm_compras_ganadores['vendor_id_comp'] == dm_id] if not dm_compras_ganadores.empty else pd.DataFrame()
-                                
-                                # Calcular el valor
-                                vendor_valor = 0
-                                if not vendor_compras_ganadores.empty:
-                                    if 'valor_total_vendedor' in vendor_compras_ganadores.columns:
-                                        vendor_valor = vendor_compras_ganadores['valor_total_vendedor'].sum()
-                                    elif 'valor_vendedor_gan' in vendor_compras_ganadores.columns:
-                                        vendor_valor = vendor_compras_ganadores['valor_vendedor_gan'].sum()
-                                    elif 'valor_vendedor_comp' in vendor_compras_ganadores.columns:
-                                        vendor_valor = vendor_compras_ganadores['valor_vendedor_comp'].sum()
-                                
-                                vendor_valores[dm_id] = vendor_valor
-
-                            sum_vendor_valores = sum(vendor_valores.values())
-
-                            for idx, row in dm_vendors_detail.iterrows():
-                                dm_id = row['Droguería/Vendor ID']
-                                vendor_valor = vendor_valores[dm_id]
-                                
-                                # Si la suma total de vendor_valores es aproximadamente igual al valor_dm_compras_ganadores,
-                                # usamos los valores individuales calculados
-                                if abs(sum_vendor_valores - valor_dm_compras_ganadores) < 0.01 * valor_dm_compras_ganadores:  # 1% de tolerancia
-                                    dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = vendor_valor
-                                else:
-                                    # Si hay una discrepancia significativa, distribuimos el valor total proporcionalmente
-                                    # basado en el porcentaje de compras de cada vendor
-                                    if sum_vendor_valores > 0:
-                                        factor = valor_dm_compras_ganadores / sum_vendor_valores
-                                        dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = vendor_valor * factor
-                                    else:
-                                        # Si no se puede distribuir proporcionalmente, distribuir equitativamente
-                                        dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = valor_dm_compras_ganadores / len(dm_vendors_detail)
-                                
-                                # Calcular el porcentaje respecto al total comprado para este vendor
-                                if row['Total Comprado'] > 0:
-                                    dm_vendors_detail.at[idx, '% Compras Ganadores'] = (dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] / row['Total Comprado'] * 100)
-                            
-                            # Verificar que la suma de 'Valor Compras Ganadores' coincida con valor_dm_compras_ganadores
-                            total_calculado = dm_vendors_detail['Valor Compras Ganadores'].sum()
-                            if abs(total_calculado - valor_dm_compras_ganadores) > 0.01 * valor_dm_compras_ganadores:  # 1% de tolerancia
-                                st.warning(f"Discrepancia en los cálculos: Valor DM total ({valor_dm_compras_ganadores:.2f}) ≠ Suma de valores individuales ({total_calculado:.2f})")
-                            
-                            st.dataframe(
-                                dm_vendors_detail.style.format({
-                                    'Total Comprado': '${:,.2f}',
-                                    'Porcentaje': '{:.2f}%',
-                                    'Valor Compras Ganadores': '${:,.2f}',
-                                    '% Compras Ganadores': '{:.2f}%'
-                                })
-                            )
-                        
-                            # Mostrar métricas de resumen
-                            dm_col1, dm_col2, dm_col3 = st.columns(3)
-                            with dm_col1:
-                                st.metric("Total Compras a Vendors", f"${total_comprado_dm:,.2f}")
-                                st.metric("% del Total de Compras", f"{(total_comprado_dm / detail_table['Total Comprado'].sum() * 100):.2f}%")
-                        
-                            with dm_col2:
-                                st.metric("Número de Vendors Drug Manufacturers", f"{len(dm_vendors_detail)}")
-                                st.metric("Productos Comprados a DM que son Ganadores", f"{len(dm_compras_ganadores)}")
-                        
-                            with dm_col3:
-                                st.metric("Valor de Compras a DM que son Ganadores", f"${valor_dm_compras_ganadores:,.2f}")
-                                st.metric("% de Compras a DM que son Ganadores", f"{porcentaje_dm_compras_ganadores:.2f}%")
-
-                        except Exception as e:
-                            import traceback
-                            st.warning(f"Error al calcular estadísticas de drug manufacturers: {str(e)}")
-                            st.expander("Detalles del error", expanded=False).code(traceback.format_exc())
-                    
-                    else:
-                        st.info("No se encontraron distribuidores que también sean fabricantes (drug manufacturers) en este punto de venta.")
-                else:
-                    st.warning("No se pudo cargar el archivo vendors_dm.csv o está vacío.")
+def calcular_pos_geo_zones(df_pos_address):
+    """
+    Obtiene la zona geográfica de cada POS, reemplazando abreviaturas y variantes de
+    estados y provincias (ABREVIATURAS_ZONA)
+    
+    Args:
+        df_pos_address: DataFrame normalizado de pos_address.csv
+        
+    Returns:
+        DataFrame con point_of_sale_id y geo_zone
+    """
+    # Normalizar sobre las zonas distintas (categorías) y no fila por fila
+    zonas = df_pos_address['geo_zone'].astype('category')
+    normalizadas = zonas.cat.categories.to_series().replace(ABREVIATURAS_ZONA).to_numpy(dtype=object)
+    codigos = zonas.cat.codes.to_numpy()
+    geo_zone = np.where(codigos >= 0, normalizadas[codigos], np.nan)
+    return pd.DataFrame({'point_of_sale_id': df_pos_address['point_of_sale_id'].to_numpy(), 'geo_zone': geo_zone},
+                        index=df_pos_address.index)
 
-                # Análisis de productos
-                st.subheader("Análisis de Productos")
+def filtrar_catalogo(df_proveedores, productos, zonas):
+    """
+    Semi-join del catálogo con los productos pedidos y las zonas de los POS
+    
+    Una oferta solo puede aplicar a un pedido si su producto aparece en los pedidos y es
+    nacional (name == 'México') o de una zona donde hay algún POS; el resto se descarta
+    antes de construir el índice de precios. Las ofertas conservadas mantienen su orden y
+    sus dtypes, así que enriquecer_pedidos devuelve lo mismo que con el catálogo completo.
+    
+    Args:
+        df_proveedores: DataFrame de catálogo normalizado
+        productos: super_catalog_id distintos de los pedidos
+        zonas: geo_zone distintas de los POS
+        
+    Returns:
+        DataFrame con las ofertas del catálogo que pueden aplicar a algún pedido
+    """
+    nombre = df_proveedores['name']
+    aplica = df_proveedores['super_catalog_id'].isin(productos) & ((nombre == 'México') | nombre.isin(zonas))
+    return df_proveedores[aplica.to_numpy()]
 
-                orders_pos = df_original[df_original['point_of_sale_id'] == selected_pos]
-                productos_pos = df_clasificado[df_clasificado['point_of_sale_id'] == selected_pos] if 'point_of_sale_id' in df_clasificado.columns else pd.DataFrame()
+def construir_indice_catalogo(df_proveedores, df_pedidos, pos_geo_zones):
+    """
+    Construye el índice de precios solo con las ofertas que pueden aplicar a los pedidos
+    
+    Args:
+        df_proveedores: DataFrame de catálogo normalizado
+        df_pedidos: DataFrame de pedidos normalizado
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        
+    Returns:
+        Índice de construir_indice_precios sobre el catálogo filtrado (filtrar_catalogo)
+    """
+    with etapa('filtrar_catalogo', filas_entrada=len(df_proveedores)) as medida:
+        df_proveedores = filtrar_catalogo(df_proveedores, pd.unique(df_pedidos['super_catalog_id']),
+                                          pos_geo_zones['geo_zone'].dropna().unique())
+        medida['filas_salida'] = len(df_proveedores)
+    with etapa('indice_precios', filas_entrada=len(df_proveedores)) as medida:
+        indice = construir_indice_precios(df_proveedores)
+        medida['filas_salida'] = len(indice['ofertas'])
+    return indice
 
-# Calcular conjuntos e intersecciones
-                orders_products = set(orders_pos['super_catalog_id']) if not orders_pos.empty else set()
-                productos_oportunidad = set(productos_pos['super_catalog_id']) if not productos_pos.empty else set()
+def _rangos_por_clave(claves_ordenadas):
+    """
+    Claves distintas de un arreglo ordenado y el rango [inicio, fin) de cada una
+    
+    Args:
+        claves_ordenadas: Arreglo de claves ordenado
+        
+    Returns:
+        Tupla (claves, inicios, fines)
+    """
+    claves, inicios = np.unique(claves_ordenadas, return_index=True)
+    fines = np.append(inicios[1:], len(claves_ordenadas)).astype(inicios.dtype)
+    return claves, inicios, fines
 
-# Calcular intersección
-                intersection = pd.merge(
-                    productos_pos, orders_pos, 
-                    on=['super_catalog_id', 'point_of_sale_id','order_id'], 
-                    how='inner',
-                    suffixes=('', '_ord')
-                    ) if not productos_pos.empty and not orders_pos.empty else pd.DataFrame()
+def construir_indice_precios(df_proveedores):
+    """
+    Construye el índice de ofertas del catálogo por producto y zona
+    
+    Las ofertas regionales se ordenan por (super_catalog_id, zona) y las nacionales
+    (name == 'México') por super_catalog_id, de modo que las ofertas aplicables a un pedido
+    son dos rangos contiguos que se resuelven con una búsqueda por clave, sin cruzar el
+    catálogo completo en cada carga ni materializar las ofertas nacionales en cada zona.
+    precio_vendedor y el precio mínimo de cada clave se calculan una sola vez.
+    
+    Args:
+        df_proveedores: DataFrame de catálogo normalizado
+        
+    Returns:
+        Diccionario con 'ofertas' (regionales y luego nacionales, cada bloque ordenado por
+        su clave, dentro de la clave en el orden del catálogo), 'zonas' y, por bloque, las
+        claves, los rangos de ofertas y el precio_vendedor mínimo de cada clave
+    """
+    es_nacional = (df_proveedores['name'] == 'México').to_numpy()
+    regional = df_proveedores[~es_nacional]
+    nacional = df_proveedores[es_nacional]
+    
+    # Clave regional: posición del producto entre los productos regionales x zonas + zona
+    zonas = pd.Index(regional['name'].dropna().astype(object).unique())
+    productos = np.unique(regional['super_catalog_id'].to_numpy())
+    codigo_zona = zonas.get_indexer(regional['name'].astype(object))
+    claves_regional = np.searchsorted(productos, regional['super_catalog_id'].to_numpy()) * len(zonas) + codigo_zona
+    # Las ofertas sin zona no aplican a ningún pedido
+    con_zona = np.flatnonzero(codigo_zona >= 0)
+    orden_regional = con_zona[np.argsort(claves_regional[con_zona], kind='stable')]
+    orden_nacional = np.argsort(nacional['super_catalog_id'].to_numpy(), kind='stable')
+    
+    ofertas = pd.concat([regional.take(orden_regional), nacional.take(orden_nacional)], ignore_index=True)
+    # Convertir tipos de datos para cálculos correctos
+    ofertas['base_price'] = ofertas['base_price'].astype(float)
+    ofertas['percentage'] = ofertas['percentage'].astype(float)
+    ofertas['precio_vendedor'] = ofertas['base_price'] + (ofertas['base_price'] * ofertas['percentage'] / 100)
+    
+    precios = ofertas['precio_vendedor'].to_numpy()
+    n_regional = len(orden_regional)
+    indice = {'ofertas': ofertas, 'zonas': zonas, 'productos_regionales': productos}
+    bloques = {
+        'regional': (claves_regional[orden_regional], 0),
+        'nacional': (nacional['super_catalog_id'].to_numpy()[orden_nacional], n_regional),
+    }
+    for bloque, (claves_ordenadas, desplazamiento) in bloques.items():
+        claves, inicios, fines = _rangos_por_clave(claves_ordenadas)
+        inicios, fines = inicios + desplazamiento, fines + desplazamiento
+        # fmin ignora los precios nulos, como min() de pandas
+        minimos = np.fmin.reduceat(precios, inicios) if len(claves) else np.array([], dtype=float)
+        indice[bloque] = {'claves': claves, 'inicios': inicios, 'fines': fines, 'minimos': minimos}
+    return indice
 
-                intersection_ordenado = intersection.sort_values(['super_catalog_id', 'precio_vendedor'], ascending=[True, True])
-                intersection_sin_repetidos = intersection
-                productos_conteo= intersection['super_catalog_id'].value_counts()
-                productos_repetidos = productos_conteo[productos_conteo > 1].index.tolist()
+def _buscar_rangos(bloque, consulta):
+    """
+    Busca cada clave de la consulta en un bloque del índice de precios
+    
+    Args:
+        bloque: Bloque 'regional' o 'nacional' de construir_indice_precios
+        consulta: Arreglo de claves
+        
+    Returns:
+        Tupla (inicios, fines, minimos); las claves inexistentes tienen un rango vacío y
+        mínimo NaN
+    """
+    claves = bloque['claves']
+    if not len(claves):
+        vacio = np.zeros(len(consulta), dtype=np.int64)
+        return vacio, vacio, np.full(len(consulta), np.nan)
+    posicion = np.minimum(np.searchsorted(claves, consulta), len(claves) - 1)
+    encontrada = claves[posicion] == consulta
+    return (np.where(encontrada, bloque['inicios'][posicion], 0),
+            np.where(encontrada, bloque['fines'][posicion], 0),
+            np.where(encontrada, bloque['minimos'][posicion], np.nan))
 
-                intersection_sin_repetidos_winners = intersection_sin_repetidos[intersection_sin_repetidos['clasificacion']=='Precio vendor minimo']
+def _expandir_rangos(inicios, fines):
+    """
+    Expande rangos [inicio, fin) a pares (fila de la consulta, posición de la oferta)
+    
+    Args:
+        inicios: Inicio del rango de cada fila
+        fines: Fin del rango de cada fila
+        
+    Returns:
+        Tupla (filas, ofertas)
+    """
+    cantidades = fines - inicios
+    filas = np.repeat(np.arange(len(cantidades)), cantidades)
+    previas = np.cumsum(cantidades) - cantidades
+    ofertas = np.repeat(inicios - previas, cantidades) + np.arange(cantidades.sum())
+    return filas, ofertas
 
-                intersection_percentage = (len(intersection_sin_repetidos) / len(orders_products) * 100) if orders_products else 0
+def unir_ofertas(df_pedidos_filas, catalogo, ofertas):
+    """
+    Agrega a cada fila de pedido las columnas de su oferta del catálogo
+    
+    Las filas de pedidos ya tomadas se conservan por bloque de dtype y las columnas del
+    catálogo se agregan una a una, sin reindexar ni copiar el resultado completo. Las
+    columnas repetidas en pedidos y catálogo (salvo super_catalog_id) quedan con sufijos
+    _x / _y, como en un merge.
+    
+    Args:
+        df_pedidos_filas: DataFrame con una fila de pedido por oferta (se modifica)
+        catalogo: DataFrame de ofertas con precio_vendedor
+        ofertas: Posición en el catálogo de la oferta de cada fila
+        
+    Returns:
+        DataFrame con las columnas de pedidos y de catálogo, con índice 0..n-1
+    """
+    comunes = set(df_pedidos_filas.columns) & set(catalogo.columns) - {'super_catalog_id'}
+    df_ofertas = df_pedidos_filas
+    df_ofertas.index = pd.RangeIndex(len(df_ofertas))
+    df_ofertas.columns = [f'{columna}_x' if columna in comunes else columna for columna in df_ofertas.columns]
+    for columna in catalogo.columns.drop('super_catalog_id'):
+        valores = catalogo[columna]
+        valores = valores.array if isinstance(valores.dtype, pd.CategoricalDtype) else valores.to_numpy()
+        df_ofertas[f'{columna}_y' if columna in comunes else columna] = valores.take(ofertas)
+    return df_ofertas
 
-                orders_total, products_total = 0, 0
-                valores_convertidos = 0  # Inicializar la variable valores_convertidos
+def buscar_ofertas(indice, df_pedidos_zonas, marcar_minimo=False):
+    """
+    Devuelve las ofertas aplicables a cada pedido según su producto y zona
+    
+    Equivale a cruzar los pedidos con las ofertas regionales (por producto y zona) y con
+    las nacionales (por producto) y concatenar ambos resultados: las filas regionales van
+    primero y, dentro de cada bloque, en el orden de los pedidos y luego del catálogo. Las
+    columnas repetidas en pedidos y catálogo (vendor_id) quedan con sufijos _x / _y.
+    
+    Args:
+        indice: Resultado de construir_indice_precios
+        df_pedidos_zonas: DataFrame de pedidos con geo_zone
+        marcar_minimo: Si es True agrega es_precio_minimo (la oferta tiene el menor
+            precio_vendedor entre todas las aplicables al producto en la zona del pedido)
+        
+    Returns:
+        DataFrame con una fila por pedido y oferta aplicable, con precio_vendedor
+    """
+    productos = df_pedidos_zonas['super_catalog_id'].to_numpy()
+    productos_regionales, zonas = indice['productos_regionales'], indice['zonas']
+    
+    # Clave regional de cada pedido (-1 si el producto o la zona no tienen ofertas regionales)
+    posicion = np.searchsorted(productos_regionales, productos)
+    codigo_zona = zonas.get_indexer(df_pedidos_zonas['geo_zone'].astype(object))
+    con_oferta = np.isin(productos, productos_regionales) & (codigo_zona >= 0)
+    clave_regional = np.where(con_oferta, posicion * len(zonas) + codigo_zona, -1)
+    
+    inicios_r, fines_r, minimos_r = _buscar_rangos(indice['regional'], clave_regional)
+    inicios_n, fines_n, minimos_n = _buscar_rangos(indice['nacional'], productos)
+    filas_r, ofertas_r = _expandir_rangos(inicios_r, fines_r)
+    filas_n, ofertas_n = _expandir_rangos(inicios_n, fines_n)
+    filas = np.concatenate([filas_r, filas_n])
+    ofertas = np.concatenate([ofertas_r, ofertas_n])
+    
+    df_ofertas = unir_ofertas(df_pedidos_zonas.take(filas), indice['ofertas'], ofertas)
+    
+    if marcar_minimo:
+        minimo = np.fmin(minimos_r, minimos_n)[filas]
+        df_ofertas['es_precio_minimo'] = df_ofertas['precio_vendedor'].to_numpy() <= minimo
+    return df_ofertas
 
-                #st.write(intersection_sin_repetidos_winners)
-                # Mostrar métricas de productos
-                #st.write(intersection_sin_repetidos_winners)
+def enriquecer_pedidos(df_pedidos, pos_geo_zones, df_proveedores, df_vendors_pos):
+    """
+    Cruza los pedidos con el catálogo de vendors (nacional y regional) y calcula precios
+    
+    Args:
+        df_pedidos: DataFrame de pedidos normalizado
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        df_proveedores: DataFrame de catálogo normalizado o índice de precios ya
+            construido (construir_indice_precios)
+        df_vendors_pos: DataFrame con relaciones vendor-POS, o None para no cruzarlas
+        
+    Returns:
+        DataFrame con una fila por pedido y oferta de vendor aplicable, con precio_vendedor
+        y precio_total_vendedor (filas regionales primero, luego nacionales)
+    """
+    if isinstance(df_proveedores, dict):
+        indice = df_proveedores
+    else:
+        with etapa('indice_precios', filas_entrada=len(df_proveedores)) as medida:
+            indice = construir_indice_precios(df_proveedores)
+            medida['filas_salida'] = len(indice['ofertas'])
+    
+    # Unir pedidos con zonas geográficas
+    with etapa('cruce_zonas', filas_entrada=len(df_pedidos)) as medida:
+        df_pedidos_zonas = pd.merge(df_pedidos, pos_geo_zones, on='point_of_sale_id', how='left')
+        df_pedidos_zonas = df_pedidos_zonas[df_pedidos_zonas['unidades_pedidas'] > 0]
+        medida['filas_salida'] = len(df_pedidos_zonas)
+    
+    # Ofertas regionales y nacionales aplicables, con precio_vendedor ya calculado
+    with etapa('buscar_ofertas', filas_entrada=len(df_pedidos_zonas)) as medida:
+        df_pedidos_proveedores = buscar_ofertas(indice, df_pedidos_zonas)
+        medida['filas_salida'] = len(df_pedidos_proveedores)
+    
+    return completar_ofertas(df_pedidos_proveedores, df_vendors_pos)
 
-                #col1, col2, col3 = st.columns(3)
-                #with col1:
-                #    st.metric("Total Productos en Compras Reales", f"{len(orders_products):,}")
-                #with col3:
-                #    st.metric("Productos en Intersección no duplicados con menor precio", 
-                #             f"{len(intersection_sin_repetidos):,} ({intersection_percentage:.2f}%)")
-                    
-                #orders_total, products_total = 0, 0
+def completar_ofertas(df_pedidos_proveedores, df_vendors_pos):
+    """
+    Calcula precio_total_vendedor, cruza las relaciones vendor-POS y renombra vendor_id
+    
+    Args:
+        df_pedidos_proveedores: DataFrame de buscar_ofertas (se modifica)
+        df_vendors_pos: DataFrame con relaciones vendor-POS, o None para no cruzarlas
+        
+    Returns:
+        DataFrame con las columnas finales de enriquecer_pedidos
+    """
+    # Calcular precio_total_vendedor
+    if 'precio_vendedor' in df_pedidos_proveedores.columns and 'unidades_pedidas' in df_pedidos_proveedores.columns:
+        df_pedidos_proveedores['precio_total_vendedor'] = (
+            df_pedidos_proveedores['unidades_pedidas'].astype(float) * 
+            df_pedidos_proveedores['precio_vendedor'].astype(float)
+        )
+    
+    # Unir con relaciones vendor-pos (solo aplica si las ofertas no traen vendor_id propio:
+    # con pedidos y catálogo quedan vendor_id_x / vendor_id_y)
+    if (df_vendors_pos is not None and 'vendor_id' in df_pedidos_proveedores.columns
+            and 'point_of_sale_id' in df_pedidos_proveedores.columns):
+        with etapa('cruce_vendor_pos', filas_entrada=len(df_pedidos_proveedores)) as medida:
+            df_pedidos_proveedores = pd.merge(
+                df_pedidos_proveedores, df_vendors_pos,
+                on=['point_of_sale_id', 'vendor_id'], how='left'
+            )
+            medida['filas_salida'] = len(df_pedidos_proveedores)
+    
+    # Corregir nombres de columnas
+    df_pedidos_proveedores.rename(columns={'vendor_id':'drug_manufacturer_id', 'vendor_id_y':'vendor_id'}, inplace=True)
+    
+    return df_pedidos_proveedores
+
+def clasificar_pedidos(df_pedidos_proveedores):
+    """
+    Calcula el precio mínimo por orden y producto y clasifica cada oferta
+    
+    Args:
+        df_pedidos_proveedores: DataFrame de enriquecer_pedidos
+        
+    Returns:
+        Tupla (min_prices, df_clasificado); min_prices es None si faltan columnas
+    """
+    # Calcular precios mínimos locales
+    cols_needed = ['point_of_sale_id', 'super_catalog_id', 'precio_minimo']
+    if not all(col in df_pedidos_proveedores.columns for col in cols_needed):
+        return None, pd.DataFrame()
+    
+    with etapa('precios_minimos', filas_entrada=len(df_pedidos_proveedores)) as medida:
+        min_prices = (df_pedidos_proveedores
+                     .groupby(['point_of_sale_id', 'order_id','super_catalog_id'])['precio_minimo']
+                     .min()
+                     .reset_index())
+        min_prices.columns = ['point_of_sale_id','order_id', 'super_catalog_id', 'precio_minimo_orders']
+        
+        # Unir para comparar precios
+        df_con_precios_minimos_local = pd.merge(
+            df_pedidos_proveedores, min_prices,
+            on=['point_of_sale_id', 'super_catalog_id','order_id'], how='left'
+        )
+        medida['filas_salida'] = len(df_con_precios_minimos_local)
+    
+    # Clasificar productos
+    with etapa('agregar_columna_clasificacion', filas_entrada=len(df_con_precios_minimos_local)) as medida:
+        df_clasificado = agregar_columna_clasificacion(df_con_precios_minimos_local)
+        medida['filas_salida'] = len(df_clasificado)
+    return min_prices, df_clasificado
+
+def clasificar_pedidos_sql(df_pedidos, pos_geo_zones, df_proveedores):
+    """
+    Equivalente de enriquecer_pedidos + clasificar_pedidos con el backend SQL (motor_sql.py)
+    
+    DuckDB resuelve los cruces con zonas y catálogo, el precio mínimo por orden y la
+    clasificación; las columnas se toman de los DataFrames de entrada con el plan que
+    devuelve, así que el resultado es idéntico al de pandas (filas, orden y dtypes).
+    
+    Args:
+        df_pedidos: DataFrame de pedidos normalizado
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        df_proveedores: DataFrame de catálogo normalizado
+        
+    Returns:
+        DataFrame clasificado, como el segundo elemento de clasificar_pedidos
+    """
+    # Mismas columnas y precio_vendedor que las ofertas de construir_indice_precios
+    catalogo = df_proveedores.assign(base_price=df_proveedores['base_price'].astype(float),
+                                     percentage=df_proveedores['percentage'].astype(float))
+    catalogo['precio_vendedor'] = catalogo['base_price'] + (catalogo['base_price'] * catalogo['percentage'] / 100)
+    
+    with etapa('plan_sql', filas_entrada=len(df_pedidos)) as medida:
+        plan = plan_clasificacion(df_pedidos, pos_geo_zones, catalogo)
+        medida['filas_salida'] = len(plan)
+    
+    with etapa('unir_plan', filas_entrada=len(plan)) as medida:
+        # Filas de pedidos con su zona, como el merge left de enriquecer_pedidos
+        df_ofertas = df_pedidos.take(plan['fila_pedido'].to_numpy())
+        fila_zona = plan['fila_zona'].to_numpy()
+        con_zona = fila_zona >= 0
+        geo_zone = np.full(len(plan), np.nan, dtype=object)
+        geo_zone[con_zona] = pos_geo_zones['geo_zone'].to_numpy(dtype=object)[fila_zona[con_zona]]
+        df_ofertas['geo_zone'] = geo_zone
+        
+        df_clasificado = completar_ofertas(unir_ofertas(df_ofertas, catalogo, plan['fila_catalogo'].to_numpy()), None)
+        df_clasificado['precio_minimo_orders'] = plan['precio_minimo_orders'].to_numpy()
+        df_clasificado['clasificacion'] = plan['clasificacion'].to_numpy()
+        medida['filas_salida'] = len(df_clasificado)
+    return df_clasificado
+
+def calcular_estadisticas_pedidos(df_pedidos):
+    """
+    Calcula las métricas por POS usadas en la página
+    
+    Args:
+        df_pedidos: DataFrame de pedidos normalizado
+        
+    Returns:
+        Tupla (pos_order_stats, pos_vendor_totals)
+    """
+    # Calcular métricas para visualización
+    df_orders = df_pedidos.copy()
+    
+    # Agregar total_compra si no existe
+    if 'total_compra' not in df_orders.columns and 'unidades_pedidas' in df_orders.columns and 'precio_minimo' in df_orders.columns:
+        df_orders['total_compra'] = df_orders['unidades_pedidas'] * df_orders['precio_minimo']
+    
+    # Calcular estadísticas por POS
+    if all(col in df_orders.columns for col in ['point_of_sale_id', 'order_id', 'total_compra']):
+        order_totals = df_orders.groupby(['point_of_sale_id', 'order_id'])['total_compra'].sum().reset_index()
+        pos_order_stats = order_totals.groupby('point_of_sale_id').agg({
+            'total_compra': ['mean', 'count']
+        }).reset_index()
+        pos_order_stats.columns = ['point_of_sale_id', 'promedio_por_orden', 'numero_ordenes']
+    else:
+        pos_order_stats = pd.DataFrame(columns=['point_of_sale_id', 'promedio_por_orden', 'numero_ordenes'])
+    
+    # Calcular totales por vendor
+    if all(col in df_orders.columns for col in ['point_of_sale_id', 'vendor_id', 'total_compra']):
+        pos_vendor_totals = df_orders.groupby(['point_of_sale_id', 'vendor_id'])['total_compra'].sum().reset_index()
+    else:
+        pos_vendor_totals = pd.DataFrame(columns=['point_of_sale_id', 'vendor_id', 'total_compra'])
+    
+    return pos_order_stats, pos_vendor_totals
+
+def particionar_por_pos(df):
+    """
+    Ordena un DataFrame por point_of_sale_id y arma la tabla de offsets de cada POS
+
+    El orden es estable: dentro de cada POS las filas quedan en el orden original y
+    conservan sus etiquetas de índice, igual que con un filtro == selected_pos.
+
+    Args:
+        df: DataFrame con la columna point_of_sale_id
+
+    Returns:
+        Diccionario con 'df' (DataFrame ordenado) y 'offsets' ({pos_id: (inicio, fin)})
+    """
+    if df.empty or 'point_of_sale_id' not in df.columns:
+        return {'df': df, 'offsets': {}}
+
+    orden = np.argsort(df['point_of_sale_id'].to_numpy(), kind='stable')
+    df_ordenado = df.take(orden)
+    pos_ids, inicios = np.unique(df_ordenado['point_of_sale_id'].to_numpy(), return_index=True)
+    fines = np.append(inicios[1:], len(df_ordenado))
+    offsets = dict(zip(pos_ids.tolist(), zip(inicios.tolist(), fines.tolist())))
+    return {'df': df_ordenado, 'offsets': offsets}
+
+def congelar(objeto):
+    """
+    Marca como de solo lectura los arrays de DataFrames y Series compartidos entre sesiones
+
+    Las vistas que se toman después (slices por POS, selección de columnas) heredan la
+    marca, así que una asignación en el lugar sobre ellas lanza un error en lugar de
+    modificar los datos compartidos. Las operaciones que devuelven un DataFrame nuevo
+    (filtros, merges, assign, sort_values) no se ven afectadas.
+
+    Args:
+        objeto: DataFrame, Serie, o diccionario/lista/tupla que los contiene (también
+            particiones de particionar_por_pos)
+
+    Returns:
+        El mismo objeto, congelado
+    """
+    if isinstance(objeto, dict):
+        for valor in objeto.values():
+            congelar(valor)
+    elif isinstance(objeto, (list, tuple)):
+        for valor in objeto:
+            congelar(valor)
+    elif isinstance(objeto, (pd.DataFrame, pd.Series)):
+        for arreglo in objeto._mgr.arrays:
+            # Categorical, fechas y arrays numpy de pandas guardan un ndarray en _ndarray
+            datos = getattr(arreglo, '_ndarray', arreglo)
+            if isinstance(datos, np.ndarray):
+                datos.flags.writeable = False
+    return objeto
+
+def filas_pos(particion, pos_id):
+    """
+    Devuelve las filas de un POS como un slice (sin copia) del DataFrame particionado
+
+    Args:
+        particion: Resultado de particionar_por_pos
+        pos_id: ID del POS
+
+    Returns:
+        DataFrame con las filas del POS (vacío si el POS no tiene filas)
+    """
+    inicio, fin = particion['offsets'].get(pos_id, (0, 0))
+    return particion['df'].iloc[inicio:fin]
+
+def leer_entrada(archivo, normalizar=None):
+    """
+    Lee un CSV de entrada con leer_csv_con_esquema, medido como una etapa de la carga
+    
+    Args:
+        archivo: Nombre del archivo CSV
+        normalizar: Función opcional de normalización (ver leer_csv_con_esquema)
+        
+    Returns:
+        DataFrame leído
+    """
+    with etapa(f'leer_csv:{archivo}') as medida:
+        df = leer_csv_con_esquema(archivo, normalizar=normalizar)
+        medida['filas_salida'] = len(df)
+    return df
+
+ARCHIVO_PEDIDOS = 'orders_delivered_pos_vendor_geozone.csv'
+
+# Normalización de cada archivo de entrada de las etapas de la carga
+NORMALIZACIONES = {
+    'pos_address.csv': normalizar_pos_address,
+    'vendors_catalog.csv': normalizar_proveedores,
+    ARCHIVO_PEDIDOS: normalizar_pedidos,
+}
+
+# Etapas de la carga (cache_etapas.py), en orden de dependencias. Cada una se guarda con la
+# huella de sus archivos y etapas previas y solo se recalcula cuando alguna cambia:
+# minimum_purchase.csv, vendors_dm.csv y vendor_pos_relations.csv no intervienen en
+# ninguna, así que actualizarlos no vuelve a cruzar los pedidos con el catálogo.
+# Incrementar 'version' si cambia el cálculo de una etapa.
+ETAPAS_CARGA = {
+    'geo_zonas': {
+        'archivos': ['pos_address.csv'], 'etapas': [], 'version': 1,
+        'calcular': lambda archivos, etapas: calcular_pos_geo_zones(archivos['pos_address.csv']),
+    },
+    # Solo las ofertas de productos pedidos en zonas con POS (construir_indice_catalogo)
+    'indice_catalogo': {
+        'archivos': ['vendors_catalog.csv', ARCHIVO_PEDIDOS], 'etapas': ['geo_zonas'], 'version': 2,
+        'calcular': lambda archivos, etapas: construir_indice_catalogo(
+            archivos['vendors_catalog.csv'], archivos[ARCHIVO_PEDIDOS], etapas['geo_zonas']
+        ),
+    },
+    # El cruce con vendor_pos_relations.csv de enriquecer_pedidos no aplica a pedidos y
+    # catálogo (ambos traen vendor_id), así que no es una dependencia. Es el resultado
+    # intermedio más grande y solo lo usa la clasificación: no se guarda
+    'pedidos_enriquecidos': {
+        'archivos': [ARCHIVO_PEDIDOS], 'etapas': ['geo_zonas', 'indice_catalogo'], 'version': 1,
+        'persistir': False,
+        'calcular': lambda archivos, etapas: enriquecer_pedidos(
+            archivos[ARCHIVO_PEDIDOS], etapas['geo_zonas'], etapas['indice_catalogo'], None
+        ),
+    },
+    'clasificacion': {
+        'archivos': [], 'etapas': ['pedidos_enriquecidos'], 'version': 1,
+        'calcular': lambda archivos, etapas: clasificar_pedidos(etapas['pedidos_enriquecidos'])[1],
+    },
+    'agregados': {
+        'archivos': [ARCHIVO_PEDIDOS], 'etapas': [], 'version': 1,
+        'calcular': lambda archivos, etapas: calcular_estadisticas_pedidos(archivos[ARCHIVO_PEDIDOS]),
+    },
+}
+
+# Backend de los cruces de la carga: 'pandas' o 'duckdb' (motor_sql.py, si está instalado)
+BACKEND_CARGA = os.environ.get('PHARMA_BACKEND', 'pandas')
+
+# Etapas de la carga con el backend SQL: la clasificación sale directamente de pedidos,
+# zonas y catálogo, sin índice de precios ni pedidos enriquecidos intermedios
+ETAPAS_CARGA_SQL = {
+    'geo_zonas': ETAPAS_CARGA['geo_zonas'],
+    'clasificacion': {
+        'archivos': ['vendors_catalog.csv', ARCHIVO_PEDIDOS], 'etapas': ['geo_zonas'], 'version': 1,
+        'calcular': lambda archivos, etapas: clasificar_pedidos_sql(
+            archivos[ARCHIVO_PEDIDOS], etapas['geo_zonas'], archivos['vendors_catalog.csv']
+        ),
+    },
+    'agregados': ETAPAS_CARGA['agregados'],
+}
+
+def cargar_entradas(incluir_pedidos=True):
+    """
+    Carga los archivos de entrada con las columnas y dtypes del registro de esquemas
+    (esquemas.py), desde snapshots Parquet cuando el CSV no ha cambiado
+    
+    Args:
+        incluir_pedidos: Si es False no se carga el archivo de pedidos (por ejemplo, cuando
+            se procesa por bloques con streaming.py)
+    
+    Returns:
+        Diccionario con los DataFrames de entrada normalizados
+    """
+    entradas = {
+        'df_pos_address': leer_entrada('pos_address.csv', normalizar=normalizar_pos_address),
+        'df_proveedores': leer_entrada('vendors_catalog.csv', normalizar=normalizar_proveedores),
+        'df_vendors_pos': leer_entrada('vendor_pos_relations.csv'),
+        'df_products': leer_entrada('top_5_productos_geozona.csv'),
+        'df_vendor_dm': load_vendors_dm(),
+    }
+    if incluir_pedidos:
+        entradas['df_pedidos'] = leer_entrada(ARCHIVO_PEDIDOS, normalizar=normalizar_pedidos)
+    
+    try:
+        entradas['df_min_purchase'] = leer_entrada('minimum_purchase.csv')
+    except FileNotFoundError:
+        entradas['df_min_purchase'] = pd.DataFrame(columns=['vendor_id', 'name', 'min_purchase', 'deleted_at'])
+    
+    return entradas
+
+def load_and_process_data(informe_etapas=None, backend=None):
+    """
+    Función principal que procesa todos los datos necesarios
+    
+    No tiene caché propia: la página la usa a través de construir_datos_por_pos, cuyo
+    resultado se comparte entre sesiones (obtener_datos_recargables). Las etapas costosas
+    (ETAPAS_CARGA) se reutilizan de la carga anterior cuando sus entradas no cambiaron.
+    
+    Args:
+        informe_etapas: Lista opcional donde se agrega el estado de cada etapa
+            (reutilizada, recalculada o no requerida, ver cache_etapas.py)
+        backend: 'pandas' o 'duckdb' (por defecto BACKEND_CARGA); los dos devuelven los
+            mismos DataFrames. Sin duckdb instalado se usa pandas
+    """
+    backend = backend or BACKEND_CARGA
+    if backend == 'duckdb' and not DUCKDB_DISPONIBLE:
+        print("duckdb no está instalado, la carga usa el backend pandas")
+        backend = 'pandas'
+    try:
+        archivos = {}
+        with etapa('etapas_carga'):
+            resultados, informe = ejecutar_etapas(
+                ETAPAS_CARGA_SQL if backend == 'duckdb' else ETAPAS_CARGA, ['geo_zonas', 'clasificacion', 'agregados'],
+                lambda archivo: leer_entrada(archivo, normalizar=NORMALIZACIONES.get(archivo)), archivos
+            )
+        if informe_etapas is not None:
+            informe_etapas.extend(informe)
+        
+        df_pedidos = archivos.get(ARCHIVO_PEDIDOS)
+        if df_pedidos is None:
+            df_pedidos = leer_entrada(ARCHIVO_PEDIDOS, normalizar=normalizar_pedidos)
+        try:
+            df_min_purchase = leer_entrada('minimum_purchase.csv')
+        except FileNotFoundError:
+            df_min_purchase = pd.DataFrame(columns=['vendor_id', 'name', 'min_purchase', 'deleted_at'])
+        pos_order_stats, pos_vendor_totals = resultados['agregados']
+        
+        return (pos_vendor_totals, df_pedidos, pos_order_stats, df_min_purchase,
+                load_vendors_dm(), resultados['geo_zonas'], resultados['clasificacion'])
+    
+    except Exception as e:
+        import traceback
+        print("Error en load_and_process_data:", traceback.format_exc())
+        empty_df = pd.DataFrame()
+        return empty_df, empty_df, empty_df, empty_df, empty_df, empty_df, empty_df
+
+def construir_datos_por_pos():
+    """
+    Carga los datos procesados con los DataFrames por POS ya particionados
+
+    No tiene caché propia: la página la usa a través de obtener_datos_recargables, que
+    guarda una sola copia por proceso, compartida por todas las sesiones y reruns (con
+    cache_data cada rerun recibiría una copia deserializada y el slice por POS dejaría de
+    ser gratuito) y la reemplaza cuando cambian los archivos de entrada. Los DataFrames e
+    índices se congelan (congelar): las sesiones solo reciben vistas de solo lectura y una
+    escritura sobre ellas falla en lugar de modificar los datos de las demás sesiones.
+
+    Las etapas de la carga se miden (etapas.py) y se agregan al archivo de seguimiento.
+
+    Returns:
+        Diccionario con las particiones por POS (pos_vendor_totals, df_original,
+        pos_order_stats, pos_geo_zones, df_clasificado), df_min_purchase, su índice por
+        vendor y zona (construir_indice_min_purchase), df_vendor_dm, su índice por drug
+        manufacturer (construir_indice_vendor_dm), la lista de POS, el diagnóstico por
+        etapas de la carga (tabla_registro) y el estado de las etapas en caché
+        (reutilizadas o recalculadas, ver ETAPAS_CARGA)
+    """
+    informe_etapas = []
+    with registrar_carga() as registro:
+        with etapa('load_and_process_data') as medida:
+            (pos_vendor_totals, df_original, pos_order_stats, df_min_purchase,
+             df_vendor_dm, pos_geo_zones, df_clasificado) = load_and_process_data(informe_etapas)
+            medida['filas_salida'] = len(df_clasificado)
+
+        with etapa('particionar_por_pos') as medida:
+            datos_pos = {
+                'pos_vendor_totals': particionar_por_pos(pos_vendor_totals),
+                'df_original': particionar_por_pos(df_original),
+                'pos_order_stats': particionar_por_pos(pos_order_stats),
+                'pos_geo_zones': particionar_por_pos(pos_geo_zones),
+                'df_clasificado': particionar_por_pos(df_clasificado),
+            }
+            medida['filas_entrada'] = sum(len(particion['df']) for particion in datos_pos.values())
+
+    guardar_registro(registro, origen='app')
+    datos_pos.update({
+        'df_min_purchase': df_min_purchase,
+        'indice_min_purchase': construir_indice_min_purchase(df_min_purchase),
+        'df_vendor_dm': df_vendor_dm,
+        'indice_vendor_dm': construir_indice_vendor_dm(df_vendor_dm) if not df_vendor_dm.empty else df_vendor_dm,
+        'pos_list': sorted(list(set(pos_vendor_totals['point_of_sale_id']))) if not pos_vendor_totals.empty else [],
+        'diagnostico_etapas': tabla_registro(registro),
+        'informe_etapas': pd.DataFrame(informe_etapas, columns=COLUMNAS_INFORME),
+    })
+    return congelar(datos_pos)
+
+def construir_relaciones_vendor_pos():
+    """
+    Carga las relaciones vendor-POS y su índice de status
+
+    Returns:
+        Diccionario con df_vendors_pos e indice_status (construir_indice_status), congelados
+    """
+    df_vendors_pos = leer_csv_con_esquema('vendor_pos_relations.csv')
+    return congelar({'df_vendors_pos': df_vendors_pos, 'indice_status': construir_indice_status(df_vendors_pos)})
+
+# Archivos de entrada de cada conjunto recargable: al cambiar alguno (por contenido, no
+# solo por mtime) el conjunto se reconstruye en segundo plano (recarga.py)
+ARCHIVOS_DATOS_POS = sorted({archivo for declaracion in ETAPAS_CARGA.values() for archivo in declaracion['archivos']}
+                            | {'minimum_purchase.csv', 'vendors_dm.csv'})
+ARCHIVOS_RELACIONES = ['vendor_pos_relations.csv']
+
+# Con el almacén local (almacen.py) la página lee de SQLite solo las filas del POS
+# seleccionado, en lugar de cargar y procesar el historial completo al arrancar
+ALMACEN_HABILITADO = os.environ.get('PHARMA_ALMACEN', '0') == '1'
+
+# Con los resultados materializados (resultados_pos.py) la carga precalcula los resultados
+# de la página de todos los POS y al seleccionar un POS solo se leen los suyos. No se
+# combina con el almacén local, que no carga todos los POS
+RESULTADOS_POS_HABILITADOS = os.environ.get('PHARMA_RESULTADOS_POS', '0') == '1'
+ARCHIVOS_RESULTADOS_POS = ARCHIVOS_DATOS_POS + ARCHIVOS_RELACIONES
+
+# Memoria máxima (MB) de la caché de resultados por POS compartida entre sesiones
+# (obtener_cache_pos); con 0 no se guarda nada
+PRESUPUESTO_CACHE_POS_MB = float(os.environ.get('PHARMA_CACHE_POS_MB', '256'))
+
+def construir_datos_almacen():
+    """
+    Sincroniza el almacén local y carga los datos que no dependen del POS seleccionado
+    
+    Los archivos que cambiaron se vuelven a importar al almacén; los DataFrames por POS
+    se cargan después, al seleccionar un POS (construir_datos_pos_almacen).
+    
+    Returns:
+        Diccionario con las mismas claves que construir_datos_por_pos salvo las
+        particiones de pedidos y resultados (pos_vendor_totals, df_original,
+        pos_order_stats, df_clasificado), más las tablas importadas en esta carga
+    """
+    with registrar_carga() as registro:
+        with etapa('sincronizar_almacen'):
+            importadas = sincronizar_almacen(
+                lambda archivo: leer_entrada(archivo, normalizar=NORMALIZACIONES.get(archivo))
+            )
+        with etapa('geo_zonas') as medida:
+            pos_geo_zones = calcular_pos_geo_zones(leer_entrada('pos_address.csv', normalizar=normalizar_pos_address))
+            medida['filas_salida'] = len(pos_geo_zones)
+        df_min_purchase = leer_tabla('compras_minimas').reset_index(drop=True)
+        df_vendor_dm = load_vendors_dm()
+    
+    guardar_registro(registro, origen='app_almacen')
+    return congelar({
+        'pos_geo_zones': particionar_por_pos(pos_geo_zones),
+        'df_min_purchase': df_min_purchase,
+        'indice_min_purchase': construir_indice_min_purchase(df_min_purchase),
+        'df_vendor_dm': df_vendor_dm,
+        'indice_vendor_dm': construir_indice_vendor_dm(df_vendor_dm) if not df_vendor_dm.empty else df_vendor_dm,
+        'pos_list': listar_pos(),
+        'diagnostico_etapas': tabla_registro(registro),
+        'informe_etapas': pd.DataFrame(columns=COLUMNAS_INFORME),
+        'tablas_importadas': importadas,
+    })
+
+def construir_datos_pos_almacen(pos_id, pos_geo_zones):
+    """
+    Calcula los DataFrames de un POS con sus filas del almacén local
+    
+    Se leen solo los pedidos del POS, las ofertas del catálogo de sus productos en su
+    zona o nacionales y sus relaciones vendor-POS; el resultado coincide con el slice del
+    POS de la carga completa.
+    
+    Args:
+        pos_id: ID del POS
+        pos_geo_zones: Partición por POS de las zonas geográficas (particionar_por_pos)
+        
+    Returns:
+        Diccionario con las particiones (de un solo POS) pos_vendor_totals, df_original,
+        pos_order_stats y df_clasificado, y las relaciones del POS df_vendors_pos e
+        indice_status (construir_indice_status), congeladas
+    """
+    df_pedidos = leer_pedidos_pos(pos_id)
+    df_vendors_pos = leer_relaciones_pos(pos_id)
+    zonas_pos = filas_pos(pos_geo_zones, pos_id)
+    df_proveedores = leer_catalogo_pos(pos_id, zonas_pos['geo_zone'].dropna().unique())
+    
+    df_pedidos_proveedores = enriquecer_pedidos(df_pedidos, zonas_pos, df_proveedores, None)
+    _, df_clasificado = clasificar_pedidos(df_pedidos_proveedores)
+    pos_order_stats, pos_vendor_totals = calcular_estadisticas_pedidos(df_pedidos)
+    return congelar({
+        'pos_vendor_totals': particionar_por_pos(pos_vendor_totals),
+        'df_original': particionar_por_pos(df_pedidos),
+        'pos_order_stats': particionar_por_pos(pos_order_stats),
+        'df_clasificado': particionar_por_pos(df_clasificado),
+        'df_vendors_pos': df_vendors_pos,
+        'indice_status': construir_indice_status(df_vendors_pos),
+    })
+
+@st.cache_resource(max_entries=32)
+def cargar_pos_almacen(pos_id, version):
+    """
+    DataFrames de un POS desde el almacén, compartidos entre sesiones
+    
+    Args:
+        pos_id: ID del POS
+        version: Versión del snapshot de datos (recarga.py); al recargar cambia la clave
+        
+    Returns:
+        Resultado de construir_datos_pos_almacen
+    """
+    datos = snapshot_actual(obtener_datos_recargables()['datos_pos'])['datos']
+    return construir_datos_pos_almacen(pos_id, datos['pos_geo_zones'])
+
+def calcular_resultados_pos(pos_id, datos_pos, df_vendors_pos, indice_status):
+    """
+    Calcula los resultados que muestra la página para un POS
+    
+    Es el cálculo de la página, separado de su presentación: la página lo usa en el
+    momento y la carga lo usa para materializar los resultados de todos los POS
+    (materializar_resultados_pos), así que ambos caminos muestran lo mismo.
+    
+    Args:
+        pos_id: ID del POS
+        datos_pos: Datos de construir_datos_por_pos (o de construir_datos_almacen más
+            los del POS de construir_datos_pos_almacen)
+        df_vendors_pos: DataFrame con relaciones vendor-POS
+        indice_status: Índice de status (construir_indice_status)
+        
+    Returns:
+        Diccionario con las tablas 'detalle' (compras por droguería), 'dm' (vendors que
+        son drug manufacturers, con sus compras ganadoras), 'vendors'
+        (actualizar_vendor_analysis) e 'insight' (generar_insight_simple), y 'metricas'
+        (diccionario de escalares: métricas del POS, de los drug manufacturers y de la
+        intersección de productos)
+    """
+    # Filtrar datos para el POS seleccionado
+    pos_data = filas_pos(datos_pos['pos_vendor_totals'], pos_id)
+    pos_data = pos_data.sort_values('total_compra', ascending=False) if not pos_data.empty else pd.DataFrame()
+    
+    pos_stats = filas_pos(datos_pos['pos_order_stats'], pos_id)
+    pos_info = filas_pos(datos_pos['pos_geo_zones'], pos_id)
+    orders_pos = filas_pos(datos_pos['df_original'], pos_id)
+    productos_pos = (filas_pos(datos_pos['df_clasificado'], pos_id)
+                     if 'point_of_sale_id' in datos_pos['df_clasificado']['df'].columns else pd.DataFrame())
+    
+    metricas = {
+        'total_compras': float(pos_data['total_compra'].sum()) if not pos_data.empty else 0.0,
+        'promedio_por_orden': float(pos_stats.iloc[0]['promedio_por_orden']) if not pos_stats.empty else 0.0,
+        'numero_ordenes': int(pos_stats.iloc[0]['numero_ordenes']) if not pos_stats.empty else 0,
+        'pais': orders_pos['country'].iloc[0] if not orders_pos.empty and 'country' in orders_pos.columns else 'No disponible',
+        'zona': pos_info['geo_zone'].iloc[0] if not pos_info.empty and 'geo_zone' in pos_info.columns else 'No disponible',
+        'total_vendors': len(pos_data),
+        # 'sin_detalle', 'sin_archivo' (vendors_dm.csv vacío), 'sin_dm', 'ok' o 'error'
+        'estado_dm': 'sin_detalle',
+        'total_comprado_dm': 0.0,
+        'valor_dm_ganadores': 0.0,
+        'productos_dm_ganadores': 0,
+        'total_calculado_dm': 0.0,
+        'error_dm': None,
+        'traza_dm': None,
+        'hay_interseccion': False,
+        'orders_total': 0.0,
+        'products_total': 0.0,
+        'valores_convertidos': 0.0,
+    }
+    resultados = {'detalle': pd.DataFrame(), 'dm': pd.DataFrame(), 'vendors': pd.DataFrame(),
+                  'insight': pd.DataFrame(), 'metricas': metricas}
+    if pos_data.empty:
+        return resultados
+    
+    # Detalle de compras
+    pos_data['porcentaje'] = (pos_data['total_compra'] / pos_data['total_compra'].sum()) * 100
+    detail_table = pos_data.copy()
+    detail_table.columns = ['POS ID', 'Droguería/Vendor ID', 'Total Comprado', 'Porcentaje']
+    detail_table = detail_table.round({'Porcentaje': 2})
+    
+    df_vendor_winners = productos_pos[productos_pos['clasificacion'] == 'Precio droguería minimo'] if not productos_pos.empty else productos_pos
+    
+    # Vendors que son drug manufacturers
+    dm_vendors_detail = pd.DataFrame()
+    if datos_pos['df_vendor_dm'].empty:
+        metricas['estado_dm'] = 'sin_archivo'
+    else:
+        dm_vendors_detail = crear_dataframe_vendors_dm(detail_table, datos_pos['indice_vendor_dm'])
+        if dm_vendors_detail.empty:
+            metricas['estado_dm'] = 'sin_dm'
+        else:
+            try:
+                # Total comprado a drug manufacturers
+                metricas['total_comprado_dm'] = float(dm_vendors_detail['Total Comprado'].sum())
                 
-                if not intersection.empty:
-                    # Calcular valores para productos globales
-                    if 'valor_vendedor' in intersection_sin_repetidos.columns:
-                        orders_total = intersection_sin_repetidos_winners['valor_vendedor'].sum()
-                    
-                    if 'precio_total_vendedor' in intersection_sin_repetidos.columns:                    
-                        products_total = intersection_sin_repetidos_winners['precio_total_vendedor'].sum()
-                    
-                    if 'dm_vendors_detail' in locals() and not dm_vendors_detail.empty and 'Valor Compras Ganadores' in dm_vendors_detail.columns:
-                        valores_convertidos = dm_vendors_detail['Valor Compras Ganadores'].sum()
-    
-                    # Mostrar métricas de valor
-                    value_col1, value_col2, value_col3, value_col4 = st.columns(4)
-                    with value_col1:
-                        st.metric("Valor en Compras Reales (Potencial a Alcanzar)", f"${orders_total:,.2f}")
-                    with value_col2:
-                        st.metric("Valor con Precios Oportunidad", f"${products_total:,.2f}")
-                    
-                    with value_col3:
-        # Calcular valor potencial neto (valor potencial - valor convertido)
-                        valor_potencial_neto = products_total - valores_convertidos
-                        st.metric("Valor Potencial Neto (Oportunidad - Convertido)", f"${valor_potencial_neto:,.2f}")
-                    with value_col4:
-                        # Calcular el porcentaje de ahorro
-                        savings_percentage = ((orders_total - products_total) / orders_total * 100) if orders_total > 0 else 0
-                        st.metric("Ahorro Potencial", f"{savings_percentage:.2f}%")
-
-                # PARTE CORREGIDA: Análisis de vendors con la nueva función
-                # Utilizar la función actualizar_vendor_analysis para evitar asignar valores convertidos a no-DMs
-                vendor_df = actualizar_vendor_analysis(
-                    productos_pos=productos_pos,
-                    df_vendors_pos=df_vendors_pos,
-                    orders_pos=orders_pos,
-                    df_potencial_convertido=df_clasificado[df_clasificado['clasificacion'] == "Precio droguería minimo"],
-                    dm_vendors_detail=dm_vendors_detail,
-                    selected_pos=selected_pos,
-                    geo_zone=geo_zone,
-                    df_min_purchase=df_min_purchase,
-                    intersection_sin_repetidos_winners=intersection_sin_repetidos_winners  # Añadir este parámetro
+                # Valor de compras ganadoras repartido por drug manufacturer
+                dm_vendors_detail, resumen_dm = asignar_compras_ganadores_dm(
+                    dm_vendors_detail, orders_pos, productos_pos
                 )
+                metricas['valor_dm_ganadores'] = float(resumen_dm['valor'].sum())
+                metricas['productos_dm_ganadores'] = int(resumen_dm['productos'].sum())
+                # Para verificar que la suma de 'Valor Compras Ganadores' coincida con el total
+                metricas['total_calculado_dm'] = float(dm_vendors_detail['Valor Compras Ganadores'].sum())
+                metricas['estado_dm'] = 'ok'
+            except Exception as e:
+                import traceback
+                metricas['estado_dm'] = 'error'
+                metricas['error_dm'] = str(e)
+                metricas['traza_dm'] = traceback.format_exc()
+    
+    # Intersección de los productos clasificados con las órdenes del POS
+    intersection = pd.merge(
+        productos_pos, orders_pos, 
+        on=['super_catalog_id', 'point_of_sale_id','order_id'], 
+        how='inner',
+        suffixes=('', '_ord')
+        ) if not productos_pos.empty and not orders_pos.empty else pd.DataFrame()
+    intersection_sin_repetidos_winners = (intersection[intersection['clasificacion'] == 'Precio vendor minimo']
+                                          if not intersection.empty else intersection)
+    
+    if not intersection.empty:
+        metricas['hay_interseccion'] = True
+        if 'valor_vendedor' in intersection.columns:
+            metricas['orders_total'] = float(intersection_sin_repetidos_winners['valor_vendedor'].sum())
+        if 'precio_total_vendedor' in intersection.columns:
+            metricas['products_total'] = float(intersection_sin_repetidos_winners['precio_total_vendedor'].sum())
+        if not dm_vendors_detail.empty and 'Valor Compras Ganadores' in dm_vendors_detail.columns:
+            metricas['valores_convertidos'] = float(dm_vendors_detail['Valor Compras Ganadores'].sum())
+    
+    # Análisis de vendors: actualizar_vendor_analysis evita asignar valores convertidos a no-DMs
+    vendor_df = actualizar_vendor_analysis(
+        productos_pos=productos_pos,
+        df_vendors_pos=df_vendors_pos,
+        orders_pos=orders_pos,
+        df_potencial_convertido=df_vendor_winners,
+        dm_vendors_detail=dm_vendors_detail,
+        selected_pos=pos_id,
+        geo_zone=metricas['zona'],
+        df_min_purchase=datos_pos['indice_min_purchase'],
+        intersection_sin_repetidos_winners=intersection_sin_repetidos_winners,
+        indice_status=indice_status
+    )
+    
+    resultados.update({
+        'detalle': detail_table,
+        'dm': dm_vendors_detail,
+        'vendors': vendor_df,
+        'insight': generar_insight_simple(vendor_df, pos_id),
+    })
+    return resultados
 
-                if not vendor_df.empty:
-                    st.subheader("Detalle por Vendor")
-                    
-                    # Mostrar tabla detallada de vendors
-                    mostrar_tabla_vendor_detalle(vendor_df, dm_vendors_detail)
-                    
-                    # Crear gráfico
-                    fig = crear_grafico_oportunidades(vendor_df, None, selected_pos, dm_vendors_detail)
-                    st.plotly_chart(fig, use_container_width=True)
-                else:
-                    st.info("No se encontraron vendors con venta potencial para este punto de venta.")
-
-                st.subheader("Oportunidades con Valor Potencial > $20,000")
-
-                df_insight_simple = generar_insight_simple(vendor_df, selected_pos)
-
-                if not df_insight_simple.empty:
-    # Aplicar formato
-                    styled_df = df_insight_simple.style.format({
-                        'Valor Potencial': '${:,.2f}'
-                    })
-    
-    # Aplicar colores por status
-                    styled_df = styled_df.applymap(
-                        lambda x: 'background-color: #90EE90' if x == "Activo" else 
-                      ('background-color: #FFD700' if x == "Pendiente" else 
-                     'background-color: #ffcccb' if x == "Sin Status" else ''),
-                    subset=['Status']
-                    )
+def materializar_resultados_pos(datos_pos, relaciones, huella):
+    """
+    Calcula los resultados de la página de todos los POS y los guarda en el archivo de
+    resultados materializados (resultados_pos.py)
+    
+    Args:
+        datos_pos: Datos de construir_datos_por_pos
+        relaciones: Datos de construir_relaciones_vendor_pos
+        huella: Huella de los archivos de entrada (huella_resultados)
+        
+    Returns:
+        Cantidad de POS materializados
+    """
+    with etapa('materializar_resultados_pos', filas_entrada=len(datos_pos['pos_list'])) as medida:
+        cantidad = guardar_resultados(
+            ((pos_id, calcular_resultados_pos(pos_id, datos_pos, relaciones['df_vendors_pos'],
+                                              relaciones['indice_status']))
+             for pos_id in datos_pos['pos_list']),
+            huella
+        )
+        medida['filas_salida'] = cantidad
+    return cantidad
+
+def construir_datos_con_resultados():
+    """
+    Carga los datos por POS y materializa los resultados de todos los POS
+    
+    Los resultados se vuelven a calcular solo si el archivo de resultados no corresponde
+    a los archivos de entrada actuales. Sin motor Parquet (snapshots.PARQUET_DISPONIBLE)
+    o si no se pueden guardar, la página los calcula en el momento.
+    
+    Returns:
+        Resultado de construir_datos_por_pos, con la medición de la materialización en el
+        diagnóstico por etapas
+    """
+    # La huella se toma antes de cargar, como en recarga.py: si un archivo cambia durante
+    # la carga, la página no usa los resultados y la recarga siguiente los reemplaza
+    if not PARQUET_DISPONIBLE:
+        return construir_datos_por_pos()
+    huella = huella_resultados({archivo: hash_vigente(archivo) if os.path.exists(archivo) else None
+                                for archivo in ARCHIVOS_RESULTADOS_POS})
+    datos_pos = construir_datos_por_pos()
+    if resultados_vigentes(huella):
+        return datos_pos
+    try:
+        with registrar_carga() as registro:
+            materializar_resultados_pos(datos_pos, construir_relaciones_vendor_pos(), huella)
+        guardar_registro(registro, origen='app_resultados_pos')
+    except ERRORES_ESCRITURA as e:
+        print(f"No se pudieron materializar los resultados por POS, se calculan en la página: {e}")
+        return datos_pos
+    diagnostico = pd.concat([datos_pos['diagnostico_etapas'], tabla_registro(registro)], ignore_index=True)
+    return {**datos_pos, 'diagnostico_etapas': congelar(diagnostico)}
+
+def huella_resultados_snapshot(snapshot_datos, snapshot_relaciones):
+    """
+    Huella de los resultados materializados que corresponden a lo que muestra la página
+    
+    Args:
+        snapshot_datos: Snapshot vigente de los datos por POS (recarga.snapshot_actual)
+        snapshot_relaciones: Snapshot vigente de las relaciones vendor-POS, o None si no
+            se pudieron cargar
+        
+    Returns:
+        Huella (huella_resultados) o None si los resultados materializados no aplican:
+        desactivados, con el almacén local o con relaciones de otra versión que las de
+        los datos
+    """
+    if (not RESULTADOS_POS_HABILITADOS or not PARQUET_DISPONIBLE or ALMACEN_HABILITADO
+            or snapshot_relaciones is None):
+        return None
+    hashes = {archivo: (huella or {}).get('sha256') for archivo, huella in snapshot_datos['huellas'].items()}
+    # Las relaciones de la página se recargan por separado: tienen que ser las mismas con
+    # las que se materializaron los resultados
+    for archivo in ARCHIVOS_RELACIONES:
+        if hashes.get(archivo) != (snapshot_relaciones['huellas'].get(archivo) or {}).get('sha256'):
+            return None
+    return huella_resultados(hashes)
+
+def obtener_resultados_pos(pos_id, datos_pos, df_vendors_pos, indice_status, huella=None):
+    """
+    Resultados de la página para un POS: los materializados si están vigentes o, si no,
+    calculados en el momento (calcular_resultados_pos)
+    
+    Args:
+        pos_id: ID del POS
+        datos_pos: Datos de la página (ver calcular_resultados_pos)
+        df_vendors_pos: DataFrame con relaciones vendor-POS
+        indice_status: Índice de status (construir_indice_status)
+        huella: Huella de los datos que muestra la página (huella_resultados_snapshot), o
+            None para calcular siempre en el momento
+        
+    Returns:
+        Tupla (resultados, materializados): los resultados de calcular_resultados_pos y si
+        se leyeron del archivo de resultados
+    """
+    if huella is not None:
+        resultados = leer_resultados_pos(pos_id, huella)
+        if resultados is not None:
+            return resultados, True
+    return calcular_resultados_pos(pos_id, datos_pos, df_vendors_pos, indice_status), False
+
+def calcular_vista_pos(pos_id, datos_pos, df_vendors_pos, indice_status, huella=None):
+    """
+    Resultados de un POS (obtener_resultados_pos) y su gráfico de oportunidades, listos
+    para guardar en la caché de resultados por POS
     
-    # Mostrar tabla
-                    st.dataframe(styled_df)
+    Args:
+        pos_id: ID del POS
+        datos_pos: Datos de la página (ver calcular_resultados_pos)
+        df_vendors_pos: DataFrame con relaciones vendor-POS
+        indice_status: Índice de status (construir_indice_status)
+        huella: Huella de los resultados materializados (ver obtener_resultados_pos)
+        
+    Returns:
+        Diccionario con 'resultados' (congelados, se comparten entre sesiones),
+        'materializados' y 'figura' (None si el POS no tiene vendors con potencial)
+    """
+    resultados, materializados = obtener_resultados_pos(pos_id, datos_pos, df_vendors_pos, indice_status, huella)
+    vendor_df = resultados['vendors']
+    figura = (crear_grafico_oportunidades(vendor_df, None, pos_id, resultados['dm'])
+              if not vendor_df.empty else None)
+    return {'resultados': congelar(resultados), 'materializados': materializados, 'figura': figura}
+
+@st.cache_resource
+def obtener_cache_pos():
+    """
+    Caché LRU de resultados por POS (cache_lru.py), una por proceso y compartida por
+    todas las sesiones
     
-    # Mostrar total
-                    st.metric("Valor Potencial Total", f"${df_insight_simple['Valor Potencial'].sum():,.2f}")
-                else:
-                    st.info("No se encontraron oportunidades con valor potencial superior a $20,000 para este punto de venta.")
+    Las claves son (POS, versión del snapshot de datos, versión del snapshot de
+    relaciones): tras una recarga las entradas anteriores dejan de usarse y salen por
+    antigüedad.
+    
+    Returns:
+        Caché de crear_cache con PRESUPUESTO_CACHE_POS_MB
+    """
+    return crear_cache(int(PRESUPUESTO_CACHE_POS_MB * 1024 ** 2))
+
+@st.cache_resource
+def obtener_datos_recargables():
+    """
+    Declara los conjuntos recargables de la página e inicia el vigilante, una vez por proceso
+
+    Los datos procesados (construir_datos_por_pos, construir_datos_almacen con
+    PHARMA_ALMACEN=1 o construir_datos_con_resultados con PHARMA_RESULTADOS_POS=1) y las
+    relaciones vendor-POS (construir_relaciones_vendor_pos) se recargan por separado: un
+    cambio en vendor_pos_relations.csv no vuelve a cargar los pedidos (salvo en los dos
+    últimos modos, que también dependen de las relaciones). Con el almacén no hay conjunto
+    de relaciones: las de cada POS se leen del almacén junto con sus pedidos
+    (construir_datos_pos_almacen). Una recarga cuyo resultado no tiene POS (por ejemplo,
+    un archivo de pedidos que no se pudo leer) se descarta.
+
+    Returns:
+        Diccionario con los conjuntos 'datos_pos' y, salvo con el almacén, 'relaciones'
+        (ver recarga.crear_conjunto)
+    """
+    # Con el almacén, la recarga vuelve a importar las tablas que cambiaron (también las
+    # relaciones vendor-POS, que se guardan en el almacén) y publica también los upserts
+    # directos al almacén
+    if ALMACEN_HABILITADO:
+        datos_pos = crear_conjunto('datos_pos', ARCHIVOS_DATOS_POS + ARCHIVOS_RELACIONES, construir_datos_almacen,
+                                   validar=lambda datos: bool(datos['pos_list']),
+                                   versiones={ARCHIVO_ALMACEN: version_almacen})
+    elif RESULTADOS_POS_HABILITADOS:
+        # Los resultados materializados dependen también de las relaciones vendor-POS
+        datos_pos = crear_conjunto('datos_pos', ARCHIVOS_RESULTADOS_POS, construir_datos_con_resultados,
+                                   validar=lambda datos: bool(datos['pos_list']))
+    else:
+        datos_pos = crear_conjunto('datos_pos', ARCHIVOS_DATOS_POS, construir_datos_por_pos,
+                                   validar=lambda datos: bool(datos['pos_list']))
+    conjuntos = {'datos_pos': datos_pos}
+    if not ALMACEN_HABILITADO:
+        conjuntos['relaciones'] = crear_conjunto('relaciones', ARCHIVOS_RELACIONES, construir_relaciones_vendor_pos)
+    iniciar_vigilancia(list(conjuntos.values()))
+    return conjuntos
+
+def main():
+    """Código principal de la página de Streamlit"""
+    # Configuración de la página
+    st.set_page_config(page_title="Análisis de Compras y Productos POS", layout="wide")
+    st.title("Análisis de Compras Reales vs Potenciales por Punto de Venta")
+
+    try:    
+        # DataFrames particionados por POS: seleccionar un POS es un slice, no un filtro completo.
+        # Se toma el snapshot vigente una vez por rerun; si hay una recarga en curso se
+        # sigue usando el anterior hasta que termine
+        conjuntos = obtener_datos_recargables()
+        snapshot_datos = snapshot_actual(conjuntos['datos_pos'])
+        datos_pos = snapshot_datos['datos']
+        
+        estado_datos = f"Datos actualizados al {snapshot_datos['generado']:%d/%m/%Y %H:%M:%S}"
+        if conjuntos['datos_pos']['recargando']:
+            estado_datos += f" · actualizando en segundo plano ({', '.join(conjuntos['datos_pos']['recargando'])} cambió)"
+        st.caption(estado_datos)
+        if conjuntos['datos_pos']['ultimo_error'] is not None:
+            error = conjuntos['datos_pos']['ultimo_error']
+            st.warning(f"No se pudo recargar los datos tras el cambio de {', '.join(error['archivos'])}: "
+                       f"se muestran los datos anteriores ({error['error']})")
+        
+        # Tiempos, filas y memoria de cada etapa de la última carga de datos
+        with st.expander("Diagnóstico de carga por etapas", expanded=False):
+            # Etapas en caché: cuáles se reutilizaron de la carga anterior y por qué se
+            # recalcularon las demás
+            informe_etapas = datos_pos['informe_etapas']
+            if not informe_etapas.empty:
+                reutilizadas = informe_etapas.loc[informe_etapas['estado'] != 'recalculada', 'etapa'].tolist()
+                st.caption(f"Etapas reutilizadas: {', '.join(reutilizadas) if reutilizadas else 'ninguna'}")
+                st.dataframe(informe_etapas.style.format({'segundos': '{:.3f}'}))
+            diagnostico = datos_pos['diagnostico_etapas']
+            if diagnostico.empty:
+                st.info("No hay etapas medidas para esta carga (instrumentación desactivada).")
+            else:
+                st.dataframe(diagnostico.style.format({
+                    'segundos': '{:.3f}',
+                    'cpu_segundos': '{:.3f}',
+                    'filas_entrada': '{:,.0f}',
+                    'filas_salida': '{:,.0f}',
+                    'pico_memoria_mb': '{:,.1f}'
+                }, na_rep='-'))
+    
+        # Cargar el archivo vendor_pos_relations.csv (una vez por proceso y al cambiar); con
+        # el almacén se leen solo las relaciones del POS seleccionado, más abajo
+        df_vendors_pos = pd.DataFrame()
+        indice_status = construir_indice_status(df_vendors_pos)
+        snapshot_relaciones = None
+        try:
+            if 'relaciones' in conjuntos:
+                snapshot_relaciones = snapshot_actual(conjuntos['relaciones'])
+                relaciones = snapshot_relaciones['datos']
+                df_vendors_pos, indice_status = relaciones['df_vendors_pos'], relaciones['indice_status']
+        except Exception as e:
+            print(f"Error al cargar vendor_pos_relations.csv: {e}")
+            st.warning("No se pudo cargar la información de relaciones vendor-pos. Algunas funcionalidades podrían estar limitadas.")
+
+        # Filtro de punto de venta
+        st.header("Análisis Individual de POS")
+        pos_list = datos_pos['pos_list']
+    
+        if not pos_list:
+            st.warning("No hay puntos de venta disponibles para analizar")
+        else:
+            selected_pos = st.selectbox("Seleccionar Punto de Venta", options=pos_list)
+
+            # Mostrar información del POS seleccionado
+            if selected_pos:
+                # Con el almacén local solo se cargan las filas del POS seleccionado
+                if ALMACEN_HABILITADO:
+                    datos_pos = {**datos_pos, **cargar_pos_almacen(selected_pos, snapshot_datos['version'])}
+                    df_vendors_pos, indice_status = datos_pos['df_vendors_pos'], datos_pos['indice_status']
+                
+                # Resultados del POS: de la caché compartida si ya se calcularon para estos
+                # snapshots; si no, leídos del archivo materializado si corresponde a los
+                # datos que se muestran, o calculados en el momento
+                cache_pos = obtener_cache_pos()
+                clave_cache = (selected_pos, snapshot_datos['version'],
+                               snapshot_relaciones['version'] if snapshot_relaciones is not None else None)
+                vista, _ = obtener_o_calcular(cache_pos, clave_cache, lambda: calcular_vista_pos(
+                    selected_pos, datos_pos, df_vendors_pos, indice_status,
+                    huella=huella_resultados_snapshot(snapshot_datos, snapshot_relaciones)
+                ))
+                resultados, materializados = vista['resultados'], vista['materializados']
+                
+                with st.expander("Diagnóstico de la caché de resultados por POS", expanded=False):
+                    uso = estadisticas_cache(cache_pos)
+                    cache_col1, cache_col2, cache_col3, cache_col4 = st.columns(4)
+                    with cache_col1:
+                        st.metric("Aciertos", f"{uso['aciertos']:,}")
+                        st.metric("Fallos", f"{uso['fallos']:,}")
+                    with cache_col2:
+                        st.metric("Tasa de aciertos",
+                                  f"{uso['tasa_aciertos'] * 100:.1f}%" if uso['tasa_aciertos'] is not None else "-")
+                        st.metric("Entradas", f"{uso['entradas']:,}")
+                    with cache_col3:
+                        st.metric("Memoria usada", f"{uso['bytes'] / 1024 ** 2:,.1f} MB")
+                        st.metric("Presupuesto", f"{uso['presupuesto'] / 1024 ** 2:,.1f} MB")
+                    with cache_col4:
+                        st.metric("Bytes desalojados", f"{uso['bytes_desalojados'] / 1024 ** 2:,.1f} MB")
+                        st.metric("Entradas desalojadas", f"{uso['desalojos']:,}")
+                
+                metricas = resultados['metricas']
+                detail_table = resultados['detalle']
+                dm_vendors_detail = resultados['dm']
+                vendor_df = resultados['vendors']
+                if RESULTADOS_POS_HABILITADOS:
+                    st.caption("Resultados precalculados en la carga" if materializados
+                               else "Resultados calculados en el momento (no hay resultados precalculados vigentes)")
+                
+                st.subheader("Información del Punto de Venta")
+
+                # Métricas principales
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric(f"Total de Compras - POS {selected_pos}", f"${metricas['total_compras']:,.2f}")
+                with col2:
+                    st.metric("Promedio por Orden", f"${metricas['promedio_por_orden']:,.2f}")
+                with col3:
+                    st.metric("Número de Órdenes", f"{metricas['numero_ordenes']:,}")
+
+                info_col1, info_col2, info_col3 = st.columns(3)
+            
+                with info_col1:
+                    st.metric("País", metricas['pais'])
+                with info_col2:
+                    st.metric("Zona Geográfica", metricas['zona'])
+                with info_col3:
+                    st.metric("Total Vendors", metricas['total_vendors'])
+
+                # Detalle de compras
+                st.subheader("Detalle de Compras por Droguería/Vendor")
+                if not detail_table.empty:
+                    st.dataframe(
+                        detail_table.style.format({
+                            'Total Comprado': '${:,.2f}',
+                            'Porcentaje': '{:.2f}%'
+                        })
+                    )
+                
+                    # NUEVO CÓDIGO: Mostrar tabla de vendors que son drug manufacturers
+                    st.subheader("Ventas de Distribuidores que son Vendors")
+                    if metricas['estado_dm'] == 'ok':
+                        total_comprado_dm = metricas['total_comprado_dm']
+                        valor_dm_compras_ganadores = metricas['valor_dm_ganadores']
+                        porcentaje_dm_compras_ganadores = (valor_dm_compras_ganadores / total_comprado_dm * 100) if total_comprado_dm > 0 else 0
+                        
+                        # Verificar que la suma de 'Valor Compras Ganadores' coincida con valor_dm_compras_ganadores
+                        total_calculado = metricas['total_calculado_dm']
+                        if abs(total_calculado - valor_dm_compras_ganadores) > 0.01 * valor_dm_compras_ganadores:  # 1% de tolerancia
+                            st.warning(f"Discrepancia en los cálculos: Valor DM total ({valor_dm_compras_ganadores:.2f}) ≠ Suma de valores individuales ({total_calculado:.2f})")
+                        
+                        st.dataframe(
+                            dm_vendors_detail.style.format({
+                                'Total Comprado': '${:,.2f}',
+                                'Porcentaje': '{:.2f}%',
+                                'Valor Compras Ganadores': '${:,.2f}',
+                                '% Compras Ganadores': '{:.2f}%'
+                            })
+                        )
+                        
+                        # Mostrar métricas de resumen
+                        dm_col1, dm_col2, dm_col3 = st.columns(3)
+                        with dm_col1:
+                            st.metric("Total Compras a Vendors", f"${total_comprado_dm:,.2f}")
+                            st.metric("% del Total de Compras", f"{(total_comprado_dm / detail_table['Total Comprado'].sum() * 100):.2f}%")
+                        
+                        with dm_col2:
+                            st.metric("Número de Vendors Drug Manufacturers", f"{len(dm_vendors_detail)}")
+                            st.metric("Productos Comprados a DM que son Ganadores", f"{metricas['productos_dm_ganadores']}")
+                        
+                        with dm_col3:
+                            st.metric("Valor de Compras a DM que son Ganadores", f"${valor_dm_compras_ganadores:,.2f}")
+                            st.metric("% de Compras a DM que son Ganadores", f"{porcentaje_dm_compras_ganadores:.2f}%")
+                    elif metricas['estado_dm'] == 'error':
+                        st.warning(f"Error al calcular estadísticas de drug manufacturers: {metricas['error_dm']}")
+                        st.expander("Detalles del error", expanded=False).code(metricas['traza_dm'])
+                    elif metricas['estado_dm'] == 'sin_dm':
+                        st.info("No se encontraron distribuidores que también sean fabricantes (drug manufacturers) en este punto de venta.")
+                    else:
+                        st.warning("No se pudo cargar el archivo vendors_dm.csv o está vacío.")
+
+                    # Análisis de productos
+                    st.subheader("Análisis de Productos")
+                
+                    if metricas['hay_interseccion']:
+                        orders_total = metricas['orders_total']
+                        products_total = metricas['products_total']
+    
+                        # Mostrar métricas de valor
+                        value_col1, value_col2, value_col3, value_col4 = st.columns(4)
+                        with value_col1:
+                            st.metric("Valor en Compras Reales (Potencial a Alcanzar)", f"${orders_total:,.2f}")
+                        with value_col2:
+                            st.metric("Valor con Precios Oportunidad", f"${products_total:,.2f}")
+                    
+                        with value_col3:
+            # Calcular valor potencial neto (valor potencial - valor convertido)
+                            valor_potencial_neto = products_total - metricas['valores_convertidos']
+                            st.metric("Valor Potencial Neto (Oportunidad - Convertido)", f"${valor_potencial_neto:,.2f}")
+                        with value_col4:
+                            # Calcular el porcentaje de ahorro
+                            savings_percentage = ((orders_total - products_total) / orders_total * 100) if orders_total > 0 else 0
+                            st.metric("Ahorro Potencial", f"{savings_percentage:.2f}%")
+
+                    if not vendor_df.empty:
+                        st.subheader("Detalle por Vendor")
+                    
+                        # Mostrar tabla detallada de vendors
+                        mostrar_tabla_vendor_detalle(vendor_df, dm_vendors_detail)
+                    
+                        # Gráfico (creado junto con los resultados del POS)
+                        st.plotly_chart(vista['figura'], use_container_width=True)
+                    else:
+                        st.info("No se encontraron vendors con venta potencial para este punto de venta.")
+
+                    st.subheader("Oportunidades con Valor Potencial > $20,000")
+
+                    df_insight_simple = resultados['insight']
+
+                    if not df_insight_simple.empty:
+        # Aplicar formato
+                        styled_df = df_insight_simple.style.format({
+                            'Valor Potencial': '${:,.2f}'
+                        })
+    
+        # Aplicar colores por status
+                        styled_df = styled_df.applymap(
+                            lambda x: 'background-color: #90EE90' if x == "Activo" else 
+                          ('background-color: #FFD700' if x == "Pendiente" else 
+                         'background-color: #ffcccb' if x == "Sin Status" else ''),
+                        subset=['Status']
+                        )
+    
+        # Mostrar tabla
+                        st.dataframe(styled_df)
+    
+        # Mostrar total
+                        st.metric("Valor Potencial Total", f"${df_insight_simple['Valor Potencial'].sum():,.2f}")
+                    else:
+                        st.info("No se encontraron oportunidades con valor potencial superior a $20,000 para este punto de venta.")
                 
            
-except Exception as e:
-    st.error(f"Error al procesar los datos: {str(e)}")
-    import traceback
-    st.expander("Ver detalles del error", expanded=False).code(traceback.format_exc())
-    st.info("Asegúrate de que todos los archivos CSV estén en el directorio correcto y tengan el formato esperado.")
\ No newline at end of file
+    except Exception as e:
+        st.error(f"Error al procesar los datos: {str(e)}")
+        import traceback
+        st.expander("Ver detalles del error", expanded=False).code(traceback.format_exc())
+        st.info("Asegúrate de que todos los archivos CSV estén en el directorio correcto y tengan el formato esperado.")
+
+# La página solo se ejecuta con `streamlit run app.py`; importar el módulo (por ejemplo desde
+# batch_oportunidades.py) no la dispara
+if __name__ == "__main__":
+    main()
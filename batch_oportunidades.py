@@ -0,0 +1,229 @@
+"""
+Genera la tabla "Oportunidades con Valor Potencial > $20,000" para todos los POS sin
+levantar Streamlit.
+
+Los datos se cargan una vez en el proceso principal y los POS se reparten en bloques entre
+un pool de procesos; cada bloque se calcula con el motor vectorizado
+(calcular_vendor_analysis_todos_pos). El resultado se consolida en un único archivo CSV o
+Parquet (según la extensión de --salida), ordenado de forma determinista para poder
+comparar ejecuciones con diff.
+
+Con --streaming los pedidos se leen por bloques de órdenes completas y se reducen a
+agregados parciales (streaming.py), con un pico de memoria acotado por --tamano-bloque en
+lugar de crecer con el historial.
+
+Uso:
+    python batch_oportunidades.py --salida oportunidades.csv --workers 4
+    python batch_oportunidades.py --datos /ruta/a/csvs --salida vendors.parquet --tabla vendors
+    python batch_oportunidades.py --salida oportunidades.csv --streaming --tamano-bloque 100000
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import app
+import streaming
+from esquemas import leer_csv_con_esquema
+
+# Datos compartidos por los workers (se asignan en _inicializar_worker)
+_DATOS = None
+
+
+def cargar_datos():
+    """
+    Carga y procesa los datos de entrada igual que la página, sin la caché de Streamlit
+
+    Returns:
+        Diccionario con los DataFrames que necesita el motor batch
+    """
+    (pos_vendor_totals, df_original, pos_order_stats, df_min_purchase,
+     df_vendor_dm, pos_geo_zones, df_clasificado) = app.load_and_process_data()
+
+    if pos_vendor_totals.empty:
+        raise RuntimeError("No se pudieron cargar los datos (ver el error de load_and_process_data)")
+
+    return {
+        'pos_vendor_totals': pos_vendor_totals,
+        'df_original': df_original,
+        'df_clasificado': df_clasificado,
+        'df_vendor_dm': df_vendor_dm,
+        'indice_status': app.construir_indice_status(leer_csv_con_esquema('vendor_pos_relations.csv')),
+        'pos_geo_zones': pos_geo_zones,
+        'df_min_purchase': df_min_purchase,
+    }
+
+
+def _inicializar_worker(datos):
+    global _DATOS
+    _DATOS = datos
+
+
+def procesar_bloque(pos_ids):
+    """
+    Calcula el análisis de vendors para un bloque de POS
+
+    Args:
+        pos_ids: IDs de POS del bloque
+
+    Returns:
+        Tupla (pid del worker, POS procesados, DataFrame de vendors, segundos)
+    """
+    inicio = time.perf_counter()
+    vendor_df = app.calcular_vendor_analysis_todos_pos(
+        _DATOS['pos_vendor_totals'], _DATOS['df_original'], _DATOS['df_clasificado'],
+        _DATOS['df_vendor_dm'], _DATOS['indice_status'], _DATOS['pos_geo_zones'],
+        _DATOS['df_min_purchase'], pos_ids=pos_ids
+    )
+    return os.getpid(), len(pos_ids), vendor_df, time.perf_counter() - inicio
+
+
+def ordenar_resultado(df, tabla):
+    """Orden determinista del resultado final (POS, valor descendente, vendor)"""
+    if tabla == 'oportunidades':
+        claves, ascendente = ['POS ID', 'Valor Potencial', 'Vendor ID'], [True, False, True]
+    else:
+        claves, ascendente = ['point_of_sale_id', 'Valor Potencial Total', 'Vendor ID'], [True, False, True]
+    return df.sort_values(claves, ascending=ascendente, kind='stable').reset_index(drop=True)
+
+
+def escribir_resultado(df, salida):
+    """Escribe el resultado en CSV o Parquet según la extensión"""
+    if salida.lower().endswith('.parquet'):
+        # Drug Manufacturer ID mezcla números y None: se guarda como numérico nullable
+        if 'Drug Manufacturer ID' in df.columns:
+            df = df.assign(**{'Drug Manufacturer ID': pd.to_numeric(df['Drug Manufacturer ID'], errors='coerce')})
+        df.to_parquet(salida, index=False)
+    else:
+        df.to_csv(salida, index=False)
+
+
+def ejecutar_streaming(tamano_bloque=None, log=sys.stderr):
+    """
+    Calcula el análisis de vendors de todos los POS leyendo los pedidos por bloques
+
+    Args:
+        tamano_bloque: Líneas de pedido por bloque (por defecto streaming.TAMANO_BLOQUE)
+        log: Flujo donde se escribe el progreso
+
+    Returns:
+        DataFrame de vendors de todos los POS
+    """
+    inicio = time.perf_counter()
+    resultado = streaming.procesar_pedidos_por_bloques(tamano_bloque=tamano_bloque, log=log)
+    segundos = time.perf_counter() - inicio
+    print(f"\n{resultado['filas']:,} líneas de pedido en {resultado['bloques']} bloques, "
+          f"{segundos:.2f}s ({resultado['filas'] / segundos if segundos else 0:,.0f} líneas/s)", file=log)
+    return resultado['vendor_df']
+
+
+def ejecutar(workers=1, bloques_por_worker=4, tabla='oportunidades', salida=None, log=sys.stderr,
+             streaming_activo=False, tamano_bloque=None):
+    """
+    Ejecuta el cálculo batch para todos los POS
+
+    Args:
+        workers: Número de procesos (1 = sin pool)
+        bloques_por_worker: Bloques de POS por worker, para repartir mejor la carga
+        tabla: 'oportunidades' (> $20,000) o 'vendors' (análisis completo)
+        salida: Ruta del archivo de salida (.csv o .parquet); None para no escribir
+        log: Flujo donde se escribe el progreso
+        streaming_activo: Si es True los pedidos se procesan por bloques (sin pool de workers)
+        tamano_bloque: Líneas de pedido por bloque en modo streaming
+
+    Returns:
+        DataFrame consolidado
+    """
+    if streaming_activo:
+        vendor_df = ejecutar_streaming(tamano_bloque, log)
+        resultado = app.generar_insights_todos_pos(vendor_df) if tabla == 'oportunidades' else vendor_df
+        resultado = ordenar_resultado(resultado, tabla)
+        if salida:
+            escribir_resultado(resultado, salida)
+            print(f"\n{len(resultado):,} filas escritas en {salida}", file=log)
+        return resultado
+
+    inicio = time.perf_counter()
+    datos = cargar_datos()
+    t_carga = time.perf_counter() - inicio
+    pos_list = np.sort(datos['pos_vendor_totals']['point_of_sale_id'].unique())
+    print(f"Datos cargados en {t_carga:.1f}s: {len(pos_list):,} POS", file=log)
+
+    n_bloques = max(1, min(len(pos_list), workers * bloques_por_worker))
+    bloques = [b for b in np.array_split(pos_list, n_bloques) if len(b)]
+
+    resultados, por_worker = [], {}
+    procesados = 0
+
+    def registrar(pid, n_pos, vendor_df, segundos):
+        nonlocal procesados
+        resultados.append(vendor_df)
+        stats = por_worker.setdefault(pid, {'bloques': 0, 'pos': 0, 'filas': 0, 'segundos': 0.0})
+        stats['bloques'] += 1
+        stats['pos'] += n_pos
+        stats['filas'] += len(vendor_df)
+        stats['segundos'] += segundos
+        procesados += n_pos
+        print(f"[{len(resultados)}/{len(bloques)}] {procesados:,}/{len(pos_list):,} POS", file=log)
+
+    inicio = time.perf_counter()
+    if workers <= 1:
+        _inicializar_worker(datos)
+        for bloque in bloques:
+            registrar(*procesar_bloque(bloque))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker,
+                                 initargs=(datos,)) as pool:
+            futuros = [pool.submit(procesar_bloque, bloque) for bloque in bloques]
+            for futuro in as_completed(futuros):
+                registrar(*futuro.result())
+    t_calculo = time.perf_counter() - inicio
+
+    vendor_df = pd.concat(resultados, ignore_index=True) if resultados else pd.DataFrame(
+        columns=['point_of_sale_id'] + app.COLUMNAS_VENDOR_ANALYSIS)
+    resultado = app.generar_insights_todos_pos(vendor_df) if tabla == 'oportunidades' else vendor_df
+    resultado = ordenar_resultado(resultado, tabla)
+
+    print(f"\nCálculo en {t_calculo:.2f}s ({len(pos_list) / t_calculo if t_calculo else 0:,.0f} POS/s)", file=log)
+    print(f"{'Worker':>8} {'Bloques':>8} {'POS':>7} {'Filas':>9} {'Tiempo (s)':>11} {'POS/s':>9}", file=log)
+    for pid, stats in sorted(por_worker.items()):
+        velocidad = stats['pos'] / stats['segundos'] if stats['segundos'] else 0
+        print(f"{pid:>8} {stats['bloques']:>8} {stats['pos']:>7,} {stats['filas']:>9,} "
+              f"{stats['segundos']:>11.2f} {velocidad:>9,.0f}", file=log)
+
+    if salida:
+        escribir_resultado(resultado, salida)
+        print(f"\n{len(resultado):,} filas escritas en {salida}", file=log)
+
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--salida', required=True, help='Archivo de salida (.csv o .parquet)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Procesos del pool')
+    parser.add_argument('--bloques-por-worker', type=int, default=4)
+    parser.add_argument('--tabla', choices=['oportunidades', 'vendors'], default='oportunidades',
+                        help="'oportunidades' (> $20,000) o 'vendors' (análisis completo por POS)")
+    parser.add_argument('--datos', default=None, help='Directorio con los CSV de entrada (por defecto el actual)')
+    parser.add_argument('--streaming', action='store_true',
+                        help='Procesar los pedidos por bloques con memoria acotada (sin pool de workers)')
+    parser.add_argument('--tamano-bloque', type=int, default=None,
+                        help='Líneas de pedido por bloque en modo streaming')
+    args = parser.parse_args(argv)
+
+    salida = os.path.abspath(args.salida)
+    if args.datos:
+        os.chdir(args.datos)
+
+    ejecutar(workers=args.workers, bloques_por_worker=args.bloques_por_worker,
+             tabla=args.tabla, salida=salida, streaming_activo=args.streaming,
+             tamano_bloque=args.tamano_bloque)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Almacén local indexado (almacen.py): tiempo hasta ver uno o dos POS leyendo solo sus
+filas de SQLite, frente a la carga completa (construir_datos_por_pos).
+
+Para cada escala se mide la importación inicial al almacén, la carga general sin
+pedidos (construir_datos_almacen, con el almacén ya importado), el cálculo de cada POS
+desde el almacén (construir_datos_pos_almacen), un upsert en bloque de un lote de
+órdenes y la sincronización después de agregar órdenes nuevas al final del archivo de
+pedidos (que las agrega con un upsert en lugar de reimportar la tabla). Se verifica que
+los DataFrames de cada POS (también sus relaciones vendor-POS) coincidan con el slice de
+la carga completa (los categóricos se comparan por valor: desde el almacén solo traen las
+categorías del POS), que el upsert directo cambie version_almacen y que después de
+agregar órdenes la tabla de pedidos tenga las mismas filas que el archivo.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_almacen.py --escalas 1 10 --pos 2
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+PARTICIONES = ['pos_vendor_totals', 'df_original', 'pos_order_stats', 'df_clasificado']
+
+
+def comparable(df):
+    """DataFrame con los categóricos como object e índice 0..n-1"""
+    categoricas = [columna for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)]
+    return df.astype({columna: object for columna in categoricas}).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--pos', type=int, default=2, help='POS consultados por escala')
+    parser.add_argument('--lote', type=int, default=100, help='Órdenes del upsert')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'Importar (s)':>13} {'Completa (s)':>13} {'General (s)':>12} "
+          f"{'Por POS (s)':>12} {'Upsert (s)':>11} {'Agregar (s)':>12}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_almacen_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import almacen
+            import app
+
+            cargar = lambda archivo: app.leer_entrada(archivo, normalizar=app.NORMALIZACIONES.get(archivo))  # noqa: E731
+            inicio = time.perf_counter()
+            almacen.sincronizar_almacen(cargar)
+            t_importar = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            completo = app.construir_datos_por_pos()
+            t_completa = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            general = app.construir_datos_almacen()
+            t_general = time.perf_counter() - inicio
+            if general['tablas_importadas']:
+                raise AssertionError(f"Escala {escala}x: el almacén se volvió a importar sin cambios")
+
+            df_vendors_pos = app.construir_relaciones_vendor_pos()['df_vendors_pos']
+            tiempos_pos = []
+            for pos_id in general['pos_list'][:args.pos]:
+                inicio = time.perf_counter()
+                datos_pos = app.construir_datos_pos_almacen(pos_id, general['pos_geo_zones'])
+                tiempos_pos.append(time.perf_counter() - inicio)
+                for nombre in PARTICIONES:
+                    esperado = app.filas_pos(completo[nombre], pos_id)
+                    obtenido = app.filas_pos(datos_pos[nombre], pos_id)
+                    try:
+                        pd.testing.assert_frame_equal(comparable(esperado), comparable(obtenido))
+                    except AssertionError as e:
+                        raise AssertionError(f"Escala {escala}x, POS {pos_id}: {nombre} difiere: {e}")
+                if not app.filas_pos(completo['df_original'], pos_id).index.equals(
+                        app.filas_pos(datos_pos['df_original'], pos_id).index):
+                    raise AssertionError(f"Escala {escala}x, POS {pos_id}: las filas del archivo no coinciden")
+                esperado = df_vendors_pos[df_vendors_pos['point_of_sale_id'] == pos_id]
+                try:
+                    pd.testing.assert_frame_equal(comparable(esperado), comparable(datos_pos['df_vendors_pos']))
+                except AssertionError as e:
+                    raise AssertionError(f"Escala {escala}x, POS {pos_id}: las relaciones difieren: {e}")
+
+            df_pedidos = app.leer_entrada(app.ARCHIVO_PEDIDOS, normalizar=app.normalizar_pedidos)
+            lote = df_pedidos[df_pedidos['order_id'].isin(df_pedidos['order_id'].drop_duplicates().tail(args.lote))]
+            version = almacen.version_almacen()
+            inicio = time.perf_counter()
+            almacen.upsert('pedidos', lote)
+            t_upsert = time.perf_counter() - inicio
+            if almacen.version_almacen() != version + 1:
+                raise AssertionError(f"Escala {escala}x: el upsert no cambió la versión del almacén")
+
+            # Órdenes nuevas (order_id posterior a la marca de agua) al final del archivo
+            crudo = pd.read_csv(app.ARCHIVO_PEDIDOS)
+            agregadas = crudo[crudo['order_id'].isin(crudo['order_id'].drop_duplicates().tail(args.lote))]
+            agregadas = agregadas.assign(order_id=agregadas['order_id'] - agregadas['order_id'].min()
+                                         + crudo['order_id'].max() + 1)
+            agregadas.to_csv(app.ARCHIVO_PEDIDOS, mode='a', header=False, index=False)
+            inicio = time.perf_counter()
+            almacen.sincronizar_almacen(cargar)
+            t_agregar = time.perf_counter() - inicio
+            if len(almacen.leer_tabla('pedidos')) != len(cargar(app.ARCHIVO_PEDIDOS)):
+                raise AssertionError(f"Escala {escala}x: la tabla de pedidos no coincide con el archivo")
+
+            print(f"{escala:>5}x {t_importar:>13.3f} {t_completa:>13.3f} {t_general:>12.3f} "
+                  f"{sum(tiempos_pos) / max(len(tiempos_pos), 1):>12.3f} {t_upsert:>11.3f} {t_agregar:>12.3f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Tiempo de arranque en frío de load_and_process_data con y sin snapshots Parquet.
+
+Se prepara un directorio de datos sintéticos (ver datos_sinteticos.py) y se mide tanto
+la lectura de las entradas por separado como el arranque completo:
+  - sin snapshots: parseo de todos los CSV (comportamiento anterior)
+  - primer arranque: parseo de los CSV y escritura de los snapshots
+  - arranques siguientes: carga desde los snapshots
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_arranque.py --escalas 1 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def medir_arranque(app, repeticiones):
+    """Mejor tiempo (segundos) de load_and_process_data sin caché en memoria"""
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = app.load_and_process_data()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def medir_lectura(app, snapshots, repeticiones):
+    """Mejor tiempo (segundos) de la lectura de los CSV de entrada, sin procesamiento"""
+    entradas = [
+        ('pos_address.csv', app.normalizar_pos_address),
+        ('orders_delivered_pos_vendor_geozone.csv', app.normalizar_pedidos),
+        ('vendors_catalog.csv', app.normalizar_proveedores),
+        ('vendor_pos_relations.csv', None),
+        ('top_5_productos_geozona.csv', None),
+        ('vendors_dm.csv', None),
+        ('minimum_purchase.csv', None),
+    ]
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for ruta, normalizar in entradas:
+            snapshots.leer_csv_con_snapshot(ruta, normalizar=normalizar)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    filas = []
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_arranque_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+
+            import app
+            import snapshots
+
+            snapshots.SNAPSHOTS_HABILITADOS = False
+            t_csv, esperado = medir_arranque(app, args.repeticiones)
+            l_csv = medir_lectura(app, snapshots, args.repeticiones)
+
+            snapshots.SNAPSHOTS_HABILITADOS = True
+            shutil.rmtree(snapshots.SNAPSHOT_DIR, ignore_errors=True)
+            t_construccion, _ = medir_arranque(app, 1)
+            t_snapshot, obtenido = medir_arranque(app, args.repeticiones)
+            l_snapshot = medir_lectura(app, snapshots, args.repeticiones)
+
+            for df_esperado, df_obtenido in zip(esperado, obtenido):
+                if not df_esperado.equals(df_obtenido):
+                    raise AssertionError(f"Los resultados con snapshots difieren a escala {escala}x")
+
+            filas.append((escala, len(esperado[1]), l_csv, l_snapshot, t_csv, t_construccion, t_snapshot))
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    print("Lectura de entradas y arranque completo (segundos)")
+    print(f"{'Escala':>6} {'Pedidos':>10} {'Lectura CSV':>12} {'Lectura snap.':>14} "
+          f"{'Arranque CSV':>13} {'Construcción':>13} {'Arranque snap.':>15}")
+    for escala, n_pedidos, l_csv, l_snapshot, t_csv, t_construccion, t_snapshot in filas:
+        print(f"{escala:>5}x {n_pedidos:>10,} {l_csv:>12.3f} {l_snapshot:>14.3f} "
+              f"{t_csv:>13.3f} {t_construccion:>13.3f} {t_snapshot:>15.3f}")
+
+
+if __name__ == '__main__':
+    main()
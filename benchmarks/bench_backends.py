@@ -0,0 +1,80 @@
+"""
+Backends de la carga: pandas frente a DuckDB (motor_sql.py).
+
+Para cada escala de pedidos se ejecuta load_and_process_data con cada backend, sin
+snapshots ni caché por etapas (PHARMA_SNAPSHOTS=0, para medir el cálculo completo), y se
+mide por separado la clasificación (enriquecer_pedidos + clasificar_pedidos frente a
+clasificar_pedidos_sql). Se verifica que los siete DataFrames sean idénticos.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_backends.py --escalas 10 100 --hilos 0
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+from bench_cache_etapas import NOMBRES  # noqa: E402
+from bench_indice_precios import medir  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--hilos', type=int, default=0, help='Hilos de DuckDB (0 = todos los núcleos)')
+    args = parser.parse_args()
+
+    os.environ['PHARMA_SNAPSHOTS'] = '0'
+    os.environ['PHARMA_DUCKDB_HILOS'] = str(args.hilos)
+    import motor_sql
+    if not motor_sql.DUCKDB_DISPONIBLE:
+        raise SystemExit("Este benchmark requiere duckdb (pip install duckdb)")
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'Filas clasif.':>14} {'Clasif. pandas (s)':>19} {'Clasif. DuckDB (s)':>19} "
+          f"{'Carga pandas (s)':>17} {'Carga DuckDB (s)':>17} {'Acel.':>6}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_backends_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+
+            entradas = app.cargar_entradas()
+            df_pedidos, df_proveedores = entradas['df_pedidos'], entradas['df_proveedores']
+            pos_geo_zones = app.calcular_pos_geo_zones(entradas['df_pos_address'])
+
+            def clasificar_pandas():
+                indice = app.construir_indice_catalogo(df_proveedores, df_pedidos, pos_geo_zones)
+                return app.clasificar_pedidos(app.enriquecer_pedidos(df_pedidos, pos_geo_zones, indice, None))[1]
+
+            t_clas_pandas, esperado = medir(clasificar_pandas, args.repeticiones)
+            t_clas_sql, obtenido = medir(lambda: app.clasificar_pedidos_sql(df_pedidos, pos_geo_zones, df_proveedores),
+                                         args.repeticiones)
+            pd.testing.assert_frame_equal(esperado, obtenido)
+
+            t_pandas, frames_pandas = medir(lambda: app.load_and_process_data(backend='pandas'), args.repeticiones)
+            t_sql, frames_sql = medir(lambda: app.load_and_process_data(backend='duckdb'), args.repeticiones)
+            for nombre, df_pandas, df_sql in zip(NOMBRES, frames_pandas, frames_sql):
+                try:
+                    pd.testing.assert_frame_equal(df_pandas, df_sql)
+                except AssertionError as e:
+                    raise AssertionError(f"Escala {escala}x: {nombre} difiere entre backends: {e}")
+
+            print(f"{escala:>5}x {len(obtenido):>14,} {t_clas_pandas:>19.3f} {t_clas_sql:>19.3f} "
+                  f"{t_pandas:>17.3f} {t_sql:>17.3f} {t_pandas / t_sql:>5.1f}x")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
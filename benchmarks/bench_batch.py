@@ -0,0 +1,176 @@
+"""
+Verificación y tiempos del motor batch de oportunidades (calcular_vendor_analysis_todos_pos).
+
+Para una muestra de POS se reproduce el cálculo de la página (detalle, drug manufacturers,
+intersección y actualizar_vendor_analysis) y se compara con el resultado batch. Después se
+mide el tiempo del batch completo frente al recorrido POS por POS de la página.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_batch.py --escalas 1 10 --muestra 30
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def analisis_pos_pagina(app, datos, selected_pos):
+    """
+    Reproduce los pasos de la página para un POS y devuelve vendor_df
+
+    Args:
+        app: Módulo app
+        datos: Diccionario con los DataFrames cargados
+        selected_pos: ID del POS
+
+    Returns:
+        DataFrame equivalente a vendor_df de la página
+    """
+    pos_vendor_totals = datos['pos_vendor_totals']
+    df_original = datos['df_original']
+    df_clasificado = datos['df_clasificado']
+    df_vendor_dm = datos['df_vendor_dm']
+
+    pos_data = pos_vendor_totals[pos_vendor_totals['point_of_sale_id'] == selected_pos]
+    pos_data = pos_data.sort_values('total_compra', ascending=False)
+    pos_info = datos['pos_geo_zones'][datos['pos_geo_zones']['point_of_sale_id'] == selected_pos]
+    geo_zone = pos_info['geo_zone'].iloc[0] if not pos_info.empty else 'No disponible'
+
+    pos_data = pos_data.assign(porcentaje=pos_data['total_compra'] / pos_data['total_compra'].sum() * 100)
+    detail_table = pos_data.copy()
+    detail_table.columns = ['POS ID', 'Droguería/Vendor ID', 'Total Comprado', 'Porcentaje']
+
+    orders_pos = df_original[df_original['point_of_sale_id'] == selected_pos]
+    productos_pos = df_clasificado[df_clasificado['point_of_sale_id'] == selected_pos]
+    df_vendor_winners = productos_pos[productos_pos['clasificacion'] == 'Precio droguería minimo']
+
+    dm_vendors_detail = app.crear_dataframe_vendors_dm(detail_table, df_vendor_dm)
+    if not dm_vendors_detail.empty:
+        dm_detail_ids = set(dm_vendors_detail['Droguería/Vendor ID'].unique())
+        dm_compras = orders_pos[orders_pos['vendor_id'].isin(dm_detail_ids)].copy()
+        dm_compras_ganadores = pd.merge(
+            dm_compras, df_vendor_winners.copy(),
+            on=['super_catalog_id', 'point_of_sale_id'], suffixes=('_comp', '_gan'), how='inner'
+        ).drop_duplicates('super_catalog_id')
+        valor_total = dm_compras_ganadores['valor_vendedor_gan'].sum() if not dm_compras_ganadores.empty else 0
+
+        vendor_valores = {}
+        for _, row in dm_vendors_detail.iterrows():
+            dm_id = row['Droguería/Vendor ID']
+            compras = dm_compras_ganadores[dm_compras_ganadores['vendor_id_comp'] == dm_id]
+            vendor_valores[dm_id] = compras['valor_vendedor_gan'].sum() if not compras.empty else 0
+        suma = sum(vendor_valores.values())
+
+        dm_vendors_detail['Valor Compras Ganadores'] = 0.0
+        for idx, row in dm_vendors_detail.iterrows():
+            valor = vendor_valores[row['Droguería/Vendor ID']]
+            if abs(suma - valor_total) < 0.01 * valor_total:
+                dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = valor
+            elif suma > 0:
+                dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = valor * valor_total / suma
+            else:
+                dm_vendors_detail.at[idx, 'Valor Compras Ganadores'] = valor_total / len(dm_vendors_detail)
+
+    intersection = pd.merge(
+        productos_pos, orders_pos, on=['super_catalog_id', 'point_of_sale_id', 'order_id'],
+        how='inner', suffixes=('', '_ord')
+    ) if not productos_pos.empty and not orders_pos.empty else pd.DataFrame()
+    winners = intersection[intersection['clasificacion'] == 'Precio vendor minimo'] if not intersection.empty else intersection
+
+    return app.actualizar_vendor_analysis(
+        productos_pos=productos_pos,
+        df_vendors_pos=datos['df_vendors_pos'],
+        orders_pos=orders_pos,
+        df_potencial_convertido=None,
+        dm_vendors_detail=dm_vendors_detail,
+        selected_pos=selected_pos,
+        geo_zone=geo_zone,
+        df_min_purchase=datos['df_min_purchase'],
+        intersection_sin_repetidos_winners=winners,
+        indice_status=datos['indice_status'],
+    )
+
+
+def comparar(esperado, obtenido, pos):
+    """Compara vendor_df de la página con el slice del batch para un POS"""
+    columnas = ['Vendor ID', 'Status', 'Valor Potencial Total', 'Valor Convertido',
+                'Compra Mínima', 'Es Drug Manufacturer', 'Total Comprado Como DM']
+    if esperado.empty and obtenido.empty:
+        return
+    # La página ordena el detalle con un sort no estable: con empates en 'Total Comprado' el
+    # orden de los drug manufacturers no está definido, así que se compara sin depender de él
+    orden = ['Es Drug Manufacturer', 'Vendor ID', 'Total Comprado Como DM']
+    esperado = esperado[columnas].sort_values(orden, kind='stable').reset_index(drop=True)
+    obtenido = obtenido[columnas].sort_values(orden, kind='stable').reset_index(drop=True)
+    if len(esperado) != len(obtenido) or not (esperado['Vendor ID'].to_numpy() == obtenido['Vendor ID'].to_numpy()).all():
+        raise AssertionError(f"POS {pos}: vendors distintos\n{esperado}\n{obtenido}")
+    for col in columnas:
+        a, b = esperado[col], obtenido[col]
+        if a.dtype.kind in 'if' or b.dtype.kind in 'if':
+            iguales = np.isclose(a.astype(float), b.astype(float), rtol=1e-9, atol=1e-6).all()
+        else:
+            iguales = (a.astype(str) == b.astype(str)).all()
+        if not iguales:
+            raise AssertionError(f"POS {pos}: la columna {col} difiere\n{esperado}\n{obtenido}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--muestra', type=int, default=30, help='POS a verificar y a medir con la página')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'POS':>6} {'Filas batch':>12} {'Batch (s)':>10} {'Página/POS (s)':>15} {'Página total est. (s)':>22}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_batch_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+
+            (pos_vendor_totals, df_original, pos_order_stats, df_min_purchase,
+             df_vendor_dm, pos_geo_zones, df_clasificado) = app.load_and_process_data()
+            df_vendors_pos = pd.read_csv('vendor_pos_relations.csv')
+            datos = dict(
+                pos_vendor_totals=pos_vendor_totals, df_original=df_original, df_clasificado=df_clasificado,
+                df_vendor_dm=df_vendor_dm, pos_geo_zones=pos_geo_zones, df_min_purchase=df_min_purchase,
+                df_vendors_pos=df_vendors_pos, indice_status=app.construir_indice_status(df_vendors_pos),
+            )
+
+            inicio = time.perf_counter()
+            vendor_df_todos = app.calcular_vendor_analysis_todos_pos(
+                pos_vendor_totals, df_original, df_clasificado, df_vendor_dm,
+                datos['indice_status'], pos_geo_zones, df_min_purchase
+            )
+            app.generar_insights_todos_pos(vendor_df_todos)
+            t_batch = time.perf_counter() - inicio
+
+            pos_list = sorted(pos_vendor_totals['point_of_sale_id'].unique())
+            rng = np.random.default_rng(0)
+            muestra = rng.choice(pos_list, min(args.muestra, len(pos_list)), replace=False)
+            inicio = time.perf_counter()
+            for pos in muestra:
+                esperado = analisis_pos_pagina(app, datos, pos)
+                comparar(esperado, vendor_df_todos[vendor_df_todos['point_of_sale_id'] == pos], pos)
+            t_pos = (time.perf_counter() - inicio) / len(muestra)
+
+            print(f"{escala:>5}x {len(pos_list):>6} {len(vendor_df_todos):>12,} {t_batch:>10.3f} "
+                  f"{t_pos:>15.3f} {t_pos * len(pos_list):>22.1f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Caché por etapas de la carga (cache_etapas.py): qué etapas se recalculan al cambiar cada
+archivo de entrada y cuánto tarda la carga frente al recálculo completo.
+
+Tras una carga inicial se aplica cada escenario sobre los archivos (sin cambios, solo
+otro mtime, o una línea más en un archivo) y se vuelve a cargar con
+load_and_process_data. El resultado se compara con un recálculo completo sin caché por
+etapas (la secuencia anterior de load_and_process_data) sobre los mismos archivos.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_cache_etapas.py --escalas 1 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import ARCHIVO_PEDIDOS, ARCHIVOS_BASE, preparar_directorio  # noqa: E402
+
+NOMBRES = ['pos_vendor_totals', 'df_original', 'pos_order_stats', 'df_min_purchase',
+           'df_vendor_dm', 'pos_geo_zones', 'df_clasificado']
+
+
+def recalculo_completo(app):
+    """Secuencia de load_and_process_data sin caché por etapas (referencia)"""
+    entradas = app.cargar_entradas()
+    df_pedidos = entradas['df_pedidos']
+    pos_geo_zones = app.calcular_pos_geo_zones(entradas['df_pos_address'])
+    df_pedidos_proveedores = app.enriquecer_pedidos(
+        df_pedidos, pos_geo_zones, entradas['df_proveedores'], entradas['df_vendors_pos']
+    )
+    _, df_clasificado = app.clasificar_pedidos(df_pedidos_proveedores)
+    pos_order_stats, pos_vendor_totals = app.calcular_estadisticas_pedidos(df_pedidos)
+    return (pos_vendor_totals, df_pedidos, pos_order_stats, entradas['df_min_purchase'],
+            entradas['df_vendor_dm'], pos_geo_zones, df_clasificado)
+
+
+def tocar(archivo):
+    """Cambia solo el mtime del archivo"""
+    info = os.stat(archivo)
+    os.utime(archivo, ns=(info.st_atime_ns, info.st_mtime_ns + 1_000_000_000))
+
+
+def agregar_linea(archivo):
+    """Repite la última línea del archivo (cambia su contenido)"""
+    with open(archivo, 'rb') as f:
+        lineas = f.read().rstrip(b'\n').split(b'\n')
+    with open(archivo, 'ab') as f:
+        f.write(lineas[-1] + b'\n')
+
+
+def escenarios():
+    """Lista de (descripción, función que modifica los archivos)"""
+    lista = [('sin cambios', lambda: None), (f'mtime de {ARCHIVO_PEDIDOS}', lambda: tocar(ARCHIVO_PEDIDOS))]
+    for archivo in ARCHIVOS_BASE + [ARCHIVO_PEDIDOS]:
+        lista.append((f'cambia {archivo}', lambda archivo=archivo: agregar_linea(archivo)))
+    return lista
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_cache_etapas_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+
+            inicio = time.perf_counter()
+            app.load_and_process_data()
+            t_inicial = time.perf_counter() - inicio
+            print(f"\nEscala {escala}x: carga inicial {t_inicial:.3f} s")
+            print(f"{'Escenario':<52} {'Recalculadas':<52} {'Etapas (s)':>11} {'Completo (s)':>13}")
+
+            for descripcion, modificar in escenarios():
+                modificar()
+                informe = []
+                inicio = time.perf_counter()
+                obtenido = app.load_and_process_data(informe)
+                t_etapas = time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                esperado = recalculo_completo(app)
+                t_completo = time.perf_counter() - inicio
+
+                for nombre, df_esperado, df_obtenido in zip(NOMBRES, esperado, obtenido):
+                    try:
+                        pd.testing.assert_frame_equal(df_obtenido, df_esperado)
+                    except AssertionError as e:
+                        raise AssertionError(f"{nombre} difiere del recálculo completo ({descripcion}): {e}")
+
+                recalculadas = [fila['etapa'] for fila in informe if fila['estado'] == 'recalculada']
+                print(f"{descripcion:<52} {', '.join(recalculadas) or '-':<52} {t_etapas:>11.3f} {t_completo:>13.3f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
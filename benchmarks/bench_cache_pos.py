@@ -0,0 +1,82 @@
+"""
+Caché LRU de resultados por POS (cache_lru.py): costo de volver a un POS ya visto frente
+a recalcular sus resultados y su gráfico (calcular_vista_pos).
+
+Se simula una sesión que alterna entre los primeros POS varias veces, primero con un
+presupuesto que alcanza para todos y después con uno que solo alcanza para una parte
+(--presupuesto-mb), y se informan aciertos, fallos, bytes desalojados y el tiempo medio
+de un acierto y de un fallo. Se verifica que un acierto devuelva el mismo objeto que se
+guardó y que la memoria usada no supere el presupuesto.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_cache_pos.py --escala 1 --pos 2 5 --vueltas 5 --presupuesto-mb 1
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from cache_lru import crear_cache, estadisticas_cache, obtener_o_calcular  # noqa: E402
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def simular(app, cache, datos_pos, relaciones, pos_ids, vueltas):
+    """Alterna entre pos_ids `vueltas` veces; devuelve los tiempos de aciertos y fallos"""
+    tiempos = {True: [], False: []}
+    guardados = {}
+    for _ in range(vueltas):
+        for pos_id in pos_ids:
+            inicio = time.perf_counter()
+            vista, acierto = obtener_o_calcular(cache, (pos_id, 1, 1), lambda: app.calcular_vista_pos(
+                pos_id, datos_pos, relaciones['df_vendors_pos'], relaciones['indice_status']))
+            tiempos[acierto].append(time.perf_counter() - inicio)
+            if acierto and guardados.get(pos_id) is not vista:
+                raise AssertionError(f"POS {pos_id}: el acierto no devolvió el objeto guardado")
+            guardados[pos_id] = vista
+            if cache['bytes'] > cache['presupuesto']:
+                raise AssertionError(f"La caché usa {cache['bytes']:,} bytes, más que el presupuesto")
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=int, default=1)
+    parser.add_argument('--pos', type=int, nargs='+', default=[2, 5], help='Cantidades de POS alternados')
+    parser.add_argument('--vueltas', type=int, default=5)
+    parser.add_argument('--presupuesto-mb', type=float, default=1.0, help='Presupuesto acotado')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    directorio = tempfile.mkdtemp(prefix=f'bench_cache_pos_{args.escala}x_')
+    try:
+        preparar_directorio(directorio, args.escala)
+        os.chdir(directorio)
+        import app
+
+        datos_pos = app.construir_datos_por_pos()
+        relaciones = app.construir_relaciones_vendor_pos()
+
+        print(f"{'POS':>4} {'Presup. (MB)':>13} {'Aciertos':>9} {'Fallos':>7} {'Desalojado (MB)':>16} "
+              f"{'Fallo (ms)':>11} {'Acierto (ms)':>13}")
+        for cantidad in args.pos:
+            pos_ids = datos_pos['pos_list'][:cantidad]
+            for presupuesto_mb in (1024.0, args.presupuesto_mb):
+                cache = crear_cache(int(presupuesto_mb * 1024 ** 2))
+                tiempos = simular(app, cache, datos_pos, relaciones, pos_ids, args.vueltas)
+                uso = estadisticas_cache(cache)
+                media = lambda valores: sum(valores) / len(valores) * 1000 if valores else float('nan')  # noqa: E731
+                print(f"{len(pos_ids):>4} {presupuesto_mb:>13.1f} {uso['aciertos']:>9,} {uso['fallos']:>7,} "
+                      f"{uso['bytes_desalojados'] / 1024 ** 2:>16.2f} {media(tiempos[False]):>11.1f} "
+                      f"{media(tiempos[True]):>13.3f}")
+    finally:
+        os.chdir(directorio_original)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
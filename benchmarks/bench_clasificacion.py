@@ -0,0 +1,111 @@
+"""
+Comparación de tiempos entre el clasificador vectorizado (agregar_columna_clasificacion)
+y la implementación anterior basada en un bucle por grupo.
+
+Los datos de entrada se generan a partir de top_5_productos_geozona.csv, replicando sus
+filas para alcanzar 10x y 100x el tamaño original. Las réplicas se agrupan de a pares en
+la misma orden y con precio_vendedor perturbado, de modo que haya grupos con varias
+ofertas del mismo producto.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_clasificacion.py --escalas 1 10 100
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from app import agregar_columna_clasificacion  # noqa: E402
+
+
+def agregar_columna_clasificacion_bucle(df):
+    """
+    Implementación original de agregar_columna_clasificacion (bucle por grupo con
+    escrituras fila a fila), conservada como referencia para la comparación.
+    """
+    result_df = df.copy()
+    result_df['clasificacion'] = ""
+    grupos = result_df.groupby(['order_id', 'super_catalog_id'])
+
+    for (order_id, product_id), group in grupos:
+        precio_minimo = group['precio_minimo'].iloc[0]
+        min_precio_vendedor = group['precio_vendedor'].min()
+
+        for idx in group.index:
+            precio_vendedor = result_df.loc[idx, 'precio_vendedor']
+
+            if precio_minimo < precio_vendedor:
+                result_df.loc[idx, 'clasificacion'] = "Precio droguería minimo"
+            else:
+                if precio_vendedor == min_precio_vendedor:
+                    result_df.loc[idx, 'clasificacion'] = "Precio vendor minimo"
+                else:
+                    result_df.loc[idx, 'clasificacion'] = "Precio vendor no minimo"
+
+    return result_df
+
+
+def generar_datos(escala, semilla=0):
+    """
+    Genera un DataFrame con la forma de la entrada de agregar_columna_clasificacion
+
+    Args:
+        escala: Número de veces que se replica el archivo base
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        DataFrame con order_id, super_catalog_id, precio_minimo y precio_vendedor
+    """
+    base = pd.read_csv(os.path.join(RAIZ, 'top_5_productos_geozona.csv'),
+                       usecols=['order_id', 'super_catalog_id', 'precio_minimo', 'precio_vendedor'])
+    rng = np.random.default_rng(semilla)
+    desplazamiento = int(base['order_id'].max()) + 1
+
+    replicas = []
+    for r in range(escala):
+        replica = base.copy()
+        # Cada par de réplicas comparte order_id, generando grupos con dos ofertas
+        replica['order_id'] = replica['order_id'] + (r // 2) * desplazamiento
+        replica['precio_vendedor'] = replica['precio_vendedor'] * rng.uniform(0.8, 1.2, len(replica)).round(2)
+        replicas.append(replica)
+
+    return pd.concat(replicas, ignore_index=True)
+
+
+def medir(funcion, df, repeticiones):
+    """Devuelve el mejor tiempo (segundos) de varias ejecuciones y el último resultado"""
+    mejor, resultado = float('inf'), None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(df)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'Escala':>6} {'Filas':>10} {'Bucle (s)':>12} {'Vectorizado (s)':>16} {'Aceleración':>12}")
+    for escala in args.escalas:
+        df = generar_datos(escala)
+        # El bucle se mide una sola vez: a 100x tarda minutos
+        t_bucle, esperado = medir(agregar_columna_clasificacion_bucle, df, 1)
+        t_vector, obtenido = medir(agregar_columna_clasificacion, df, args.repeticiones)
+
+        if not esperado['clasificacion'].equals(obtenido['clasificacion']):
+            raise AssertionError(f"Las clasificaciones difieren a escala {escala}x")
+
+        print(f"{escala:>5}x {len(df):>10,} {t_bucle:>12.3f} {t_vector:>16.4f} {t_bucle / t_vector:>11.0f}x")
+
+
+if __name__ == '__main__':
+    main()
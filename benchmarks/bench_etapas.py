@@ -0,0 +1,83 @@
+"""
+Costo de la instrumentación por etapas (etapas.py) y tabla de etapas de una carga.
+
+Se mide load_and_process_data (sin la caché de Streamlit, con snapshots ya construidos)
+con la instrumentación activa y desactivada, el costo por etapa de etapa() en ambos
+modos, y se imprime el diagnóstico por etapas de la última carga medida.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_etapas.py --escalas 1 10 --repeticiones 5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def medir_carga(app, etapas, habilitada, repeticiones):
+    """Mediana (segundos) de load_and_process_data y el registro de la última carga"""
+    etapas.INSTRUMENTACION_HABILITADA = habilitada
+    tiempos, registro = [], []
+    for _ in range(repeticiones):
+        with etapas.registrar_carga() as registro:
+            inicio = time.perf_counter()
+            with etapas.etapa('load_and_process_data'):
+                app.load_and_process_data()
+            tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)), registro
+
+
+def costo_por_etapa(etapas, habilitada, n=20_000):
+    """Microsegundos por etapa vacía"""
+    etapas.INSTRUMENTACION_HABILITADA = habilitada
+    with etapas.registrar_carga():
+        inicio = time.perf_counter()
+        for _ in range(n):
+            with etapas.etapa('vacia'):
+                pass
+        return (time.perf_counter() - inicio) / n * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_etapas_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+            import etapas
+
+            # La primera carga construye los snapshots
+            app.load_and_process_data()
+            t_desactivada, _ = medir_carga(app, etapas, False, args.repeticiones)
+            t_activa, registro = medir_carga(app, etapas, True, args.repeticiones)
+            us_desactivada = costo_por_etapa(etapas, False)
+            us_activa = costo_por_etapa(etapas, True)
+            etapas.INSTRUMENTACION_HABILITADA = True
+
+            print(f"\nEscala {escala}x: carga {t_desactivada:.3f} s desactivada, {t_activa:.3f} s activa "
+                  f"({(t_activa / t_desactivada - 1) * 100:+.1f}%); {len(registro)} etapas; "
+                  f"costo por etapa {us_desactivada:.2f} us desactivada, {us_activa:.1f} us activa")
+            print(etapas.tabla_registro(registro).to_string(index=False, float_format=lambda x: f"{x:,.3f}"))
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+"""
+Micro-benchmarks por función de app.py con entradas sintéticas a varias escalas.
+
+Funciones medidas:
+  - agregar_columna_clasificacion: pedidos cruzados con el catálogo y su precio mínimo
+  - obtener_status_vendor: búsquedas individuales sobre el índice de status (las filas
+    son las búsquedas; la escala multiplica las relaciones vendor-POS del índice)
+  - unificar_productos_sin_duplicados: productos globales y locales
+  - create_simple_summary: productos globales y locales
+  - crear_dataframe_vendors_dm: tabla de detalle de compras por POS y droguería
+  - calcular_potencial_convertido: pedidos completos
+  - actualizar_vendor_analysis: entradas del POS con más vendors
+
+Las entradas a escala 1x salen de los CSV incluidos (con el archivo de pedidos de
+datos_sinteticos.py) y se replican desplazando sus IDs (más órdenes, POS o vendors) para
+las escalas mayores. Los casos con más de --max-filas filas de entrada se omiten.
+
+Por cada función y escala se guarda la mediana y el p95 del tiempo por llamada y las
+filas de entrada procesadas por segundo. Con --comparar se imprime la relación con un
+archivo de resultados anterior (por ejemplo, antes de optimizar una función). Los
+resultados se guardan por defecto en benchmarks/resultados/ (ignorado por git).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_funciones.py --escalas 1 10 100 --salida benchmarks/resultados/antes.csv
+    python benchmarks/bench_funciones.py --escalas 1 10 100 --salida benchmarks/resultados/despues.csv \
+        --comparar benchmarks/resultados/antes.csv
+"""
+import argparse
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio, replicar  # noqa: E402
+
+# Directorio por defecto de los resultados (ignorado por git)
+DIRECTORIO_RESULTADOS = os.path.join(RAIZ, 'benchmarks', 'resultados')
+
+COLUMNAS_RESULTADO = ['fecha', 'funcion', 'escala', 'filas', 'repeticiones', 'mediana_ms', 'p95_ms', 'filas_por_s']
+
+# Búsquedas por repetición en obtener_status_vendor
+BUSQUEDAS_STATUS = 1_000
+
+
+def cargar_base(app):
+    """Entradas y resultados de la carga a escala 1x (en el directorio actual)"""
+    entradas = app.cargar_entradas()
+    datos_pos = app.construir_datos_por_pos()
+    df_clasificado = datos_pos['df_clasificado']['df'].reset_index(drop=True)
+    return {
+        'app': app,
+        'entradas': entradas,
+        'datos_pos': datos_pos,
+        'clasificacion': df_clasificado.drop(columns='clasificacion'),
+        'pos_vendor_totals': datos_pos['pos_vendor_totals']['df'].reset_index(drop=True),
+    }
+
+
+def caso_clasificacion(base, escala, rng):
+    """agregar_columna_clasificacion sobre pedidos cruzados replicados por orden"""
+    df = replicar(base['clasificacion'], escala, ['order_id'])
+    return len(df), lambda: base['app'].agregar_columna_clasificacion(df)
+
+
+def caso_status(base, escala, rng):
+    """obtener_status_vendor: BUSQUEDAS_STATUS búsquedas sobre relaciones replicadas por POS"""
+    app = base['app']
+    relaciones = replicar(base['entradas']['df_vendors_pos'], escala, ['point_of_sale_id'])
+    indice = app.construir_indice_status(relaciones)
+    # Mitad de pares existentes y mitad de pares sin relación
+    muestra = relaciones.iloc[rng.integers(0, len(relaciones), BUSQUEDAS_STATUS)]
+    vendors = muestra['vendor_id'].to_numpy().copy()
+    vendors[::2] += 1
+    pares = list(zip(vendors.tolist(), muestra['point_of_sale_id'].tolist()))
+
+    def funcion():
+        for vendor_id, pos_id in pares:
+            app.obtener_status_vendor(vendor_id, pos_id, indice)
+    return len(pares), funcion
+
+
+def productos_global_local(base, escala, rng):
+    """Productos globales (top_5_productos_geozona replicado por POS) y una muestra local"""
+    df_global = replicar(base['entradas']['df_products'], escala, ['point_of_sale_id'])
+    df_local = df_global.sample(frac=0.4, random_state=int(rng.integers(1 << 31))).reset_index(drop=True)
+    df_local['valor_total_vendedor'] = df_local['valor_total_vendedor'] * rng.uniform(0.8, 1.2, len(df_local))
+    return df_global, df_local
+
+
+def caso_unificar(base, escala, rng):
+    """unificar_productos_sin_duplicados sobre productos globales y locales"""
+    df_global, df_local = productos_global_local(base, escala, rng)
+    return len(df_global) + len(df_local), lambda: base['app'].unificar_productos_sin_duplicados(df_global, df_local)
+
+
+def caso_resumen(base, escala, rng):
+    """create_simple_summary sobre productos globales y locales"""
+    df_global, df_local = productos_global_local(base, escala, rng)
+    return len(df_global) + len(df_local), lambda: base['app'].create_simple_summary(df_global, df_local)
+
+
+def caso_vendors_dm(base, escala, rng):
+    """crear_dataframe_vendors_dm sobre la tabla de detalle de la página, replicada por POS"""
+    detalle = replicar(base['pos_vendor_totals'], escala, ['point_of_sale_id'])
+    detalle = detalle.assign(porcentaje=rng.uniform(0, 100, len(detalle)))
+    detalle.columns = ['POS ID', 'Droguería/Vendor ID', 'Total Comprado', 'Porcentaje']
+    df_vendor_dm = base['entradas']['df_vendor_dm']
+    return len(detalle), lambda: base['app'].crear_dataframe_vendors_dm(detalle, df_vendor_dm)
+
+
+def caso_potencial_convertido(base, escala, rng):
+    """calcular_potencial_convertido sobre pedidos replicados por orden y POS"""
+    df_pedidos = replicar(base['entradas']['df_pedidos'], escala, ['order_id', 'point_of_sale_id'])
+    df_vendor_dm = base['entradas']['df_vendor_dm']
+    return len(df_pedidos), lambda: base['app'].calcular_potencial_convertido(df_pedidos, df_vendor_dm)
+
+
+def caso_vendor_analysis(base, escala, rng):
+    """actualizar_vendor_analysis para el POS con más vendors, con productos ganadores replicados por vendor"""
+    from bench_vendor_analysis_pos import entradas_pos
+
+    app, datos_pos = base['app'], base['datos_pos']
+    if 'pos_vendor_analysis' not in base:
+        vendors = datos_pos['pos_vendor_totals']['df'].groupby('point_of_sale_id').size()
+        base['pos_vendor_analysis'] = vendors.idxmax()
+    entradas = entradas_pos(app, datos_pos, base['entradas']['df_vendor_dm'], base['pos_vendor_analysis'])
+    ganadores = entradas['intersection_sin_repetidos_winners']
+    entradas['intersection_sin_repetidos_winners'] = replicar(ganadores, escala, ['vendor_id'])
+    indice_status = app.construir_indice_status(base['entradas']['df_vendors_pos'])
+
+    def funcion():
+        app.actualizar_vendor_analysis(**entradas, df_min_purchase=datos_pos['indice_min_purchase'],
+                                       indice_status=indice_status)
+    return len(entradas['intersection_sin_repetidos_winners']), funcion
+
+
+CASOS = {
+    'agregar_columna_clasificacion': caso_clasificacion,
+    'obtener_status_vendor': caso_status,
+    'unificar_productos_sin_duplicados': caso_unificar,
+    'create_simple_summary': caso_resumen,
+    'crear_dataframe_vendors_dm': caso_vendors_dm,
+    'calcular_potencial_convertido': caso_potencial_convertido,
+    'actualizar_vendor_analysis': caso_vendor_analysis,
+}
+
+
+def medir(funcion, repeticiones, tiempo_maximo):
+    """Tiempos (segundos) de funcion(): al menos 3 repeticiones y hasta tiempo_maximo segundos"""
+    funcion()
+    tiempos = []
+    inicio_total = time.perf_counter()
+    while len(tiempos) < repeticiones:
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        if len(tiempos) >= 3 and time.perf_counter() - inicio_total > tiempo_maximo:
+            break
+    return np.array(tiempos)
+
+
+def comparar(resultados, ruta_anterior):
+    """Relación de la mediana con un archivo de resultados anterior (>1 es más rápido ahora)"""
+    anterior = pd.read_csv(ruta_anterior)
+    anterior = anterior.drop_duplicates(['funcion', 'escala'], keep='last')
+    tabla = resultados.merge(anterior[['funcion', 'escala', 'mediana_ms']], on=['funcion', 'escala'],
+                             how='left', suffixes=('', '_anterior'))
+    tabla['aceleracion'] = tabla['mediana_ms_anterior'] / tabla['mediana_ms']
+    return tabla[['funcion', 'escala', 'filas', 'mediana_ms_anterior', 'mediana_ms', 'aceleracion']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--funciones', nargs='+', choices=list(CASOS), default=list(CASOS))
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--tiempo-maximo', type=float, default=10.0,
+                        help='Segundos máximos de medición por función y escala (mínimo 3 repeticiones)')
+    parser.add_argument('--max-filas', type=int, default=10_000_000,
+                        help='Se omiten los casos con más filas de entrada (por memoria)')
+    parser.add_argument('--salida', default=os.path.join(DIRECTORIO_RESULTADOS, 'bench_funciones.csv'),
+                        help='Archivo CSV de resultados')
+    parser.add_argument('--comparar', help='Archivo CSV de resultados anterior')
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    salida = os.path.abspath(args.salida)
+    comparar_con = os.path.abspath(args.comparar) if args.comparar else None
+    directorio = tempfile.mkdtemp(prefix='bench_funciones_')
+    filas_resultado = []
+    try:
+        preparar_directorio(directorio, 1, args.semilla)
+        os.chdir(directorio)
+        import app
+        base = cargar_base(app)
+        fecha = datetime.now().isoformat(timespec='seconds')
+
+        print(f"{'Función':<34} {'Escala':>6} {'Filas':>12} {'Rep.':>5} {'Mediana (ms)':>13} {'p95 (ms)':>10} "
+              f"{'Filas/s':>13}")
+        for nombre in args.funciones:
+            for escala in args.escalas:
+                rng = np.random.default_rng(args.semilla)
+                filas_estimadas = len(base['clasificacion']) * escala if nombre == 'agregar_columna_clasificacion' else 0
+                if filas_estimadas > args.max_filas:
+                    print(f"{nombre:<34} {escala:>5}x {filas_estimadas:>12,} {'omitido (--max-filas)':>45}")
+                    continue
+                filas, funcion = CASOS[nombre](base, escala, rng)
+                if filas > args.max_filas:
+                    print(f"{nombre:<34} {escala:>5}x {filas:>12,} {'omitido (--max-filas)':>45}")
+                    continue
+                tiempos = medir(funcion, args.repeticiones, args.tiempo_maximo)
+                mediana, p95 = float(np.median(tiempos)), float(np.percentile(tiempos, 95))
+                filas_resultado.append({
+                    'fecha': fecha, 'funcion': nombre, 'escala': escala, 'filas': filas,
+                    'repeticiones': len(tiempos), 'mediana_ms': mediana * 1000, 'p95_ms': p95 * 1000,
+                    'filas_por_s': filas / mediana,
+                })
+                print(f"{nombre:<34} {escala:>5}x {filas:>12,} {len(tiempos):>5} {mediana * 1000:>13.2f} "
+                      f"{p95 * 1000:>10.2f} {filas / mediana:>13,.0f}")
+                del funcion
+                gc.collect()
+    finally:
+        os.chdir(directorio_original)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+    resultados = pd.DataFrame(filas_resultado, columns=COLUMNAS_RESULTADO)
+    os.makedirs(os.path.dirname(salida), exist_ok=True)
+    resultados.to_csv(salida, index=False)
+    print(f"\nResultados guardados en {salida}")
+    if comparar_con:
+        print(comparar(resultados, comparar_con).to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Extracción de la zona geográfica de pos_address.csv: apply(obtener_geo_zone) más replace
+de abreviaturas fila por fila frente a la etapa vectorizada (obtener_geo_zones con el memo
+persistente y calcular_pos_geo_zones con el mapa de abreviaturas por categoría).
+
+Con escala > 1 las direcciones se replican con nuevos point_of_sale_id (varios POS por
+dirección, como sucursales de un mismo edificio o cadenas con direcciones repetidas). Se
+mide el memo vacío (primer arranque) y el memo ya construido, y se verifica que la zona
+extraída coincida con la versión anterior.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_geo_zonas.py --escalas 1 10 100
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def obtener_geo_zone(address):
+    """Extracción anterior, una dirección por llamada"""
+    partes = address.split(', ')
+    return ', '.join(partes[-2:-1])
+
+
+def zonas_anterior(app, df_pos_address):
+    """apply por fila y replace de abreviaturas sobre todas las filas"""
+    df = df_pos_address.copy()
+    df['geo_zone'] = df['address'].apply(obtener_geo_zone)
+    pos_geo_zones = df[['point_of_sale_id', 'geo_zone']].copy()
+    pos_geo_zones['geo_zone'] = pos_geo_zones['geo_zone'].replace(app.ABREVIATURAS_ZONA)
+    return pos_geo_zones
+
+
+def zonas_vectorizadas(app, df_pos_address):
+    """Etapa actual: normalizar_pos_address y calcular_pos_geo_zones"""
+    return app.calcular_pos_geo_zones(app.normalizar_pos_address(df_pos_address.copy()))
+
+
+def medir(funcion, repeticiones, preparar=None):
+    """Mediana (segundos) de funcion() y su último resultado"""
+    tiempos = []
+    for _ in range(repeticiones):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    import app
+    import snapshots
+
+    base = pd.read_csv(os.path.join(RAIZ, 'pos_address.csv'))[['point_of_sale_id', 'address']]
+    print(f"{'Escala':>6} {'POS':>9} {'Direcciones':>12} {'Anterior (s)':>13} "
+          f"{'Memo vacío (s)':>15} {'Memo construido (s)':>20} {'Aceleración':>12}")
+    for escala in args.escalas:
+        df_pos_address = pd.concat(
+            [base.assign(point_of_sale_id=base['point_of_sale_id'] + r * 1_000_000) for r in range(escala)],
+            ignore_index=True
+        )
+        directorio = tempfile.mkdtemp(prefix=f'bench_geo_zonas_{escala}x_')
+        snapshots.SNAPSHOT_DIR = directorio
+        try:
+            t_anterior, esperado = medir(lambda: zonas_anterior(app, df_pos_address), args.repeticiones)
+            t_vacio, _ = medir(lambda: zonas_vectorizadas(app, df_pos_address), args.repeticiones,
+                               preparar=lambda: shutil.rmtree(directorio, ignore_errors=True))
+            t_memo, obtenido = medir(lambda: zonas_vectorizadas(app, df_pos_address), args.repeticiones)
+
+            pd.testing.assert_frame_equal(esperado, obtenido, check_dtype=False)
+            print(f"{escala:>5}x {len(df_pos_address):>9,} {df_pos_address['address'].nunique():>12,} "
+                  f"{t_anterior:>13.4f} {t_vacio:>15.4f} {t_memo:>20.4f} {t_anterior / t_memo:>11.1f}x")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
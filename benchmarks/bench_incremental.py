@@ -0,0 +1,112 @@
+"""
+Ingesta incremental de un día de pedidos frente al recálculo completo.
+
+Se separa el último día de pedidos sintéticos (por order_date), se construye el estado con
+el resto y se ingiere el día con incremental.ingerir_pedidos. El resultado se compara con
+load_and_process_data sobre el mismo historial (días anteriores + día nuevo al final).
+
+Un segundo caso ingiere líneas tardías de órdenes ya ingeridas (la última línea de
+algunas órdenes, con una order_date anterior a la marca de agua), que obliga a volver a
+clasificar las líneas anteriores de esas órdenes; también se compara con el recálculo
+completo del historial con esas líneas al final.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_incremental.py --escalas 1 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import ARCHIVO_PEDIDOS, preparar_directorio  # noqa: E402
+
+NOMBRES = ['pos_vendor_totals', 'df_original', 'pos_order_stats', 'df_min_purchase',
+           'df_vendor_dm', 'pos_geo_zones', 'df_clasificado']
+
+
+def comparar_con_recalculo(app, incremental, anteriores, nuevos, escala, caso, marca=None):
+    """
+    Ingiere `nuevos` sobre el estado de `anteriores` y compara con el recálculo completo
+    del historial con los pedidos nuevos al final del archivo
+
+    Con `marca` ('order_date' u 'order_id') los pedidos nuevos se filtran antes con
+    filtrar_pedidos_nuevos.
+
+    Returns:
+        Tupla (segundos del recálculo completo, segundos de la ingesta)
+    """
+    pd.concat([anteriores, nuevos]).to_csv(ARCHIVO_PEDIDOS, index=False)
+    inicio = time.perf_counter()
+    esperado = app.load_and_process_data()
+    t_completo = time.perf_counter() - inicio
+
+    entradas = app.cargar_entradas()
+    entradas['df_pedidos'] = app.normalizar_pedidos(
+        incremental.ajustar_a_esquema(anteriores.reset_index(drop=True), incremental.ARCHIVO_PEDIDOS))
+    estado = incremental.construir_estado(entradas)
+
+    if marca is not None:
+        nuevos = incremental.filtrar_pedidos_nuevos(nuevos, estado, columna=marca)
+    inicio = time.perf_counter()
+    estado = incremental.ingerir_pedidos(estado, nuevos)
+    t_incremental = time.perf_counter() - inicio
+
+    for nombre, df_esperado, df_obtenido in zip(NOMBRES, esperado, incremental.resultado(estado)):
+        if not df_esperado.equals(df_obtenido):
+            raise AssertionError(f"{nombre} difiere del recálculo completo a escala {escala}x ({caso})")
+    return t_completo, t_incremental
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--tardias', type=int, default=20,
+                        help='Órdenes existentes que reciben líneas tardías en el segundo caso')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'Caso':>9} {'Pedidos':>10} {'Nuevos':>7} {'Completo (s)':>13} {'Incremental (s)':>16} "
+          f"{'Aceleración':>12}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_incremental_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+            import incremental
+
+            pedidos = pd.read_csv(ARCHIVO_PEDIDOS)
+            fechas = pd.to_datetime(pedidos['order_date'])
+            ultimo_dia = fechas.dt.normalize() == fechas.max().normalize()
+            anteriores = pedidos[~ultimo_dia]
+
+            # Caso 'dia': órdenes nuevas del último día, filtradas por la marca de agua
+            casos = {'dia': (anteriores, pedidos[ultimo_dia], 'order_date')}
+
+            # Caso 'tardias': la última línea de órdenes ya ingeridas llega después, con su
+            # fecha anterior a la marca de agua, así que ingerir_pedidos tiene que volver a
+            # clasificar las líneas que ya tenía de esas órdenes
+            ordenes = anteriores['order_id'].drop_duplicates()
+            tardias = ordenes.iloc[::max(len(ordenes) // args.tardias, 1)].head(args.tardias)
+            ultimas = anteriores[anteriores['order_id'].isin(tardias)].drop_duplicates('order_id', keep='last')
+            casos['tardias'] = (anteriores.drop(ultimas.index), ultimas, None)
+
+            for caso, (historial, nuevos, marca) in casos.items():
+                t_completo, t_incremental = comparar_con_recalculo(app, incremental, historial, nuevos, escala,
+                                                                   caso, marca)
+                print(f"{escala:>5}x {caso:>9} {len(historial) + len(nuevos):>10,} {len(nuevos):>7,} "
+                      f"{t_completo:>13.3f} {t_incremental:>16.3f} {t_completo / t_incremental:>11.1f}x")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""
+Enriquecimiento de pedidos con el catálogo: dos cruces (nacional y regional) más concat
+frente al índice de precios por producto y zona (construir_indice_precios / buscar_ofertas).
+
+Para cada escala de catálogo (datos_sinteticos.generar_catalogo) se mide:
+  - merges: enriquecer_pedidos tal como estaba (la versión de referencia está copiada abajo),
+    preparando el catálogo en cada carga;
+  - índice: construcción del índice y búsqueda por separado (el índice se construye una
+    vez por carga del catálogo y se reutiliza en cada bloque de streaming.py o ingesta de
+    incremental.py; "Acel. total" incluye la construcción);
+y se verifica que ambos resultados sean idénticos (mismas filas, orden, columnas y dtypes)
+y que es_precio_minimo marque las ofertas de menor precio_vendedor de cada pedido.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_indice_precios.py --escalas-catalogo 1 10 --escala-pedidos 1
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def preparar_catalogo(df_proveedores):
+    """
+    Separa el catálogo en ofertas nacionales y regionales, con los precios como float
+
+    Permite preparar el catálogo una sola vez cuando se cruza con varios lotes de pedidos
+    (por ejemplo, al procesar el archivo de pedidos por bloques).
+
+    Args:
+        df_proveedores: DataFrame de catálogo normalizado
+
+    Returns:
+        Diccionario con los DataFrames 'nacional' y 'regional'
+    """
+    catalogo = {
+        'nacional': df_proveedores[df_proveedores['name'] == 'México'].copy(),
+        'regional': df_proveedores[df_proveedores['name'] != 'México'].copy(),
+    }
+    # Convertir tipos de datos para cálculos correctos
+    for df in catalogo.values():
+        df['base_price'] = df['base_price'].astype(float)
+        df['percentage'] = df['percentage'].astype(float)
+    return catalogo
+
+
+def enriquecer_pedidos_merges(df_pedidos, pos_geo_zones, df_proveedores, df_vendors_pos):
+    """
+    Cruza los pedidos con el catálogo de vendors (nacional y regional) y calcula precios
+
+    Args:
+        df_pedidos: DataFrame de pedidos normalizado
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        df_proveedores: DataFrame de catálogo normalizado o catálogo ya preparado
+            (preparar_catalogo)
+        df_vendors_pos: DataFrame con relaciones vendor-POS
+
+    Returns:
+        DataFrame con una fila por pedido y oferta de vendor aplicable, con precio_vendedor
+        y precio_total_vendedor (filas regionales primero, luego nacionales)
+    """
+    # Separar proveedores nacionales y regionales
+    catalogo = df_proveedores if isinstance(df_proveedores, dict) else preparar_catalogo(df_proveedores)
+    df_proveedores_nacional = catalogo['nacional']
+    df_proveedores_regional = catalogo['regional']
+
+    # Unir pedidos con zonas geográficas
+    df_pedidos_zonas = pd.merge(df_pedidos, pos_geo_zones, on='point_of_sale_id', how='left')
+    df_pedidos_zonas = df_pedidos_zonas[df_pedidos_zonas['unidades_pedidas'] > 0]
+
+    # Procesar con proveedores nacionales y regionales
+    df_pedidos_proveedores_nacional = pd.merge(
+        df_pedidos_zonas, df_proveedores_nacional, on='super_catalog_id', how='inner'
+    )
+    df_pedidos_proveedores_nacional = df_pedidos_proveedores_nacional[
+        df_pedidos_proveedores_nacional['unidades_pedidas'] > 0
+    ]
+
+    df_pedidos_proveedores_regional = pd.merge(
+        df_pedidos_zonas, df_proveedores_regional, 
+        left_on=['super_catalog_id', 'geo_zone'], right_on=['super_catalog_id', 'name'], 
+        how='inner'
+    )
+    df_pedidos_proveedores_regional = df_pedidos_proveedores_regional[
+        df_pedidos_proveedores_regional['unidades_pedidas'] > 0
+    ]
+
+    # Calcular precio_vendedor (base_price y percentage ya son float, ver preparar_catalogo)
+    df_pedidos_proveedores_nacional['precio_vendedor'] = df_pedidos_proveedores_nacional['base_price'] + (df_pedidos_proveedores_nacional['base_price'] * df_pedidos_proveedores_nacional['percentage'] / 100)
+    df_pedidos_proveedores_regional['precio_vendedor'] = df_pedidos_proveedores_regional['base_price'] + (df_pedidos_proveedores_regional['base_price'] * df_pedidos_proveedores_regional['percentage'] / 100)
+
+    # Unir dataframes
+    df_pedidos_proveedores = pd.concat([
+        df_pedidos_proveedores_regional, df_pedidos_proveedores_nacional
+    ], axis=0, ignore_index=True)
+
+    # Calcular precio_total_vendedor
+    if 'precio_vendedor' in df_pedidos_proveedores.columns and 'unidades_pedidas' in df_pedidos_proveedores.columns:
+        df_pedidos_proveedores['precio_total_vendedor'] = (
+            df_pedidos_proveedores['unidades_pedidas'].astype(float) * 
+            df_pedidos_proveedores['precio_vendedor'].astype(float)
+        )
+
+    # Unir con relaciones vendor-pos
+    if 'vendor_id' in df_pedidos_proveedores.columns and 'point_of_sale_id' in df_pedidos_proveedores.columns:
+        df_pedidos_proveedores = pd.merge(
+            df_pedidos_proveedores, df_vendors_pos,
+            on=['point_of_sale_id', 'vendor_id'], how='left'
+        )
+
+    # Corregir nombres de columnas
+    df_pedidos_proveedores.rename(columns={'vendor_id':'drug_manufacturer_id', 'vendor_id_y':'vendor_id'}, inplace=True)
+
+    return df_pedidos_proveedores
+
+
+
+def medir(funcion, repeticiones):
+    """Mediana (segundos) de funcion() y su último resultado"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)), resultado
+
+
+def verificar_minimos(app, indice, df_pedidos, pos_geo_zones, escala):
+    """Comprueba es_precio_minimo contra el mínimo de precio_vendedor de cada pedido"""
+    df_pedidos_zonas = pd.merge(df_pedidos, pos_geo_zones, on='point_of_sale_id', how='left')
+    df_pedidos_zonas = df_pedidos_zonas[df_pedidos_zonas['unidades_pedidas'] > 0]
+    df_pedidos_zonas = df_pedidos_zonas.assign(_fila=np.arange(len(df_pedidos_zonas)))
+    ofertas = app.buscar_ofertas(indice, df_pedidos_zonas, marcar_minimo=True)
+    minimo = ofertas.groupby('_fila')['precio_vendedor'].transform('min')
+    if not ofertas['es_precio_minimo'].equals(ofertas['precio_vendedor'] <= minimo):
+        raise AssertionError(f"Catálogo {escala}x: es_precio_minimo no coincide con el mínimo por pedido")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas-catalogo', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--escala-pedidos', type=int, default=1)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Catálogo':>8} {'Ofertas':>10} {'Filas enriq.':>13} {'Merges (s)':>11} "
+          f"{'Índice: construir (s)':>22} {'Índice: buscar (s)':>19} {'Acel. búsqueda':>15} {'Acel. total':>12}")
+    for escala in args.escalas_catalogo:
+        directorio = tempfile.mkdtemp(prefix=f'bench_indice_precios_{escala}x_')
+        try:
+            preparar_directorio(directorio, args.escala_pedidos, escala_catalogo=escala)
+            os.chdir(directorio)
+            import app
+
+            entradas = app.cargar_entradas()
+            df_pedidos, df_proveedores = entradas['df_pedidos'], entradas['df_proveedores']
+            df_vendors_pos = entradas['df_vendors_pos']
+            pos_geo_zones = app.calcular_pos_geo_zones(entradas['df_pos_address'])
+
+            t_merges, esperado = medir(lambda: enriquecer_pedidos_merges(
+                df_pedidos, pos_geo_zones, df_proveedores, df_vendors_pos), args.repeticiones)
+            t_construir, indice = medir(lambda: app.construir_indice_precios(df_proveedores), args.repeticiones)
+            t_buscar, obtenido = medir(lambda: app.enriquecer_pedidos(
+                df_pedidos, pos_geo_zones, indice, df_vendors_pos), args.repeticiones)
+
+            pd.testing.assert_frame_equal(esperado, obtenido)
+            if not esperado.equals(obtenido):
+                raise AssertionError(f"Catálogo {escala}x: el enriquecimiento con el índice difiere")
+            verificar_minimos(app, indice, df_pedidos, pos_geo_zones, escala)
+
+            print(f"{escala:>7}x {len(df_proveedores):>10,} {len(obtenido):>13,} {t_merges:>11.3f} "
+                  f"{t_construir:>22.3f} {t_buscar:>19.3f} {t_merges / t_buscar:>14.1f}x "
+                  f"{t_merges / (t_construir + t_buscar):>11.1f}x")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Memoria (memory_usage(deep=True)) de los DataFrames de entrada y de los resultados de
+load_and_process_data, sin y con el registro de esquemas (esquemas.py).
+
+"Antes" lee cada CSV completo con los dtypes por defecto de pd.read_csv (con la misma
+normalización); "después" usa leer_csv_con_esquema (carga desde los snapshots). Los
+resultados de la página se recalculan con las mismas etapas sobre ambas cargas y se
+verifica que coincidan en valores.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_memoria.py --escalas 1 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def cargar_sin_esquema(app):
+    """Entradas leídas con pd.read_csv y dtypes por defecto (comportamiento anterior)"""
+    df_vendor_dm = pd.read_csv('vendors_dm.csv')
+    if 'client_id' in df_vendor_dm.columns and 'vendor_id' not in df_vendor_dm.columns:
+        df_vendor_dm = df_vendor_dm.rename(columns={'client_id': 'vendor_id'})
+    return {
+        'df_pos_address': app.normalizar_pos_address(pd.read_csv('pos_address.csv')),
+        'df_pedidos': app.normalizar_pedidos(pd.read_csv('orders_delivered_pos_vendor_geozone.csv')),
+        'df_proveedores': app.normalizar_proveedores(pd.read_csv('vendors_catalog.csv')),
+        'df_vendors_pos': pd.read_csv('vendor_pos_relations.csv'),
+        'df_products': pd.read_csv('top_5_productos_geozona.csv'),
+        'df_vendor_dm': df_vendor_dm,
+        'df_min_purchase': pd.read_csv('minimum_purchase.csv'),
+    }
+
+
+def procesar(app, entradas):
+    """Etapas de load_and_process_data sobre unas entradas ya cargadas"""
+    pos_geo_zones = app.calcular_pos_geo_zones(entradas['df_pos_address'])
+    df_pedidos_proveedores = app.enriquecer_pedidos(
+        entradas['df_pedidos'], pos_geo_zones, entradas['df_proveedores'], entradas['df_vendors_pos']
+    )
+    _, df_clasificado = app.clasificar_pedidos(df_pedidos_proveedores)
+    pos_order_stats, pos_vendor_totals = app.calcular_estadisticas_pedidos(entradas['df_pedidos'])
+    return {'pos_vendor_totals': pos_vendor_totals, 'pos_order_stats': pos_order_stats,
+            'pos_geo_zones': pos_geo_zones, 'df_clasificado': df_clasificado}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_memoria_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+            import esquemas
+
+            antes = cargar_sin_esquema(app)
+            # La primera carga construye los snapshots; se mide la segunda, que es la de
+            # un arranque normal
+            app.cargar_entradas()
+            despues = app.cargar_entradas()
+            resultados_antes = procesar(app, antes)
+            resultados_despues = procesar(app, despues)
+
+            for nombre, df_antes in resultados_antes.items():
+                df_despues = resultados_despues[nombre]
+                columnas = [c for c in df_antes.columns if c in df_despues.columns]
+                pd.testing.assert_frame_equal(
+                    df_antes[columnas].astype(object), df_despues[columnas].astype(object),
+                    check_dtype=False, check_categorical=False
+                )
+
+            antes.update(resultados_antes)
+            despues.update(resultados_despues)
+            reporte = esquemas.reporte_memoria(antes, despues)
+            print(f"\nEscala {escala}x")
+            print(reporte.to_string(index=False, float_format=lambda x: f"{x:,.2f}"))
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
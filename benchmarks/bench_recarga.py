@@ -0,0 +1,108 @@
+"""
+Recarga en caliente (recarga.py): latencia de las sesiones mientras se recargan los datos
+y tiempo hasta que se publica el snapshot nuevo.
+
+Tras la carga inicial se inicia el vigilante y se aplica cada escenario sobre los archivos
+(solo otro mtime, o una línea más en un archivo). Mientras tanto se pide el snapshot
+vigente en un bucle, como lo haría cada rerun, y se mide su latencia. Al publicarse el
+snapshot nuevo se compara con una carga completa sobre los mismos archivos.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_recarga.py --escalas 1 10 --intervalo 0.5
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import ARCHIVO_PEDIDOS, preparar_directorio  # noqa: E402
+from bench_cache_etapas import agregar_linea, tocar  # noqa: E402
+
+PARTICIONES = ['pos_vendor_totals', 'df_original', 'pos_order_stats', 'pos_geo_zones', 'df_clasificado']
+
+
+def escenarios():
+    """Lista de (descripción, función que modifica los archivos, se espera recarga)"""
+    return [
+        (f'mtime de {ARCHIVO_PEDIDOS}', lambda: tocar(ARCHIVO_PEDIDOS), False),
+        ('cambia minimum_purchase.csv', lambda: agregar_linea('minimum_purchase.csv'), True),
+        ('cambia vendors_catalog.csv', lambda: agregar_linea('vendors_catalog.csv'), True),
+        (f'cambia {ARCHIVO_PEDIDOS}', lambda: agregar_linea(ARCHIVO_PEDIDOS), True),
+    ]
+
+
+def medir_durante_recarga(recarga, conjunto, version, espera):
+    """Pide el snapshot en un bucle hasta que cambia de versión o pasa la espera"""
+    latencias = []
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < espera:
+        t = time.perf_counter()
+        snapshot = recarga.snapshot_actual(conjunto)
+        latencias.append(time.perf_counter() - t)
+        if snapshot['version'] > version:
+            return snapshot, time.perf_counter() - inicio, latencias
+        time.sleep(0.001)
+    return None, None, latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--intervalo', type=float, default=0.5)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_recarga_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+            import recarga
+
+            conjunto = recarga.crear_conjunto('datos_pos', app.ARCHIVOS_DATOS_POS, app.construir_datos_por_pos)
+            inicio = time.perf_counter()
+            recarga.snapshot_actual(conjunto)
+            print(f"\nEscala {escala}x: carga inicial {time.perf_counter() - inicio:.3f} s")
+            detener = recarga.iniciar_vigilancia([conjunto], intervalo=args.intervalo)
+            if detener is None:
+                raise SystemExit("La recarga está desactivada (PHARMA_RECARGA=0)")
+
+            print(f"{'Escenario':<52} {'Recarga (s)':>12} {'Lecturas':>9} {'p50 (µs)':>9} {'máx (µs)':>9}")
+            try:
+                for descripcion, modificar, espera_recarga in escenarios():
+                    version = recarga.snapshot_actual(conjunto)['version']
+                    modificar()
+                    # Sin recarga esperada basta con cubrir un par de revisiones del vigilante
+                    espera = 600 if espera_recarga else 3 * args.intervalo
+                    snapshot, segundos, latencias = medir_durante_recarga(recarga, conjunto, version, espera)
+                    if (snapshot is not None) != espera_recarga:
+                        raise AssertionError(f"{descripcion}: se esperaba {'una' if espera_recarga else 'ninguna'} recarga")
+
+                    if snapshot is not None:
+                        esperado = app.construir_datos_por_pos()
+                        for nombre in PARTICIONES:
+                            pd.testing.assert_frame_equal(snapshot['datos'][nombre]['df'], esperado[nombre]['df'])
+                        pd.testing.assert_frame_equal(snapshot['datos']['df_min_purchase'], esperado['df_min_purchase'])
+
+                    latencias_us = np.array(latencias) * 1e6
+                    recargado = f"{segundos:>12.3f}" if segundos is not None else f"{'-':>12}"
+                    print(f"{descripcion:<52} {recargado} {len(latencias):>9} "
+                          f"{np.median(latencias_us):>9.1f} {latencias_us.max():>9.1f}")
+            finally:
+                detener.set()
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
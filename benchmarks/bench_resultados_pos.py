@@ -0,0 +1,97 @@
+"""
+Resultados por POS materializados (resultados_pos.py): tiempo hasta tener los resultados
+de un POS leyendo su slice del archivo, frente a calcularlos en el momento
+(calcular_resultados_pos).
+
+Para cada escala se mide la materialización de todos los POS (materializar_resultados_pos,
+con los datos ya cargados), el tamaño del archivo y, para los primeros POS, el cálculo en
+el momento y la lectura del archivo. Se verifica que las tablas y métricas leídas sean
+idénticas a las calculadas.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_resultados_pos.py --escalas 1 10 --pos 20
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def verificar(esperado, obtenido, contexto):
+    """Compara los resultados calculados con los leídos del archivo"""
+    for nombre, valor in esperado.items():
+        if isinstance(valor, dict):
+            for clave, dato in valor.items():
+                leido = obtenido[nombre][clave]
+                nulos = not isinstance(dato, str) and pd.isna(dato) and pd.isna(leido)
+                if not nulos and dato != leido:
+                    raise AssertionError(f"{contexto}: {nombre}[{clave}] difiere ({dato!r} != {leido!r})")
+        else:
+            try:
+                pd.testing.assert_frame_equal(valor, obtenido[nombre])
+            except AssertionError as e:
+                raise AssertionError(f"{contexto}: la tabla {nombre} difiere: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--pos', type=int, default=20, help='POS medidos por escala')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'POS':>6} {'Materializar (s)':>17} {'Archivo (MB)':>13} "
+          f"{'En el momento (ms)':>19} {'Lectura (ms)':>13}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_resultados_pos_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+            import resultados_pos
+
+            datos_pos = app.construir_datos_por_pos()
+            relaciones = app.construir_relaciones_vendor_pos()
+            huella = resultados_pos.huella_resultados({'escala': str(escala)})
+
+            inicio = time.perf_counter()
+            app.materializar_resultados_pos(datos_pos, relaciones, huella)
+            t_materializar = time.perf_counter() - inicio
+            tamano = os.path.getsize(resultados_pos.ARCHIVO_RESULTADOS) / 1024 ** 2
+
+            tiempos_calculo, tiempos_lectura = [], []
+            for pos_id in datos_pos['pos_list'][:args.pos]:
+                inicio = time.perf_counter()
+                esperado = app.calcular_resultados_pos(pos_id, datos_pos, relaciones['df_vendors_pos'],
+                                                       relaciones['indice_status'])
+                tiempos_calculo.append(time.perf_counter() - inicio)
+
+                inicio = time.perf_counter()
+                obtenido = resultados_pos.leer_resultados_pos(pos_id, huella)
+                tiempos_lectura.append(time.perf_counter() - inicio)
+                if obtenido is None:
+                    raise AssertionError(f"Escala {escala}x: el POS {pos_id} no está en el archivo")
+                verificar(esperado, obtenido, f"Escala {escala}x, POS {pos_id}")
+
+            if resultados_pos.leer_resultados_pos(datos_pos['pos_list'][0], 'otra huella') is not None:
+                raise AssertionError(f"Escala {escala}x: se leyeron resultados con otra huella")
+
+            medidos = max(len(tiempos_calculo), 1)
+            print(f"{escala:>5}x {len(datos_pos['pos_list']):>6,} {t_materializar:>17.3f} {tamano:>13.2f} "
+                  f"{sum(tiempos_calculo) / medidos * 1000:>19.1f} {sum(tiempos_lectura) / medidos * 1000:>13.1f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+create_simple_summary: bucle por POS y búsqueda next(...) sobre la lista de resultados por
+cada par (POS, vendor) local frente a agregados agrupados y un merge outer entre los
+resúmenes global y local.
+
+Se generan productos sintéticos (globales y locales) con la forma de
+top_5_productos_geozona.csv. Hasta --max-filas-anterior se mide también la versión
+anterior (copiada abajo) y se verifica que ambos resultados sean idénticos; además se
+verifica con top_5_productos_geozona.csv.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_resumen_oportunidades.py --filas 10000 100000 300000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+
+def create_simple_summary_anterior(df_products, df_local_products=None, orders_total=0, products_total=0, local_products_total=0):
+    """
+    Crea un DataFrame resumen con la información de potencial y ahorro
+
+    Args:
+        df_products: DataFrame con productos
+        df_local_products: DataFrame con productos locales
+        orders_total: Total de órdenes
+        products_total: Total de productos
+        local_products_total: Total de productos locales
+
+    Returns:
+        DataFrame con el resumen
+    """
+    if df_products.empty: return pd.DataFrame()
+
+    pos_totals = df_products.groupby('point_of_sale_id')['valor_total_vendedor'].sum().to_dict()
+
+    # Agregar valores de productos locales
+    if df_local_products is not None and not df_local_products.empty:
+        for pos_id in df_local_products['point_of_sale_id'].unique():
+            pos_local_total = df_local_products[df_local_products['point_of_sale_id'] == pos_id]['valor_total_vendedor'].sum()
+            pos_totals[pos_id] = pos_totals.get(pos_id, 0) + pos_local_total
+
+    # Calcular ahorro global
+    combined_total = products_total + local_products_total
+    savings_percentage = ((orders_total - combined_total) / orders_total * 100) if orders_total > 0 else 0
+
+    summary_data = []
+
+    # Procesar productos globales
+    if not df_products.empty:
+        grouped = df_products.groupby(['point_of_sale_id', 'vendor_id'])
+        for (pos_id, vendor_id), group in grouped:
+            total_pos = pos_totals.get(pos_id, 0)
+            if total_pos > 0:
+                summary_data.append({
+                    'point_of_sale_id': pos_id,
+                    'vendor_id': vendor_id,
+                    'status': group['status'].iloc[0] if 'status' in group.columns else np.nan,
+                    'valor_potencial': group['valor_total_vendedor'].sum(),
+                    'tipo_oportunidad': 'Global',
+                    'porcentaje_ahorro': (group['valor_total_vendedor'].sum() / total_pos) * 100 * savings_percentage/100
+                })
+
+    # Procesar productos locales
+    if df_local_products is not None and not df_local_products.empty:
+        grouped_local = df_local_products.groupby(['point_of_sale_id', 'vendor_id'])
+        for (pos_id, vendor_id), group in grouped_local:
+            total_pos = pos_totals.get(pos_id, 0)
+            if total_pos > 0:
+                # Verificar si ya existe esta combinación
+                existing_entry = next((item for item in summary_data if 
+                                      item['point_of_sale_id'] == pos_id and 
+                                      item['vendor_id'] == vendor_id), None)
+
+                if existing_entry:
+                    # Actualizar entrada existente
+                    existing_entry['valor_potencial'] += group['valor_total_vendedor'].sum()
+                    existing_entry['tipo_oportunidad'] = 'Global y Local'
+                    existing_entry['porcentaje_ahorro'] = (existing_entry['valor_potencial'] / total_pos) * 100 * savings_percentage/100
+                else:
+                    # Crear nueva entrada
+                    status = group['status'].iloc[0] if 'status' in group.columns else np.nan
+                    summary_data.append({
+                        'point_of_sale_id': pos_id,
+                        'vendor_id': vendor_id,
+                        'status': status,
+                        'valor_potencial': group['valor_total_vendedor'].sum(),
+                        'tipo_oportunidad': 'Local',
+                        'porcentaje_ahorro': (group['valor_total_vendedor'].sum() / total_pos) * 100 * savings_percentage/100
+                    })
+
+    # Crear DataFrame final y ordenar
+    summary_df = pd.DataFrame(summary_data)
+    if not summary_df.empty:
+        summary_df = summary_df.sort_values(['point_of_sale_id', 'valor_potencial'], ascending=[True, False])
+
+    return summary_df
+
+
+def generar_productos(filas, n_pos, n_vendors, semilla):
+    """Productos sintéticos con point_of_sale_id, vendor_id, status y valor_total_vendedor"""
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        'point_of_sale_id': rng.integers(0, n_pos, filas),
+        'vendor_id': rng.integers(0, n_vendors, filas),
+        'status': rng.choice([0, 1, 2, np.nan], filas),
+        'valor_total_vendedor': rng.gamma(2, 500, filas).round(2),
+    })
+
+
+def medir(funcion):
+    """Segundos de funcion() y su resultado"""
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+    parser.add_argument('--max-filas-anterior', type=int, default=10_000,
+                        help='Filas máximas a las que se mide la versión anterior (es cuadrática)')
+    args = parser.parse_args()
+
+    import app
+
+    totales = (1e9, 3e8, 1e8)
+    top_5 = pd.read_csv(os.path.join(RAIZ, 'top_5_productos_geozona.csv'))
+    locales = top_5.sample(frac=0.4, random_state=1).assign(vendor_id=lambda df: df['vendor_id'] % 7 + 1150)
+    pd.testing.assert_frame_equal(create_simple_summary_anterior(top_5, locales, *totales),
+                                  app.create_simple_summary(top_5, locales, *totales))
+
+    print(f"{'Globales':>9} {'Locales':>9} {'Pares':>9} {'Anterior (s)':>13} {'Actual (s)':>11}")
+    for filas in args.filas:
+        # Del orden de 20 productos por POS y 100 vendors
+        n_pos = max(filas // 20, 1)
+        globales = generar_productos(filas, n_pos, 100, 1)
+        locales = generar_productos(filas // 3, n_pos, 100, 2)
+
+        t_actual, obtenido = medir(lambda: app.create_simple_summary(globales, locales, *totales))
+        if filas <= args.max_filas_anterior:
+            t_anterior, esperado = medir(lambda: create_simple_summary_anterior(globales, locales, *totales))
+            pd.testing.assert_frame_equal(esperado, obtenido)
+            anterior = f"{t_anterior:>13.3f}"
+        else:
+            anterior = f"{'-':>13}"
+        print(f"{filas:>9,} {len(locales):>9,} {len(obtenido):>9,} {anterior} {t_actual:>11.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Latencia por rerun al cambiar el POS seleccionado: filtros == selected_pos frente a slices
+de los DataFrames particionados por POS (particionar_por_pos / filas_pos).
+
+Para una muestra de POS se mide:
+  - selección: los filtros que hacía la página en cada rerun frente a los slices, y se
+    verifica que devuelven las mismas filas (mismo orden y mismas etiquetas de índice);
+  - rerun: la ejecución completa de la página con streamlit.testing (AppTest), cambiando
+    el selectbox a cada POS de la muestra (opcional, con --rerun).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_seleccion_pos.py --escalas 1 10 --muestra 30 --rerun
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+from verificar_pagina import errores_pagina  # noqa: E402
+
+
+def seleccion_filtros(datos, pos):
+    """Filtros por POS que hacía la página en cada rerun"""
+    df_original, df_clasificado = datos['df_original'], datos['df_clasificado']
+    pos_data = datos['pos_vendor_totals'][datos['pos_vendor_totals']['point_of_sale_id'] == pos]
+    pos_stats = datos['pos_order_stats'][datos['pos_order_stats']['point_of_sale_id'] == pos]
+    pos_info = datos['pos_geo_zones'][datos['pos_geo_zones']['point_of_sale_id'] == pos]
+    df_original[df_original['point_of_sale_id'] == pos]
+    for _ in range(2):
+        orders_pos = df_original[df_original['point_of_sale_id'] == pos]
+        productos_pos = df_clasificado[df_clasificado['point_of_sale_id'] == pos]
+    df_clasificado[df_clasificado['clasificacion'] == 'Precio droguería minimo']
+    return pos_data, pos_stats, pos_info, orders_pos, productos_pos
+
+
+def seleccion_slices(app, particiones, pos):
+    """Slices por POS de la página actual"""
+    return tuple(app.filas_pos(particiones[nombre], pos) for nombre in
+                 ['pos_vendor_totals', 'pos_order_stats', 'pos_geo_zones', 'df_original', 'df_clasificado'])
+
+
+def medir(funcion, muestra, repeticiones):
+    """Mediana (segundos) por POS de funcion(pos) sobre la muestra"""
+    tiempos = []
+    for pos in muestra:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion(pos)
+            tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+def medir_reruns(muestra):
+    """Mediana (segundos) de un rerun completo de la página al cambiar de POS"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, 'app.py'), default_timeout=600).run()
+    if errores_pagina(at):
+        raise RuntimeError(errores_pagina(at))
+    tiempos = []
+    for pos in muestra:
+        inicio = time.perf_counter()
+        at.selectbox[0].select(pos).run()
+        tiempos.append(time.perf_counter() - inicio)
+        if errores_pagina(at):
+            raise RuntimeError(errores_pagina(at))
+    return float(np.median(tiempos))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--muestra', type=int, default=30)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--rerun', action='store_true', help='Medir también el rerun completo con AppTest')
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'Filas clas.':>12} {'Filtros (ms)':>13} {'Slices (ms)':>12} {'Partición (s)':>14} {'Rerun (s)':>10}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_seleccion_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+
+            (pos_vendor_totals, df_original, pos_order_stats, _,
+             _, pos_geo_zones, df_clasificado) = app.load_and_process_data()
+            datos = dict(pos_vendor_totals=pos_vendor_totals, df_original=df_original,
+                         pos_order_stats=pos_order_stats, pos_geo_zones=pos_geo_zones,
+                         df_clasificado=df_clasificado)
+
+            inicio = time.perf_counter()
+            particiones = {nombre: app.particionar_por_pos(df) for nombre, df in datos.items()}
+            t_particion = time.perf_counter() - inicio
+
+            pos_list = sorted(pos_vendor_totals['point_of_sale_id'].unique())
+            rng = np.random.default_rng(0)
+            muestra = rng.choice(pos_list, min(args.muestra, len(pos_list)), replace=False).tolist()
+
+            for pos in muestra:
+                for esperado, obtenido in zip(seleccion_filtros(datos, pos), seleccion_slices(app, particiones, pos)):
+                    if not esperado.equals(obtenido) or not esperado.index.equals(obtenido.index):
+                        raise AssertionError(f"POS {pos}: el slice difiere del filtro a escala {escala}x")
+
+            t_filtros = medir(lambda pos: seleccion_filtros(datos, pos), muestra, args.repeticiones)
+            t_slices = medir(lambda pos: seleccion_slices(app, particiones, pos), muestra, args.repeticiones)
+            t_rerun = medir_reruns(muestra) if args.rerun else float('nan')
+
+            print(f"{escala:>5}x {len(df_clasificado):>12,} {t_filtros * 1000:>13.2f} {t_slices * 1000:>12.3f} "
+                  f"{t_particion:>14.3f} {t_rerun:>10.3f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Semi-join del catálogo con los productos pedidos y las zonas de los POS
+(filtrar_catalogo / construir_indice_catalogo) frente al índice sobre el catálogo completo.
+
+Para cada escala de catálogo (datos_sinteticos.generar_catalogo) se mide la construcción
+del índice de precios y el enriquecimiento de los pedidos con y sin el filtro previo
+(el tiempo del filtro se incluye en el total filtrado), se informan las filas del catálogo
+descartadas y se verifica que el enriquecimiento y la clasificación sean idénticos.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_semijoin_catalogo.py --escalas-catalogo 1 10 --escala-pedidos 1
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+from bench_indice_precios import medir  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas-catalogo', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--escala-pedidos', type=int, default=1)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Catálogo':>8} {'Ofertas':>10} {'Descartadas':>12} {'%':>6} {'Completo (s)':>13} "
+          f"{'Filtrado (s)':>13} {'Ahorro (s)':>11}")
+    for escala in args.escalas_catalogo:
+        directorio = tempfile.mkdtemp(prefix=f'bench_semijoin_catalogo_{escala}x_')
+        try:
+            preparar_directorio(directorio, args.escala_pedidos, escala_catalogo=escala)
+            os.chdir(directorio)
+            import app
+
+            entradas = app.cargar_entradas()
+            df_pedidos, df_proveedores = entradas['df_pedidos'], entradas['df_proveedores']
+            pos_geo_zones = app.calcular_pos_geo_zones(entradas['df_pos_address'])
+
+            def completo():
+                indice = app.construir_indice_precios(df_proveedores)
+                return app.enriquecer_pedidos(df_pedidos, pos_geo_zones, indice, None)
+
+            def filtrado():
+                indice = app.construir_indice_catalogo(df_proveedores, df_pedidos, pos_geo_zones)
+                return app.enriquecer_pedidos(df_pedidos, pos_geo_zones, indice, None)
+
+            t_completo, esperado = medir(completo, args.repeticiones)
+            t_filtrado, obtenido = medir(filtrado, args.repeticiones)
+
+            pd.testing.assert_frame_equal(esperado, obtenido)
+            pd.testing.assert_frame_equal(app.clasificar_pedidos(esperado)[1], app.clasificar_pedidos(obtenido)[1])
+
+            conservadas = len(app.filtrar_catalogo(df_proveedores, pd.unique(df_pedidos['super_catalog_id']),
+                                                   pos_geo_zones['geo_zone'].dropna().unique()))
+            descartadas = len(df_proveedores) - conservadas
+            print(f"{escala:>7}x {len(df_proveedores):>10,} {descartadas:>12,} "
+                  f"{descartadas / max(len(df_proveedores), 1) * 100:>5.1f}% {t_completo:>13.3f} "
+                  f"{t_filtrado:>13.3f} {t_completo - t_filtrado:>11.3f}")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Memoria con N sesiones concurrentes de la página y latencia por rerun, con los resultados
+compartidos y congelados (construir_datos_por_pos) frente a una versión anterior de app.py.
+
+Cada modo se ejecuta en un proceso hijo: se abren N sesiones con streamlit.testing
+(AppTest, que comparte las cachés del proceso como las sesiones de un servidor), cada una
+selecciona un POS distinto y se mantienen vivas. Se mide el RSS tras la primera sesión y
+tras las N, y la mediana del rerun al cambiar de POS.
+
+La versión anterior se toma de git (--revision-anterior, por ejemplo el commit previo a
+este cambio, donde load_and_process_data usaba st.cache_data y cada rerun volvía a leer
+vendors_dm.csv y vendor_pos_relations.csv).
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_sesiones.py --escalas 1 10 --sesiones 8 --revision-anterior 305ef6e
+"""
+import argparse
+import gc
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+from verificar_pagina import errores_pagina  # noqa: E402
+
+
+def rss_mb(campo='VmRSS'):
+    """RSS actual (VmRSS) o pico (VmHWM) del proceso en MB"""
+    with open('/proc/self/status') as f:
+        for linea in f:
+            if linea.startswith(campo + ':'):
+                return int(linea.split()[1]) / 1024
+    return float('nan')
+
+
+def ejecutar_hijo(script, sesiones, reruns):
+    """Abre las sesiones en este proceso y escribe las métricas como JSON"""
+    from streamlit.testing.v1 import AppTest
+
+    abiertas, tiempos, rss_primera = [], [], None
+    for i in range(sesiones):
+        at = AppTest.from_file(script, default_timeout=600).run()
+        if errores_pagina(at):
+            raise RuntimeError(errores_pagina(at))
+        opciones = at.selectbox[0].options
+        for j in range(reruns):
+            inicio = time.perf_counter()
+            at.selectbox[0].select(opciones[(i * reruns + j + 1) % len(opciones)]).run()
+            tiempos.append(time.perf_counter() - inicio)
+            if errores_pagina(at):
+                raise RuntimeError(errores_pagina(at))
+        abiertas.append(at)
+        if i == 0:
+            gc.collect()
+            rss_primera = rss_mb()
+
+    gc.collect()
+    print(json.dumps({
+        'rss_primera_mb': rss_primera, 'rss_final_mb': rss_mb(), 'pico_mb': rss_mb('VmHWM'),
+        'rerun_ms': float(np.median(tiempos)) * 1000, 'rerun_p95_ms': float(np.percentile(tiempos, 95)) * 1000,
+    }))
+
+
+def medir(script, directorio, sesiones, reruns):
+    """Ejecuta las sesiones de un script en un proceso hijo y devuelve sus métricas"""
+    entorno = dict(os.environ, PYTHONPATH=os.pathsep.join([RAIZ, os.environ.get('PYTHONPATH', '')]))
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--hijo', script, '--sesiones', str(sesiones),
+         '--reruns', str(reruns)],
+        cwd=directorio, capture_output=True, text=True, env=entorno
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"{script} falló:\n{proceso.stderr[-2000:]}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--sesiones', type=int, default=8)
+    parser.add_argument('--reruns', type=int, default=3, help='Cambios de POS por sesión')
+    parser.add_argument('--revision-anterior', help='Revisión de git con la versión anterior de app.py')
+    parser.add_argument('--hijo', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args.hijo, args.sesiones, args.reruns)
+        return
+
+    print(f"{'Escala':>6} {'Versión':>9} {'RSS 1 sesión (MB)':>18} {'RSS ' + str(args.sesiones) + ' sesiones (MB)':>20} "
+          f"{'MB/sesión':>10} {'Pico (MB)':>10} {'Rerun (ms)':>11} {'p95 (ms)':>9}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_sesiones_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            versiones = {'actual': os.path.join(RAIZ, 'app.py')}
+            if args.revision_anterior:
+                anterior = os.path.join(directorio, 'app_anterior.py')
+                with open(anterior, 'w', encoding='utf-8') as f:
+                    f.write(subprocess.run(['git', 'show', f'{args.revision_anterior}:app.py'], cwd=RAIZ,
+                                           capture_output=True, text=True, check=True).stdout)
+                versiones = {'anterior': anterior, **versiones}
+
+            for version, script in versiones.items():
+                m = medir(script, directorio, args.sesiones, args.reruns)
+                por_sesion = (m['rss_final_mb'] - m['rss_primera_mb']) / max(args.sesiones - 1, 1)
+                print(f"{escala:>5}x {version:>9} {m['rss_primera_mb']:>18,.0f} {m['rss_final_mb']:>20,.0f} "
+                      f"{por_sesion:>10,.1f} {m['pico_mb']:>10,.0f} {m['rerun_ms']:>11.1f} {m['rerun_p95_ms']:>9.1f}")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
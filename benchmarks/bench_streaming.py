@@ -0,0 +1,146 @@
+"""
+Pico de memoria (RSS) del análisis de vendors de todos los POS: carga completa frente a
+procesamiento de los pedidos por bloques (streaming.py).
+
+Cada modo se ejecuta en un proceso hijo aparte para medir su pico de RSS (VmHWM de
+/proc/self/status). Se verifica que el análisis por bloques coincida con el de
+calcular_vendor_analysis_todos_pos sobre la carga completa, y que un archivo con las
+líneas de una orden separadas se rechace en lugar de contarla dos veces.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_streaming.py --escalas 1 5 10 20 --tamano-bloque 100000
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+
+def pico_rss_mb():
+    """Pico de RSS del proceso en MB"""
+    # VmHWM se reinicia con exec; ru_maxrss conserva el pico del proceso padre que hizo fork
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def ejecutar_hijo(modo, tamano_bloque, salida):
+    """Calcula el análisis de vendors en este proceso y escribe el resultado y las métricas"""
+    import batch_oportunidades
+    import streaming
+    import snapshots
+
+    # Sin snapshots: ambos modos parsean el CSV de pedidos
+    snapshots.SNAPSHOTS_HABILITADOS = False
+    inicio = time.perf_counter()
+    if modo == 'completo':
+        datos = batch_oportunidades.cargar_datos()
+        batch_oportunidades._inicializar_worker(datos)
+        _, _, vendor_df, _ = batch_oportunidades.procesar_bloque(datos['pos_vendor_totals']['point_of_sale_id'].unique())
+    else:
+        vendor_df = streaming.procesar_pedidos_por_bloques(tamano_bloque=tamano_bloque)['vendor_df']
+    segundos = time.perf_counter() - inicio
+
+    batch_oportunidades.escribir_resultado(batch_oportunidades.ordenar_resultado(vendor_df, 'vendors'), salida)
+    print(json.dumps({'segundos': segundos, 'rss_mb': pico_rss_mb()}))
+
+
+def medir(modo, tamano_bloque, directorio):
+    """Ejecuta un modo en un proceso hijo y devuelve (métricas, resultado)"""
+    salida = os.path.join(directorio, f'resultado_{modo}.parquet')
+    proceso = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--hijo', modo, '--tamano-bloque', str(tamano_bloque),
+         '--salida', salida],
+        cwd=directorio, capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"El modo {modo} falló:\n{proceso.stderr[-2000:]}")
+    metricas = json.loads(proceso.stdout.strip().splitlines()[-1])
+    return metricas, pd.read_parquet(salida)
+
+
+def comparar(esperado, obtenido, escala):
+    """Compara los análisis de vendors de ambos modos (sumas con tolerancia relativa)"""
+    if len(esperado) != len(obtenido):
+        raise AssertionError(f"Escala {escala}x: {len(esperado)} filas frente a {len(obtenido)}")
+    for columna in esperado.columns:
+        a, b = esperado[columna], obtenido[columna]
+        if a.dtype.kind in 'if' and b.dtype.kind in 'if':
+            iguales = np.allclose(a.astype(float), b.astype(float), rtol=1e-9, atol=1e-6, equal_nan=True)
+        else:
+            iguales = (a.astype(str).to_numpy() == b.astype(str).to_numpy()).all()
+        if not iguales:
+            raise AssertionError(f"Escala {escala}x: la columna {columna} difiere")
+
+
+def verificar_orden_no_contigua(directorio, tamano_bloque, escala):
+    """Mueve una línea de la primera orden al final del archivo y verifica que se rechace"""
+    import streaming
+
+    pedidos = pd.read_csv(os.path.join(directorio, 'orders_delivered_pos_vendor_geozone.csv'))
+    ruta = os.path.join(directorio, 'pedidos_no_contiguos.csv')
+    pd.concat([pedidos.iloc[1:], pedidos.iloc[:1]]).to_csv(ruta, index=False)
+    try:
+        for _ in streaming.leer_pedidos_por_bloques(ruta, tamano_bloque=tamano_bloque):
+            pass
+    except ValueError:
+        return
+    raise AssertionError(f"Escala {escala}x: se aceptó un archivo con las líneas de una orden separadas")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--tamano-bloque', type=int, default=100_000)
+    parser.add_argument('--max-escala-completo', type=int, default=10,
+                        help='Escala máxima a la que se mide la carga completa (por memoria)')
+    parser.add_argument('--hijo', choices=['completo', 'streaming'], help=argparse.SUPPRESS)
+    parser.add_argument('--salida', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        ejecutar_hijo(args.hijo, args.tamano_bloque, args.salida)
+        return
+
+    print(f"{'Escala':>6} {'Líneas':>11} {'Completo (s)':>13} {'RSS completo (MB)':>18} "
+          f"{'Bloques (s)':>12} {'RSS bloques (MB)':>17}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_streaming_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            lineas = sum(1 for _ in open(os.path.join(directorio, 'orders_delivered_pos_vendor_geozone.csv'))) - 1
+
+            verificar_orden_no_contigua(directorio, args.tamano_bloque, escala)
+            m_bloques, r_bloques = medir('streaming', args.tamano_bloque, directorio)
+            if escala <= args.max_escala_completo:
+                m_completo, r_completo = medir('completo', args.tamano_bloque, directorio)
+                comparar(r_completo, r_bloques, escala)
+                completo = f"{m_completo['segundos']:>13.2f} {m_completo['rss_mb']:>18,.0f}"
+            else:
+                completo = f"{'-':>13} {'-':>18}"
+
+            print(f"{escala:>5}x {lineas:>11,} {completo} {m_bloques['segundos']:>12.2f} {m_bloques['rss_mb']:>17,.0f}")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+"""
+Análisis de vendors de un POS (actualizar_vendor_analysis): filtros de df_min_purchase e
+intersection_sin_repetidos_winners por cada vendor y filas armadas de a una frente a
+potenciales agrupados por vendor y búsquedas por clave en los índices de compra mínima
+(construir_indice_min_purchase) y de status.
+
+Las entradas de cada POS se arman como en la página (tabla de drug manufacturers con
+asignar_compras_ganadores_dm e intersección de productos ganadores). Se verifica que la
+versión anterior (copiada abajo) y la actual den el mismo resultado en todos los POS, que
+las filas con deleted_at no se usen como compra mínima, y se mide la latencia por llamada
+en los POS con más vendors.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/bench_vendor_analysis_pos.py --escalas 1 10 --top 10
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+from app import construir_indice_status, get_status_description, obtener_status_vendor  # noqa: E402
+
+
+def actualizar_vendor_analysis_anterior(productos_pos, df_vendors_pos, orders_pos, df_potencial_convertido,
+                                        dm_vendors_detail, selected_pos, geo_zone, df_min_purchase,
+                                        intersection_sin_repetidos_winners, indice_status=None):
+    """
+    Función principal para generar el análisis de vendors para un POS específico
+
+    Args:
+        productos_pos: DataFrame con productos potenciales para el POS
+        df_vendors_pos: DataFrame con relaciones vendor-POS
+        orders_pos: DataFrame con órdenes del POS
+        df_potencial_convertido: DataFrame con potencial convertido
+        dm_vendors_detail: DataFrame con detalles de vendors que son drug manufacturers
+        selected_pos: ID del POS seleccionado
+        geo_zone: Zona geográfica del POS
+        df_min_purchase: DataFrame con información de compra mínima
+        intersection_sin_repetidos_winners: DataFrame con productos ganadores (precio vendor mínimo)
+        indice_status: Índice de status prearmado (construir_indice_status); si es None se
+            construye a partir de df_vendors_pos
+
+    Returns:
+        DataFrame con análisis de vendors
+    """
+    if indice_status is None:
+        indice_status = construir_indice_status(df_vendors_pos)
+
+    vendor_analysis = []
+    processed_vendors = set()
+
+    # Crear diccionario para almacenar los valores potenciales por vendor
+    # basados en los productos ganadores (precio vendor mínimo)
+    potenciales_por_vendor = {}
+
+    # Calcular el potencial total por vendor basado en intersection_sin_repetidos_winners
+    if not intersection_sin_repetidos_winners.empty and 'vendor_id' in intersection_sin_repetidos_winners.columns:
+        for vendor_id in intersection_sin_repetidos_winners['vendor_id'].unique():
+            vendor_products = intersection_sin_repetidos_winners[intersection_sin_repetidos_winners['vendor_id'] == vendor_id]
+            valor_potencial = 0
+            if 'precio_total_vendedor' in vendor_products.columns:
+                valor_potencial = vendor_products['precio_total_vendedor'].sum()
+            potenciales_por_vendor[vendor_id] = valor_potencial
+
+    # PARTE 1: PRIMERO AÑADIR VENDORS QUE SON DRUG MANUFACTURERS
+    if not dm_vendors_detail.empty and 'Vendor Real ID' in dm_vendors_detail.columns:
+        for _, row in dm_vendors_detail.iterrows():
+            if pd.notna(row.get('Vendor Real ID')):
+                vendor_id = row['Vendor Real ID']
+
+                # Obtener status
+                vendor_status = obtener_status_vendor(vendor_id, selected_pos, indice_status)
+
+                # Calcular valor potencial desde los productos ganadores
+                potential_value = potenciales_por_vendor.get(vendor_id, 0)
+
+                # Obtener valor DM comprado directamente de dm_vendors_detail
+                comprado_como_dm = row.get('Total Comprado', 0)
+
+                # Calcular valor convertido para drug manufacturers
+                # Solo los drug manufacturers deben tener valores convertidos
+                valor_convertido = 0
+                valor_compras_ganadores = row.get('Valor Compras Ganadores', 0)
+
+                if pd.notna(valor_compras_ganadores) and valor_compras_ganadores > 0:
+                    # Para drug manufacturers, el valor convertido es el valor comprado como DM
+                    valor_convertido = valor_compras_ganadores
+
+                    # IMPORTANTE: Restar el valor convertido del potencial para no duplicar
+                    potential_value = max(0, potential_value - valor_convertido)
+
+                # Obtener compra mínima
+                min_purchase_value = 0
+                if not df_min_purchase.empty and 'name' in df_min_purchase.columns and 'vendor_id' in df_min_purchase.columns:
+                    min_purchase_info = df_min_purchase[
+                        (df_min_purchase['vendor_id'] == vendor_id) &
+                        (df_min_purchase['name'] == geo_zone)
+                    ]
+                    if not min_purchase_info.empty:
+                        min_purchase_value = min_purchase_info['min_purchase'].iloc[0]
+
+                vendor_analysis.append({
+                    'Vendor ID': vendor_id,
+                    'Status': get_status_description(vendor_status),
+                    'Valor Potencial Total': potential_value,
+                    'Valor Convertido': valor_convertido,
+                    'Compra Mínima': min_purchase_value,
+                    'Es Drug Manufacturer': 'Sí',
+                    'Drug Manufacturer ID': row.get('Droguería/Vendor ID'),
+                    'Total Comprado Como DM': comprado_como_dm
+                })
+
+                processed_vendors.add(vendor_id)
+
+    # PARTE 2: AÑADIR VENDORS REGULARES (NO DRUG MANUFACTURERS)
+    # Usamos la información de intersection_sin_repetidos_winners para obtener los vendors relevantes
+    if not intersection_sin_repetidos_winners.empty and 'vendor_id' in intersection_sin_repetidos_winners.columns:
+        unique_vendors = intersection_sin_repetidos_winners['vendor_id'].unique()
+
+        for vendor_id in unique_vendors:
+            # Omitir vendors ya procesados
+            if vendor_id in processed_vendors:
+                continue
+
+            # Obtener status
+            vendor_status = obtener_status_vendor(vendor_id, selected_pos, indice_status)
+
+            # Obtener compra mínima
+            min_purchase_value = 0
+            if not df_min_purchase.empty and 'name' in df_min_purchase.columns and 'vendor_id' in df_min_purchase.columns:
+                min_purchase_info = df_min_purchase[
+                    (df_min_purchase['vendor_id'] == vendor_id) &
+                    (df_min_purchase['name'] == geo_zone)
+                ]
+                if not min_purchase_info.empty:
+                    min_purchase_value = min_purchase_info['min_purchase'].iloc[0]
+
+            # Calcular valor potencial desde los productos ganadores
+            potential_value = potenciales_por_vendor.get(vendor_id, 0)
+
+            # Para vendors regulares (no drug manufacturers), no hay valor convertido
+            valor_convertido = 0
+
+            # Agregar a la lista de análisis
+            vendor_analysis.append({
+                'Vendor ID': vendor_id,
+                'Status': get_status_description(vendor_status),
+                'Valor Potencial Total': potential_value,
+                'Valor Convertido': valor_convertido,  # Para vendors regulares, siempre es 0
+                'Compra Mínima': min_purchase_value,
+                'Es Drug Manufacturer': 'No',
+                'Drug Manufacturer ID': None,
+                'Total Comprado Como DM': 0
+            })
+
+            processed_vendors.add(vendor_id)
+
+    # Crear DataFrame final
+    if vendor_analysis:
+        vendor_df = pd.DataFrame(vendor_analysis)
+        return vendor_df
+    else:
+        return pd.DataFrame()
+
+
+
+def entradas_pos(app, datos_pos, df_vendor_dm, pos):
+    """Entradas de actualizar_vendor_analysis para un POS, armadas como en la página"""
+    pos_data = app.filas_pos(datos_pos['pos_vendor_totals'], pos).sort_values('total_compra', ascending=False)
+    pos_info = app.filas_pos(datos_pos['pos_geo_zones'], pos)
+    orders_pos = app.filas_pos(datos_pos['df_original'], pos)
+    productos_pos = app.filas_pos(datos_pos['df_clasificado'], pos)
+
+    detail_table = pos_data.assign(porcentaje=pos_data['total_compra'] / pos_data['total_compra'].sum() * 100)
+    detail_table.columns = ['POS ID', 'Droguería/Vendor ID', 'Total Comprado', 'Porcentaje']
+    detail_table = detail_table.round({'Porcentaje': 2})
+    dm_vendors_detail = app.crear_dataframe_vendors_dm(detail_table, df_vendor_dm)
+    if not dm_vendors_detail.empty:
+        dm_vendors_detail, _ = app.asignar_compras_ganadores_dm(dm_vendors_detail, orders_pos, productos_pos)
+
+    intersection = pd.merge(
+        productos_pos, orders_pos, on=['super_catalog_id', 'point_of_sale_id', 'order_id'],
+        how='inner', suffixes=('', '_ord')
+    ) if not productos_pos.empty and not orders_pos.empty else pd.DataFrame()
+    ganadores = (intersection[intersection['clasificacion'] == 'Precio vendor minimo']
+                 if not intersection.empty else intersection)
+    return dict(
+        productos_pos=productos_pos, df_vendors_pos=None, orders_pos=orders_pos,
+        df_potencial_convertido=None, dm_vendors_detail=dm_vendors_detail, selected_pos=pos,
+        geo_zone=pos_info['geo_zone'].iloc[0] if not pos_info.empty else 'No disponible',
+        intersection_sin_repetidos_winners=ganadores,
+    )
+
+
+def comparar(esperado, obtenido, pos):
+    """Verifica que ambos análisis tengan las mismas filas, columnas y valores"""
+    if esperado.empty and obtenido.empty:
+        return
+    pd.testing.assert_frame_equal(esperado.reset_index(drop=True), obtenido.reset_index(drop=True),
+                                  check_dtype=False, obj=f"POS {pos}")
+
+
+def medir(funcion, repeticiones):
+    """Mediana (segundos) de funcion() sobre varias repeticiones"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos))
+
+
+def verificar_bajas(app, df_min_purchase):
+    """Las filas dadas de baja no se usan: se marca la primera fila de cada par y se compara"""
+    vigentes = df_min_purchase.dropna(subset=['name']).drop_duplicates(['vendor_id', 'name'])
+    con_bajas = df_min_purchase.copy()
+    con_bajas.loc[vigentes.index[::2], 'deleted_at'] = '2025-01-01 00:00:00'
+    indice = app.construir_indice_min_purchase(con_bajas)
+    muestra = vigentes.iloc[::2]
+    minimos = app.obtener_compras_minimas(muestra['vendor_id'], muestra['name'].astype(object), indice)
+    # Sin otra fila vigente para el par, la compra mínima pasa a 0
+    esperado = []
+    for vendor_id, zona in zip(muestra['vendor_id'], muestra['name']):
+        filas = con_bajas[(con_bajas['vendor_id'] == vendor_id) & (con_bajas['name'] == zona)
+                          & con_bajas['deleted_at'].isna()]
+        esperado.append(filas['min_purchase'].iloc[0] if not filas.empty else 0)
+    if not np.allclose(minimos, np.array(esperado, dtype=float)):
+        raise AssertionError("Una fila dada de baja se usó como compra mínima")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--top', type=int, default=10, help='POS con más vendors en los que se mide la latencia')
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    directorio_original = os.getcwd()
+    print(f"{'Escala':>6} {'POS':>5} {'Vendors':>8} {'DM':>4} {'Anterior (ms)':>14} {'Actual (ms)':>12} {'Mejora':>7}")
+    for escala in args.escalas:
+        directorio = tempfile.mkdtemp(prefix=f'bench_vendor_pos_{escala}x_')
+        try:
+            preparar_directorio(directorio, escala)
+            os.chdir(directorio)
+            import app
+
+            datos_pos = app.construir_datos_por_pos()
+            df_min_purchase = datos_pos['df_min_purchase']
+            indice_min_purchase = datos_pos['indice_min_purchase']
+            df_vendor_dm = app.load_vendors_dm()
+            indice_status = construir_indice_status(app.leer_csv_con_esquema('vendor_pos_relations.csv'))
+            verificar_bajas(app, df_min_purchase)
+
+            vendors_por_pos = {}
+            for pos in datos_pos['pos_list']:
+                entradas = entradas_pos(app, datos_pos, df_vendor_dm, pos)
+                esperado = actualizar_vendor_analysis_anterior(
+                    **entradas, df_min_purchase=df_min_purchase, indice_status=indice_status)
+                obtenido = app.actualizar_vendor_analysis(
+                    **entradas, df_min_purchase=indice_min_purchase, indice_status=indice_status)
+                comparar(esperado, obtenido, pos)
+                vendors_por_pos[pos] = (len(obtenido), entradas)
+
+            mayores = sorted(vendors_por_pos, key=lambda pos: vendors_por_pos[pos][0], reverse=True)[:args.top]
+            for pos in mayores:
+                n_vendors, entradas = vendors_por_pos[pos]
+                t_anterior = medir(lambda: actualizar_vendor_analysis_anterior(
+                    **entradas, df_min_purchase=df_min_purchase, indice_status=indice_status), args.repeticiones)
+                t_actual = medir(lambda: app.actualizar_vendor_analysis(
+                    **entradas, df_min_purchase=indice_min_purchase, indice_status=indice_status), args.repeticiones)
+                print(f"{escala:>5}x {pos:>5} {n_vendors:>8} {len(entradas['dm_vendors_detail']):>4} "
+                      f"{t_anterior * 1000:>14.2f} {t_actual * 1000:>12.2f} {t_anterior / t_actual:>6.1f}x")
+        finally:
+            os.chdir(directorio_original)
+            shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""
+Generación de datos sintéticos con la forma de los archivos de entrada de la app.
+
+El repositorio no incluye orders_delivered_pos_vendor_geozone.csv, así que se construye
+a partir de orders_simple.csv (POS, producto, unidades y precio mínimo) agregando
+order_id, order_date, vendor_id (droguería), valor_vendedor, geo_zone y country.
+Con escala > 1 el historial se replica con nuevos order_id, como si hubiera más meses
+de pedidos de los mismos POS.
+"""
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARCHIVO_PEDIDOS = 'orders_delivered_pos_vendor_geozone.csv'
+
+ARCHIVOS_BASE = [
+    'pos_address.csv',
+    'vendors_catalog.csv',
+    'vendor_pos_relations.csv',
+    'top_5_productos_geozona.csv',
+    'vendors_dm.csv',
+    'minimum_purchase.csv',
+]
+
+# Líneas por orden al agrupar orders_simple.csv en órdenes
+LINEAS_POR_ORDEN = 15
+
+
+def generar_pedidos(escala=1, semilla=0):
+    """
+    Genera un DataFrame de pedidos con las columnas de orders_delivered_pos_vendor_geozone.csv
+
+    Args:
+        escala: Número de veces que se replica el historial de orders_simple.csv
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        DataFrame de pedidos
+    """
+    rng = np.random.default_rng(semilla)
+    base = pd.read_csv(os.path.join(RAIZ, 'orders_simple.csv'))
+    direcciones = pd.read_csv(os.path.join(RAIZ, 'pos_address.csv'))
+    vendors_dm = pd.read_csv(os.path.join(RAIZ, 'vendors_dm.csv'))
+
+    base = base.sort_values('point_of_sale_id', kind='stable').reset_index(drop=True)
+    base['order_id'] = (base.groupby('point_of_sale_id').cumcount() // LINEAS_POR_ORDEN).astype('int64')
+    ordenes_base = base[['point_of_sale_id', 'order_id']].drop_duplicates()
+    base['order_id'] = base.groupby(['point_of_sale_id', 'order_id'], sort=False).ngroup() + 1
+    n_ordenes = len(ordenes_base)
+
+    # Droguerías: los drug manufacturers conocidos más droguerías que no son vendors
+    droguerias = np.concatenate([vendors_dm['drug_manufacturer_id'].unique(), np.arange(1, 21)])
+
+    direcciones['country'] = direcciones['address'].str.split(', ').str[-1].replace({'Mexico': 'México'})
+    zonas = direcciones.set_index('point_of_sale_id')
+
+    replicas = []
+    for r in range(escala):
+        replica = base.copy()
+        replica['order_id'] = replica['order_id'] + r * n_ordenes
+        ordenes = replica['order_id'].unique()
+        drogueria_por_orden = pd.Series(rng.choice(droguerias, len(ordenes)), index=ordenes)
+        fecha_por_orden = pd.Series(
+            pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 540 * 86400, len(ordenes)), unit='s'),
+            index=ordenes
+        )
+        replica['vendor_id'] = replica['order_id'].map(drogueria_por_orden).astype('int64')
+        replica['order_date'] = replica['order_id'].map(fecha_por_orden).dt.strftime('%Y-%m-%d %H:%M:%S')
+        replicas.append(replica)
+
+    pedidos = pd.concat(replicas, ignore_index=True)
+    pedidos['valor_vendedor'] = (pedidos['unidades_pedidas'] * pedidos['precio_minimo']).round(2)
+    pedidos['geo_zone'] = pedidos['point_of_sale_id'].map(zonas['geo_zone'])
+    pedidos['country'] = pedidos['point_of_sale_id'].map(zonas['country'])
+
+    return pedidos[['point_of_sale_id', 'super_catalog_id', 'order_id', 'order_date', 'vendor_id',
+                    'unidades_pedidas', 'precio_minimo', 'valor_vendedor', 'geo_zone', 'country']]
+
+
+def generar_catalogo(escala=1, semilla=0):
+    """
+    Genera un catálogo de vendors con las columnas de vendors_catalog.csv
+
+    Con escala > 1 el catálogo se replica como si hubiera más vendors ofreciendo los mismos
+    productos en las mismas zonas: cada réplica usa nuevos vendor_id y varía base_price
+    hasta un ±10%. La primera réplica es el catálogo original.
+
+    Args:
+        escala: Número de veces que se replica vendors_catalog.csv
+        semilla: Semilla del generador aleatorio
+
+    Returns:
+        DataFrame de catálogo
+    """
+    rng = np.random.default_rng(semilla)
+    base = pd.read_csv(os.path.join(RAIZ, 'vendors_catalog.csv'))
+    salto = int(base['vendor_id'].max()) + 1
+
+    replicas = [base]
+    for r in range(1, escala):
+        replica = base.copy()
+        replica['vendor_id'] = replica['vendor_id'] + r * salto
+        replica['base_price'] = (replica['base_price'] * rng.uniform(0.9, 1.1, len(replica))).round(2)
+        replicas.append(replica)
+    return pd.concat(replicas, ignore_index=True)
+
+
+def replicar(df, escala, columnas_id):
+    """
+    Replica un DataFrame desplazando sus IDs, como si hubiera más POS, órdenes o vendors
+
+    Args:
+        df: DataFrame base (la primera réplica queda igual)
+        escala: Número de réplicas
+        columnas_id: Columnas enteras cuyos valores se desplazan en cada réplica para que
+            las claves de las réplicas no se mezclen
+
+    Returns:
+        DataFrame con len(df) * escala filas
+    """
+    if escala <= 1:
+        return df.copy()
+    saltos = {columna: int(pd.to_numeric(df[columna]).max()) + 1 for columna in columnas_id}
+    replicas = [df]
+    for r in range(1, escala):
+        replica = df.copy()
+        for columna, salto in saltos.items():
+            replica[columna] = replica[columna] + r * salto
+        replicas.append(replica)
+    return pd.concat(replicas, ignore_index=True)
+
+
+def preparar_directorio(destino, escala=1, semilla=0, escala_catalogo=1):
+    """
+    Prepara un directorio de datos completo para ejecutar load_and_process_data
+
+    Copia los CSV incluidos en el repositorio y escribe el archivo de pedidos sintético.
+
+    Args:
+        destino: Directorio de destino (se crea si no existe)
+        escala: Escala del historial de pedidos
+        semilla: Semilla del generador aleatorio
+        escala_catalogo: Escala del catálogo de vendors (ver generar_catalogo)
+
+    Returns:
+        Ruta del directorio preparado
+    """
+    os.makedirs(destino, exist_ok=True)
+    for nombre in ARCHIVOS_BASE:
+        shutil.copy2(os.path.join(RAIZ, nombre), os.path.join(destino, nombre))
+    generar_pedidos(escala, semilla).to_csv(os.path.join(destino, ARCHIVO_PEDIDOS), index=False)
+    if escala_catalogo > 1:
+        generar_catalogo(escala_catalogo, semilla).to_csv(os.path.join(destino, 'vendors_catalog.csv'), index=False)
+    return destino
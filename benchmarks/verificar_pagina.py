@@ -0,0 +1,101 @@
+"""
+Verificación de la página completa: se ejecuta app.py con streamlit.testing (AppTest) y
+se selecciona una muestra de POS, comprobando que ningún rerun termine con una excepción
+ni muestre un st.error (los errores del cálculo se capturan y se muestran con st.error,
+así que at.exception no alcanza).
+
+Cada modo de carga (por defecto, PHARMA_ALMACEN=1 y PHARMA_RESULTADOS_POS=1) se ejecuta
+en un proceso hijo, porque los modos se eligen con variables de entorno y las cachés de
+Streamlit son del proceso. Los benchmarks que miden reruns de la página usan
+errores_pagina para no medir una página que falla.
+
+Uso (desde la raíz del repositorio):
+    python benchmarks/verificar_pagina.py --escala 1 --muestra 5
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from datos_sinteticos import preparar_directorio  # noqa: E402
+
+# Modos de carga de la página: variables de entorno de cada uno
+MODOS = {
+    'completa': {},
+    'almacen': {'PHARMA_ALMACEN': '1'},
+    'resultados_pos': {'PHARMA_RESULTADOS_POS': '1'},
+}
+
+
+def errores_pagina(at):
+    """
+    Errores de la última ejecución de la página
+
+    Args:
+        at: AppTest ya ejecutado
+
+    Returns:
+        Lista de mensajes (excepciones no capturadas y st.error); vacía si no hubo errores
+    """
+    return [str(excepcion.value) for excepcion in at.exception] + [str(error.value) for error in at.error]
+
+
+def verificar_hijo(muestra):
+    """Ejecuta la página en este proceso y recorre los primeros `muestra` POS"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(RAIZ, 'app.py'), default_timeout=600).run()
+    errores = errores_pagina(at)
+    if errores:
+        raise AssertionError(f"La carga de la página falló: {errores}")
+    if not at.selectbox:
+        raise AssertionError("La página no muestra el selector de POS")
+    opciones = at.selectbox[0].options
+    for pos in opciones[:muestra]:
+        at.selectbox[0].select(pos).run()
+        errores = errores_pagina(at)
+        if errores:
+            raise AssertionError(f"POS {pos}: {errores}")
+    print(f"{min(muestra, len(opciones))} POS sin errores")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escala', type=int, default=1)
+    parser.add_argument('--muestra', type=int, default=5, help='POS seleccionados por modo')
+    parser.add_argument('--modos', nargs='+', choices=list(MODOS), default=list(MODOS))
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        verificar_hijo(args.muestra)
+        return
+
+    fallidos = []
+    for modo in args.modos:
+        directorio = tempfile.mkdtemp(prefix=f'verificar_pagina_{modo}_')
+        try:
+            preparar_directorio(directorio, args.escala)
+            entorno = dict(os.environ, PHARMA_RECARGA='0', **MODOS[modo])
+            proceso = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--hijo', '--muestra', str(args.muestra)],
+                cwd=directorio, capture_output=True, text=True, env=entorno
+            )
+            if proceso.returncode != 0:
+                fallidos.append(modo)
+                print(f"{modo:>15}: falló\n{proceso.stderr[-2000:]}")
+            else:
+                print(f"{modo:>15}: {proceso.stdout.strip().splitlines()[-1]}")
+        finally:
+            shutil.rmtree(directorio, ignore_errors=True)
+    if fallidos:
+        sys.exit(f"La página falló en los modos: {', '.join(fallidos)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Caché por etapas de la carga de datos, con dependencias declaradas.
+
+La carga se divide en etapas con nombre; cada una declara los archivos de entrada y las
+etapas previas de las que depende:
+
+    ETAPAS = {
+        'geo_zonas': {'archivos': ['pos_address.csv'], 'etapas': [],
+                      'calcular': lambda archivos, etapas: ...},
+        'clasificacion': {'archivos': [], 'etapas': ['pedidos_enriquecidos'], ...},
+    }
+
+La huella de una etapa combina su nombre y versión, el hash del contenido de sus archivos
+(hash_vigente) y las huellas de las etapas previas, así que cambia cuando cambia
+cualquier entrada aguas arriba. El resultado se guarda junto a los snapshots
+(guardar_etapa) y en la carga siguiente se reutiliza si la huella coincide: cambiar un
+archivo solo recalcula las etapas que dependen de él, directa o indirectamente.
+
+Las etapas se resuelven a demanda desde las pedidas (objetivos): una etapa vigente se lee
+de disco sin cargar sus entradas ni resolver sus etapas previas. Las etapas con
+'persistir': False (resultados intermedios grandes que solo usa otra etapa guardada)
+registran su huella pero no su resultado.
+
+Uso:
+    resultados, informe = ejecutar_etapas(ETAPAS, ['clasificacion'], cargar_archivo)
+"""
+import hashlib
+import json
+import time
+
+from etapas import contar_filas, etapa
+import snapshots
+from snapshots import guardar_etapa, hash_vigente, leer_etapa, leer_manifiesto_etapa
+
+# Incrementar si cambia el cálculo de las huellas
+VERSION_HUELLAS = 1
+
+COLUMNAS_INFORME = ['etapa', 'estado', 'motivo', 'segundos']
+
+
+def huella_etapa(nombre, version, dependencias):
+    """
+    Calcula la huella de una etapa
+
+    Args:
+        nombre: Nombre de la etapa
+        version: Versión del cálculo de la etapa
+        dependencias: Diccionario con el hash de cada archivo y la huella de cada etapa previa
+
+    Returns:
+        Hash hexadecimal
+    """
+    contenido = json.dumps([VERSION_HUELLAS, nombre, str(version), dependencias], sort_keys=True)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def _describir_cambios(manifiesto, dependencias, version_cambiada):
+    """Motivo del recálculo de una etapa según su manifiesto anterior"""
+    if manifiesto is None:
+        return 'sin resultado previo'
+    anteriores = manifiesto.get('dependencias', {})
+    cambios = [f"cambió {dependencia}" for dependencia, huella in dependencias.items()
+               if anteriores.get(dependencia) != huella]
+    if version_cambiada or not cambios:
+        cambios.append('cambió la versión de la etapa')
+    return ', '.join(cambios)
+
+
+def ejecutar_etapas(etapas, objetivos, cargar_archivo, archivos=None):
+    """
+    Resuelve las etapas pedidas reutilizando los resultados guardados vigentes
+
+    Args:
+        etapas: Diccionario nombre -> declaración, en orden de dependencias. Cada
+            declaración tiene 'archivos' (entradas), 'etapas' (etapas previas), 'calcular'
+            (función (archivos, etapas) -> resultado, que recibe diccionarios con las
+            entradas cargadas y los resultados de las etapas previas) y opcionalmente
+            'version' y 'persistir' (por defecto True)
+        objetivos: Nombres de las etapas cuyo resultado se necesita
+        cargar_archivo: Función archivo -> DataFrame con la que se cargan las entradas
+        archivos: Diccionario donde se guardan las entradas cargadas (para reutilizarlas
+            fuera de las etapas); por defecto uno nuevo
+
+    Returns:
+        Tupla (resultados, informe): resultados es un diccionario con el resultado de cada
+        objetivo; informe, una lista con una fila por etapa (COLUMNAS_INFORME) con estado
+        'reutilizada', 'recalculada' o 'no requerida' (vigente y no necesaria)
+    """
+    archivos = archivos if archivos is not None else {}
+    hashes, huellas, dependencias, manifiestos = {}, {}, {}, {}
+    for nombre, declaracion in etapas.items():
+        for archivo in declaracion['archivos']:
+            if archivo not in hashes:
+                # Sin snapshots no hay resultados guardados con los que comparar: no se hashea
+                hashes[archivo] = hash_vigente(archivo) if snapshots.SNAPSHOTS_HABILITADOS else None
+        dependencias[nombre] = {
+            **{archivo: hashes[archivo] for archivo in declaracion['archivos']},
+            **{f"etapa {previa}": huellas[previa] for previa in declaracion['etapas']},
+        }
+        huellas[nombre] = huella_etapa(nombre, declaracion.get('version', 1), dependencias[nombre])
+        manifiestos[nombre] = leer_manifiesto_etapa(nombre)
+
+    resultados, informe = {}, {}
+
+    def entrada(archivo):
+        if archivo not in archivos:
+            archivos[archivo] = cargar_archivo(archivo)
+        return archivos[archivo]
+
+    def resolver(nombre):
+        if nombre in resultados:
+            return resultados[nombre]
+        declaracion = etapas[nombre]
+        manifiesto = manifiestos[nombre]
+        vigente = manifiesto is not None and manifiesto['huella'] == huellas[nombre]
+
+        inicio = time.perf_counter()
+        resultado = None
+        if vigente:
+            with etapa(f'reutilizar:{nombre}') as medida:
+                resultado = leer_etapa(nombre, huellas[nombre])
+                medida['filas_salida'] = contar_filas(resultado)
+        if resultado is not None:
+            informe[nombre] = {'estado': 'reutilizada', 'motivo': 'sin cambios'}
+        else:
+            if vigente:
+                motivo = 'resultado no guardado' if manifiesto['partes'] is None else 'resultado ilegible'
+            else:
+                version_anterior = huella_etapa(nombre, declaracion.get('version', 1),
+                                                (manifiesto or {}).get('dependencias'))
+                motivo = _describir_cambios(manifiesto, dependencias[nombre],
+                                            manifiesto is not None and version_anterior != manifiesto['huella'])
+            # Las etapas previas y las entradas se resuelven antes de medir esta etapa
+            previas = {previa: resolver(previa) for previa in declaracion['etapas']}
+            entradas = {archivo: entrada(archivo) for archivo in declaracion['archivos']}
+            inicio = time.perf_counter()
+            with etapa(nombre, filas_entrada=contar_filas([*entradas.values(), *previas.values()])) as medida:
+                resultado = declaracion['calcular'](entradas, previas)
+                medida['filas_salida'] = contar_filas(resultado)
+            guardar_etapa(nombre, huellas[nombre], resultado, dependencias[nombre],
+                          persistir=declaracion.get('persistir', True))
+            informe[nombre] = {'estado': 'recalculada', 'motivo': motivo}
+        informe[nombre]['segundos'] = time.perf_counter() - inicio
+        resultados[nombre] = resultado
+        return resultado
+
+    for objetivo in objetivos:
+        resolver(objetivo)
+
+    filas = []
+    for nombre in etapas:
+        if nombre not in informe:
+            vigente = manifiestos[nombre] is not None and manifiestos[nombre]['huella'] == huellas[nombre]
+            informe[nombre] = {'estado': 'no requerida', 'segundos': 0.0,
+                               'motivo': 'sin cambios' if vigente else 'ninguna etapa pedida la usa'}
+        filas.append({'etapa': nombre, **informe[nombre]})
+    return {objetivo: resultados[objetivo] for objetivo in objetivos}, filas
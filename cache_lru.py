@@ -0,0 +1,161 @@
+"""
+Caché LRU en memoria con presupuesto en bytes.
+
+Guarda resultados ya calculados por clave (por ejemplo, los resultados de la página para
+un POS y una versión de los datos) y, cuando la suma de los tamaños supera el
+presupuesto, descarta los usados hace más tiempo. El tamaño de cada entrada se estima al
+guardarla (tamano_bytes): memoria de los DataFrames, Series y arrays que contiene, más
+el de los demás objetos.
+
+La caché es de un proceso y se comparte entre los hilos que la usan (las sesiones de
+Streamlit); las operaciones sobre ella toman su lock, pero el cálculo de una entrada que
+falta corre fuera del lock: dos sesiones que piden la misma clave a la vez pueden
+calcularla las dos, y queda la última.
+
+Uso:
+    cache = crear_cache(256 * 1024 ** 2)
+    valor = obtener_o_calcular(cache, (pos_id, version), lambda: calcular(pos_id))
+    estadisticas_cache(cache)   # {'aciertos': ..., 'fallos': ..., 'bytes_desalojados': ...}
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def _tamano_valores(valores):
+    """
+    Memoria de los valores de una Serie (sin su índice) o de un índice
+
+    memory_usage(deep=True) mide los objetos de una columna object con una vista escribible
+    de su array, que falla con los arrays de solo lectura de los datos compartidos
+    (app.congelar): en esas columnas los objetos se miden de a uno.
+    """
+    es_objeto = valores.dtype == object
+    if isinstance(valores, pd.Series):
+        tamano = valores.memory_usage(index=False, deep=not es_objeto)
+    else:
+        tamano = valores.memory_usage(deep=not es_objeto)
+    if es_objeto:
+        tamano += sum(sys.getsizeof(valor) for valor in valores.to_numpy())
+    return int(tamano)
+
+
+def tamano_bytes(objeto):
+    """
+    Estima la memoria que ocupa un objeto
+
+    Args:
+        objeto: DataFrame, Serie, array, figura de Plotly (to_plotly_json), o
+            diccionario/lista/tupla que los contiene
+
+    Returns:
+        Tamaño estimado en bytes
+    """
+    if isinstance(objeto, pd.DataFrame):
+        return _tamano_valores(objeto.index) + sum(_tamano_valores(objeto.iloc[:, i]) for i in range(objeto.shape[1]))
+    if isinstance(objeto, pd.Series):
+        return _tamano_valores(objeto.index) + _tamano_valores(objeto)
+    if isinstance(objeto, pd.Index):
+        return _tamano_valores(objeto)
+    if isinstance(objeto, np.ndarray):
+        return objeto.nbytes
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(tamano_bytes(clave) + tamano_bytes(valor) for clave, valor in objeto.items())
+    if isinstance(objeto, (list, tuple)):
+        return sys.getsizeof(objeto) + sum(tamano_bytes(elemento) for elemento in objeto)
+    if hasattr(objeto, 'to_plotly_json'):
+        return tamano_bytes(objeto.to_plotly_json())
+    return sys.getsizeof(objeto)
+
+
+def crear_cache(presupuesto_bytes):
+    """
+    Crea una caché LRU vacía
+
+    Args:
+        presupuesto_bytes: Tamaño máximo de la suma de las entradas; con 0 no se guarda nada
+
+    Returns:
+        Diccionario con las entradas, el presupuesto, los contadores y el lock
+    """
+    return {
+        'entradas': OrderedDict(),
+        'presupuesto': presupuesto_bytes,
+        'bytes': 0,
+        'aciertos': 0,
+        'fallos': 0,
+        'desalojos': 0,
+        'bytes_desalojados': 0,
+        'lock': threading.Lock(),
+    }
+
+
+def obtener_o_calcular(cache, clave, calcular):
+    """
+    Devuelve el valor de una clave, calculándolo y guardándolo si no está
+
+    Un acierto marca la entrada como la usada más recientemente. Al guardar se desalojan
+    las entradas usadas hace más tiempo hasta que el total entra en el presupuesto; un
+    valor más grande que todo el presupuesto no se guarda.
+
+    Args:
+        cache: Caché de crear_cache
+        clave: Clave hashable
+        calcular: Función sin argumentos que calcula el valor
+
+    Returns:
+        Tupla (valor, acierto)
+    """
+    with cache['lock']:
+        entrada = cache['entradas'].get(clave)
+        if entrada is not None:
+            cache['entradas'].move_to_end(clave)
+            cache['aciertos'] += 1
+            return entrada[0], True
+        cache['fallos'] += 1
+
+    valor = calcular()
+    tamano = tamano_bytes(valor)
+
+    with cache['lock']:
+        anterior = cache['entradas'].pop(clave, None)
+        if anterior is not None:
+            cache['bytes'] -= anterior[1]
+        if tamano > cache['presupuesto']:
+            return valor, False
+        while cache['entradas'] and cache['bytes'] + tamano > cache['presupuesto']:
+            _, (_, tamano_desalojado) = cache['entradas'].popitem(last=False)
+            cache['bytes'] -= tamano_desalojado
+            cache['desalojos'] += 1
+            cache['bytes_desalojados'] += tamano_desalojado
+        cache['entradas'][clave] = (valor, tamano)
+        cache['bytes'] += tamano
+    return valor, False
+
+
+def estadisticas_cache(cache):
+    """
+    Contadores de uso de la caché
+
+    Args:
+        cache: Caché de crear_cache
+
+    Returns:
+        Diccionario con entradas, bytes, presupuesto, aciertos, fallos, tasa_aciertos
+        (entre 0 y 1, None sin consultas), desalojos y bytes_desalojados
+    """
+    with cache['lock']:
+        consultas = cache['aciertos'] + cache['fallos']
+        return {
+            'entradas': len(cache['entradas']),
+            'bytes': cache['bytes'],
+            'presupuesto': cache['presupuesto'],
+            'aciertos': cache['aciertos'],
+            'fallos': cache['fallos'],
+            'tasa_aciertos': cache['aciertos'] / consultas if consultas else None,
+            'desalojos': cache['desalojos'],
+            'bytes_desalojados': cache['bytes_desalojados'],
+        }
@@ -0,0 +1,179 @@
+"""
+Registro de esquemas de los CSV de entrada.
+
+Para cada archivo se declaran las columnas que la app realmente usa (el resto no se lee)
+y un dtype compacto para cada una:
+  - IDs como int32 (super_catalog_id queda en int64: los códigos de barras superan 2^31)
+  - textos y códigos de baja cardinalidad (zona, país, status) como category
+  - float32 solo donde no se pierde precisión (unidades pedidas, que son enteras); los
+    precios, porcentajes y montos quedan en float64 para no alterar los totales
+
+leer_csv_con_esquema aplica la proyección al parsear y los dtypes antes de la
+normalización de cada archivo, y pasa por los snapshots Parquet (snapshots.py), que
+conservan los dtypes.
+"""
+import pandas as pd
+
+from snapshots import leer_csv_con_snapshot
+
+# Incrementar al cambiar ESQUEMAS: invalida los snapshots construidos con el esquema anterior
+VERSION_ESQUEMAS = 2
+
+ESQUEMAS = {
+    'pos_address.csv': {
+        # geo_zone se recalcula a partir de la dirección (normalizar_pos_address)
+        'point_of_sale_id': 'int32',
+        'address': 'object',
+    },
+    'orders_delivered_pos_vendor_geozone.csv': {
+        # geo_zone se obtiene de pos_address, no del archivo de pedidos
+        'point_of_sale_id': 'int32',
+        'super_catalog_id': 'int64',
+        'order_id': 'int32',
+        'order_date': 'object',
+        'vendor_id': 'int32',
+        'unidades_pedidas': 'float32',
+        'precio_minimo': 'float64',
+        'valor_vendedor': 'float64',
+        'country': 'category',
+    },
+    'vendors_catalog.csv': {
+        'vendor_id': 'int32',
+        'super_catalog_id': 'int64',
+        'name': 'category',
+        'base_price': 'float64',
+        'percentage': 'float64',
+    },
+    'vendor_pos_relations.csv': {
+        'point_of_sale_id': 'int32',
+        'vendor_id': 'int32',
+        'status': 'category',
+    },
+    'top_5_productos_geozona.csv': {
+        # Columnas usadas por create_simple_summary
+        'point_of_sale_id': 'int32',
+        'vendor_id': 'int32',
+        'status': 'category',
+        'valor_total_vendedor': 'float64',
+    },
+    'vendors_dm.csv': {
+        # Algunos exportes traen client_id en lugar de vendor_id (ver load_vendors_dm).
+        # name queda como object: hay un nombre por vendor y category ocuparía más
+        'vendor_id': 'int32',
+        'client_id': 'int32',
+        'name': 'object',
+        'drug_manufacturer_id': 'int32',
+    },
+    'minimum_purchase.csv': {
+        # id, costos de envío y fechas de alta/modificación no se usan; deleted_at marca
+        # las filas dadas de baja (construir_indice_min_purchase las omite)
+        'vendor_id': 'int32',
+        'name': 'category',
+        'min_purchase': 'float64',
+        'deleted_at': 'object',
+    },
+}
+
+
+def aplicar_esquema(df, esquema):
+    """
+    Convierte las columnas de un DataFrame a los dtypes del esquema
+
+    Las columnas enteras con valores nulos o no numéricos se dejan como están (no hay
+    int32 con nulos sin pasar a un dtype nullable, que el resto de la app no espera).
+
+    Args:
+        df: DataFrame parseado
+        esquema: Diccionario {columna: dtype}
+
+    Returns:
+        DataFrame con los dtypes del esquema
+    """
+    conversiones = {}
+    for columna, dtype in esquema.items():
+        if columna not in df.columns or df[columna].dtype == dtype:
+            continue
+        if dtype.startswith('int') and (df[columna].dtype.kind not in 'iu' or df[columna].isna().any()):
+            continue
+        conversiones[columna] = dtype
+    return df.astype(conversiones) if conversiones else df
+
+
+def ajustar_a_esquema(df, archivo):
+    """
+    Proyecta un DataFrame a las columnas del esquema de un archivo y aplica sus dtypes
+
+    Sirve para datos del mismo archivo que no se leen con leer_csv_con_esquema (por
+    ejemplo, pedidos nuevos recibidos en memoria).
+
+    Args:
+        df: DataFrame con las columnas del archivo
+        archivo: Nombre del archivo en ESQUEMAS
+
+    Returns:
+        DataFrame proyectado y con los dtypes del esquema
+    """
+    esquema = ESQUEMAS[archivo]
+    return aplicar_esquema(df[[columna for columna in df.columns if columna in esquema]], esquema)
+
+
+def leer_csv_con_esquema(ruta, normalizar=None, version='1'):
+    """
+    Lee un CSV de entrada con la proyección de columnas y los dtypes del registro
+
+    Args:
+        ruta: Ruta del archivo CSV (el esquema se busca por el nombre del archivo)
+        normalizar: Función opcional DataFrame -> DataFrame aplicada tras el esquema
+        version: Versión de la normalización (ver leer_csv_con_snapshot)
+
+    Returns:
+        DataFrame con las columnas del esquema presentes en el archivo
+    """
+    esquema = ESQUEMAS.get(ruta.replace('\\', '/').rsplit('/', 1)[-1])
+    if esquema is None:
+        return leer_csv_con_snapshot(ruta, normalizar=normalizar, version=version)
+
+    # La proyección se calcula con el encabezado para tolerar columnas opcionales
+    # (por ejemplo client_id / vendor_id) sin que read_csv falle
+    encabezado = pd.read_csv(ruta, nrows=0).columns
+    usecols = [columna for columna in encabezado if columna in esquema]
+
+    def normalizar_con_esquema(df):
+        df = aplicar_esquema(df, esquema)
+        return normalizar(df) if normalizar is not None else df
+
+    return leer_csv_con_snapshot(
+        ruta, normalizar=normalizar_con_esquema,
+        version=f"{version}:esquema{VERSION_ESQUEMAS}", usecols=usecols
+    )
+
+
+def reporte_memoria(antes, despues):
+    """
+    Compara el uso de memoria (memory_usage(deep=True)) de cada DataFrame
+
+    Args:
+        antes: Diccionario {nombre: DataFrame} con la carga sin esquema
+        despues: Diccionario {nombre: DataFrame} con la carga con esquema
+
+    Returns:
+        DataFrame con filas, columnas y MB antes/después por frame, más una fila de total
+    """
+    filas = []
+    for nombre, df_antes in antes.items():
+        df_despues = despues[nombre]
+        filas.append({
+            'frame': nombre,
+            'filas': len(df_despues),
+            'columnas_antes': df_antes.shape[1],
+            'columnas_despues': df_despues.shape[1],
+            'mb_antes': df_antes.memory_usage(deep=True).sum() / 2**20,
+            'mb_despues': df_despues.memory_usage(deep=True).sum() / 2**20,
+        })
+    reporte = pd.DataFrame(filas)
+    total = {'frame': 'TOTAL', 'filas': reporte['filas'].sum(),
+             'columnas_antes': reporte['columnas_antes'].sum(), 'columnas_despues': reporte['columnas_despues'].sum(),
+             'mb_antes': reporte['mb_antes'].sum(), 'mb_despues': reporte['mb_despues'].sum()}
+    reporte = pd.concat([reporte, pd.DataFrame([total])], ignore_index=True)
+    reporte['ahorro_%'] = (1 - reporte['mb_despues'] / reporte['mb_antes']) * 100
+    return reporte
@@ -0,0 +1,225 @@
+"""
+Instrumentación por etapas de la carga de datos.
+
+Cada etapa con nombre (lectura de un CSV, índice de precios, búsqueda de ofertas, cruce
+vendor-POS, clasificación, estadísticas de pedidos...) se envuelve en el context manager
+etapa(); al salir se registra:
+  - tiempo de pared (perf_counter) y de CPU (process_time)
+  - filas de entrada y de salida
+  - pico de memoria (RSS) durante la etapa
+
+El pico de memoria se mide con el high-water mark del proceso (VmHWM en
+/proc/self/status), que se reinicia al entrar en cada etapa escribiendo en
+/proc/self/clear_refs; las etapas anidadas propagan su pico a la etapa que las contiene.
+Fuera de Linux el pico queda en None.
+
+El registro activo y la pila de etapas abiertas son de cada hilo: la recarga en segundo
+plano (recarga.py) y las sesiones pueden medir etapas a la vez sin mezclar sus registros.
+El high-water mark, en cambio, es del proceso: si se superponen etapas de distintos
+hilos no se reinicia y el pico de todas ellas queda en None.
+
+Con la instrumentación desactivada (PHARMA_INSTRUMENTACION=0) etapa() solo devuelve un
+diccionario vacío, sin leer relojes ni /proc.
+
+Uso:
+    with registrar_carga() as registro:
+        with etapa('clasificacion', filas_entrada=len(df)) as medida:
+            df_clasificado = clasificar(df)
+            medida['filas_salida'] = len(df_clasificado)
+    guardar_registro(registro)
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# Permite desactivar la instrumentación (por ejemplo para medir su costo)
+INSTRUMENTACION_HABILITADA = os.environ.get('PHARMA_INSTRUMENTACION', '1') != '0'
+
+# Archivo JSON Lines donde se agrega una línea por carga medida
+ARCHIVO_REGISTRO = os.environ.get('PHARMA_ETAPAS_ARCHIVO', 'diagnostico_etapas.jsonl')
+
+COLUMNAS_REGISTRO = ['etapa', 'nivel', 'segundos', 'cpu_segundos', 'filas_entrada', 'filas_salida',
+                     'pico_memoria_mb']
+
+# Registro activo (lista de etapas terminadas) y pila de etapas abiertas de cada hilo
+_LOCAL = threading.local()
+
+# Etapas abiertas en todos los hilos (id -> medida), para detectar superposiciones
+_ABIERTAS = {}
+_LOCK_ABIERTAS = threading.Lock()
+
+
+def _registro_activo():
+    return getattr(_LOCAL, 'registro', None)
+
+
+def _pila():
+    if not hasattr(_LOCAL, 'pila'):
+        _LOCAL.pila = []
+    return _LOCAL.pila
+
+
+def _pico_rss_mb():
+    """High-water mark de RSS del proceso en MB, o None si no está disponible"""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmHWM:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reiniciar_pico_rss():
+    """Reinicia el high-water mark de RSS (Linux); devuelve False si no se pudo"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def contar_filas(objeto):
+    """
+    Cuenta las filas de un resultado de etapa
+
+    Args:
+        objeto: DataFrame, Serie, o tupla/lista/diccionario de ellos
+
+    Returns:
+        Número de filas (suma de los DataFrames y Series que contiene), o None si no hay
+    """
+    if isinstance(objeto, (pd.DataFrame, pd.Series)):
+        return len(objeto)
+    if isinstance(objeto, dict):
+        objeto = list(objeto.values())
+    if isinstance(objeto, (tuple, list)):
+        conteos = [contar_filas(elemento) for elemento in objeto]
+        conteos = [conteo for conteo in conteos if conteo is not None]
+        return sum(conteos) if conteos else None
+    return None
+
+
+@contextmanager
+def etapa(nombre, filas_entrada=None):
+    """
+    Mide una etapa con nombre y la agrega al registro activo
+
+    Si no hay un registro activo (registrar_carga) o la instrumentación está
+    desactivada, no se mide nada.
+
+    Args:
+        nombre: Nombre de la etapa; las etapas anidadas se registran como 'padre/hija'
+        filas_entrada: Filas de entrada de la etapa (opcional)
+
+    Yields:
+        Diccionario de la medida; se puede completar con 'filas_salida' (o 'filas_entrada')
+        dentro del bloque
+    """
+    # La etapa se agrega al registro con el que empezó, aunque el bloque de
+    # registrar_carga termine antes
+    registro = _registro_activo()
+    if registro is None or not INSTRUMENTACION_HABILITADA:
+        yield {}
+        return
+
+    pila = _pila()
+    medida = {'etapa': f"{pila[-1]['etapa']}/{nombre}" if pila else nombre, 'nivel': len(pila),
+              'filas_entrada': filas_entrada, 'filas_salida': None}
+    # El pico de la etapa contenedora hasta este punto se conserva antes de reiniciarlo
+    if pila:
+        pila[-1]['_pico_hijas'] = max(pila[-1]['_pico_hijas'], _pico_rss_mb() or 0)
+    medida['_pico_hijas'] = 0
+    medida['_hilo'] = threading.get_ident()
+    with _LOCK_ABIERTAS:
+        # Con etapas abiertas en otros hilos el high-water mark del proceso no sirve para
+        # ninguna de las dos: no se reinicia y ambas quedan sin pico
+        otras = [abierta for abierta in _ABIERTAS.values() if abierta['_hilo'] != medida['_hilo']]
+        for abierta in otras:
+            abierta['_pico_valido'] = False
+        medida['_pico_valido'] = not otras and _reiniciar_pico_rss()
+        _ABIERTAS[id(medida)] = medida
+    pila.append(medida)
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    medida['inicio'] = inicio
+    try:
+        yield medida
+    finally:
+        medida['segundos'] = time.perf_counter() - inicio
+        medida['cpu_segundos'] = time.process_time() - inicio_cpu
+        pila.pop()
+        with _LOCK_ABIERTAS:
+            del _ABIERTAS[id(medida)]
+        del medida['_hilo']
+        pico = max(_pico_rss_mb() or 0, medida.pop('_pico_hijas'))
+        medida['pico_memoria_mb'] = pico if medida.pop('_pico_valido') else None
+        if pila:
+            pila[-1]['_pico_hijas'] = max(pila[-1]['_pico_hijas'], pico)
+            if medida['pico_memoria_mb'] is None:
+                pila[-1]['_pico_valido'] = False
+        registro.append(medida)
+
+
+@contextmanager
+def registrar_carga():
+    """
+    Activa el registro de etapas del hilo actual durante el bloque
+
+    Yields:
+        Lista donde se agregan las etapas terminadas (en orden de finalización)
+    """
+    anterior = _registro_activo()
+    registro = _LOCAL.registro = []
+    try:
+        yield registro
+    finally:
+        _LOCAL.registro = anterior
+
+
+def tabla_registro(registro):
+    """
+    Convierte un registro de etapas en un DataFrame ordenado por inicio de etapa
+
+    Args:
+        registro: Lista de registrar_carga
+
+    Returns:
+        DataFrame con COLUMNAS_REGISTRO (las etapas contenedoras antes que sus hijas)
+    """
+    if not registro:
+        return pd.DataFrame(columns=COLUMNAS_REGISTRO)
+    # Las etapas se registran al terminar: se ordenan por el momento en que empezaron
+    return pd.DataFrame(registro).sort_values('inicio', kind='stable').reset_index(drop=True)[COLUMNAS_REGISTRO]
+
+
+def guardar_registro(registro, ruta=None, **contexto):
+    """
+    Agrega el registro de una carga al archivo JSON Lines de seguimiento
+
+    Args:
+        registro: Lista de registrar_carga (si está vacía no se escribe nada)
+        ruta: Archivo de destino (por defecto ARCHIVO_REGISTRO)
+        **contexto: Campos adicionales de la línea (por ejemplo la escala o el origen)
+
+    Returns:
+        True si se escribió la línea
+    """
+    if not registro:
+        return False
+    linea = {'fecha': datetime.now().isoformat(timespec='seconds'), **contexto,
+             'etapas': tabla_registro(registro).astype(object).where(lambda df: df.notna(), None)
+             .to_dict(orient='records')}
+    try:
+        with open(ruta or ARCHIVO_REGISTRO, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(linea, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"No se pudo guardar el registro de etapas: {e}")
+        return False
+    return True
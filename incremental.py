@@ -0,0 +1,195 @@
+"""
+Ingesta incremental de pedidos.
+
+load_and_process_data recalcula todo (cruces con el catálogo, clasificación y agregados)
+cada vez que cambia algo. Este módulo mantiene un estado con los resultados ya calculados
+y, al recibir solo los pedidos nuevos, recalcula únicamente:
+  - las filas enriquecidas y clasificadas (y min_prices) de las órdenes afectadas, y
+  - pos_order_stats y pos_vendor_totals de los POS afectados.
+
+El resultado es idéntico al de un recálculo completo sobre los pedidos anteriores más los
+nuevos agregados al final (mismo contenido, mismo orden de filas).
+
+Uso:
+    estado = construir_estado()
+    nuevos = filtrar_pedidos_nuevos(df_pedidos_del_dia, estado, columna='order_date')
+    estado = ingerir_pedidos(estado, nuevos)
+    pos_vendor_totals, df_original, ... = resultado(estado)
+"""
+import numpy as np
+import pandas as pd
+
+from app import (ARCHIVO_PEDIDOS, calcular_estadisticas_pedidos, calcular_pos_geo_zones, cargar_entradas,
+                 clasificar_pedidos, construir_indice_precios, enriquecer_pedidos, normalizar_pedidos)
+from esquemas import ESQUEMAS, aplicar_esquema, ajustar_a_esquema
+
+# Columna auxiliar con la fila del pedido de origen de cada fila enriquecida
+_FILA = '_fila_pedido'
+
+
+def _concatenar(partes):
+    # Evita concatenar frames vacíos, que alteran los dtypes del resultado
+    partes = [p for p in partes if not p.empty] or partes[:1]
+    return pd.concat(partes, ignore_index=True)
+
+
+def _enriquecer_y_clasificar(df_pedidos, filas, estado):
+    """Enriquece y clasifica un subconjunto de pedidos, conservando su fila de origen"""
+    df_sub = df_pedidos.iloc[filas].assign(**{_FILA: filas})
+    df_pedidos_proveedores = enriquecer_pedidos(
+        df_sub, estado['pos_geo_zones'], estado['catalogo'], estado['df_vendors_pos']
+    )
+    min_prices, df_clasificado = clasificar_pedidos(df_pedidos_proveedores)
+    df_clasificado = df_clasificado.copy()
+    fila = df_clasificado.pop(_FILA).to_numpy()
+    # Las filas regionales van antes que las nacionales, como en enriquecer_pedidos
+    bloque = (df_clasificado['name'] == 'México').to_numpy().astype(np.int8)
+    return min_prices, df_clasificado, fila, bloque
+
+
+def construir_estado(entradas=None):
+    """
+    Construye el estado incremental con un cálculo completo
+
+    Args:
+        entradas: Diccionario de cargar_entradas(); si es None se cargan los archivos
+
+    Returns:
+        Diccionario con las entradas estáticas, los pedidos y los resultados calculados
+    """
+    entradas = entradas if entradas is not None else cargar_entradas()
+    df_pedidos = entradas['df_pedidos'].reset_index(drop=True)
+
+    estado = {
+        'pos_geo_zones': calcular_pos_geo_zones(entradas['df_pos_address']),
+        'catalogo': construir_indice_precios(entradas['df_proveedores']),
+        'df_vendors_pos': entradas['df_vendors_pos'],
+        'df_min_purchase': entradas['df_min_purchase'],
+        'df_vendor_dm': entradas['df_vendor_dm'],
+        'df_pedidos': df_pedidos,
+    }
+    min_prices, df_clasificado, fila, bloque = _enriquecer_y_clasificar(
+        df_pedidos, np.arange(len(df_pedidos)), estado
+    )
+    pos_order_stats, pos_vendor_totals = calcular_estadisticas_pedidos(df_pedidos)
+
+    estado.update({
+        'min_prices': min_prices,
+        'df_clasificado': df_clasificado,
+        'fila_pedido': fila,
+        'bloque': bloque,
+        'pos_order_stats': pos_order_stats,
+        'pos_vendor_totals': pos_vendor_totals,
+    })
+    return estado
+
+
+def resultado(estado):
+    """
+    Devuelve los siete DataFrames en el mismo orden que load_and_process_data
+
+    Args:
+        estado: Estado incremental
+
+    Returns:
+        Tupla (pos_vendor_totals, df_original, pos_order_stats, df_min_purchase,
+        df_vendor_dm, pos_geo_zones, df_clasificado)
+    """
+    return (estado['pos_vendor_totals'], estado['df_pedidos'], estado['pos_order_stats'],
+            estado['df_min_purchase'], estado['df_vendor_dm'], estado['pos_geo_zones'],
+            estado['df_clasificado'])
+
+
+def filtrar_pedidos_nuevos(df_pedidos, estado, columna='order_id'):
+    """
+    Filtra los pedidos posteriores a la marca de agua del estado
+
+    Args:
+        df_pedidos: DataFrame de pedidos (por ejemplo, el archivo completo o el del día)
+        estado: Estado incremental
+        columna: 'order_id' u 'order_date'; se toman las filas con valor mayor al máximo ya ingerido
+
+    Returns:
+        DataFrame con los pedidos nuevos
+    """
+    ingeridos = estado['df_pedidos']
+    if ingeridos.empty:
+        return df_pedidos
+    if columna == 'order_date':
+        marca = pd.to_datetime(ingeridos[columna]).max()
+        return df_pedidos[pd.to_datetime(df_pedidos[columna]) > marca]
+    return df_pedidos[df_pedidos[columna] > ingeridos[columna].max()]
+
+
+def ingerir_pedidos(estado, df_nuevos):
+    """
+    Incorpora pedidos nuevos al estado recalculando solo lo afectado
+
+    Se recalculan las filas enriquecidas y clasificadas de las órdenes que aparecen en los
+    pedidos nuevos (incluidas las líneas que ya existían de esas órdenes, porque la
+    clasificación compara todas las ofertas de una orden) y los agregados de sus POS.
+
+    Args:
+        estado: Estado incremental (no se modifica)
+        df_nuevos: DataFrame con las filas nuevas del archivo de pedidos
+
+    Returns:
+        Nuevo estado incremental
+    """
+    df_nuevos = normalizar_pedidos(ajustar_a_esquema(df_nuevos, ARCHIVO_PEDIDOS).copy())
+    if df_nuevos.empty:
+        return estado
+
+    estado = dict(estado)
+    # Se reaplica el esquema por si la concatenación convirtió alguna category en object
+    # (valores nuevos en una columna categórica)
+    df_pedidos = aplicar_esquema(pd.concat([estado['df_pedidos'], df_nuevos], ignore_index=True),
+                                 ESQUEMAS[ARCHIVO_PEDIDOS])
+    estado['df_pedidos'] = df_pedidos
+
+    # Filas enriquecidas y clasificadas de las órdenes afectadas
+    ordenes_afectadas = df_nuevos['order_id'].unique()
+    filas = np.flatnonzero(df_pedidos['order_id'].isin(ordenes_afectadas).to_numpy())
+    min_sub, clasificado_sub, fila_sub, bloque_sub = _enriquecer_y_clasificar(df_pedidos, filas, estado)
+
+    # Orden de un recálculo completo: bloque (regional/nacional) y fila del pedido; el
+    # orden relativo entre ofertas de una misma fila se conserva porque lexsort es estable.
+    # Se concatena una vez y se reordena con un único take para no copiar varias veces el
+    # DataFrame clasificado completo
+    df_clasificado = _concatenar([estado['df_clasificado'], clasificado_sub])
+    fila = np.concatenate([estado['fila_pedido'], fila_sub])
+    bloque = np.concatenate([estado['bloque'], bloque_sub])
+    conservar = np.concatenate([
+        ~estado['df_clasificado']['order_id'].isin(ordenes_afectadas).to_numpy(),
+        np.ones(len(fila_sub), dtype=bool)
+    ])
+    validas = np.flatnonzero(conservar)
+    orden = validas[np.lexsort((fila[validas], bloque[validas]))]
+    df_clasificado = df_clasificado.take(orden)
+    df_clasificado.index = pd.RangeIndex(len(df_clasificado))
+    estado['df_clasificado'] = df_clasificado
+    estado['fila_pedido'] = fila[orden]
+    estado['bloque'] = bloque[orden]
+
+    min_prices = estado['min_prices']
+    min_prices = _concatenar([min_prices[~min_prices['order_id'].isin(ordenes_afectadas)], min_sub])
+    estado['min_prices'] = (min_prices
+                            .sort_values(['point_of_sale_id', 'order_id', 'super_catalog_id'], kind='stable')
+                            .reset_index(drop=True))
+
+    # Agregados de los POS afectados (el promedio por orden necesita todas sus órdenes)
+    pos_afectados = df_nuevos['point_of_sale_id'].unique()
+    stats_sub, totales_sub = calcular_estadisticas_pedidos(
+        df_pedidos[df_pedidos['point_of_sale_id'].isin(pos_afectados)]
+    )
+    stats, totales = estado['pos_order_stats'], estado['pos_vendor_totals']
+    estado['pos_order_stats'] = (
+        _concatenar([stats[~stats['point_of_sale_id'].isin(pos_afectados)], stats_sub])
+        .sort_values('point_of_sale_id', kind='stable').reset_index(drop=True)
+    )
+    estado['pos_vendor_totals'] = (
+        _concatenar([totales[~totales['point_of_sale_id'].isin(pos_afectados)], totales_sub])
+        .sort_values(['point_of_sale_id', 'vendor_id'], kind='stable').reset_index(drop=True)
+    )
+
+    return estado
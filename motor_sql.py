@@ -0,0 +1,144 @@
+"""
+Backend SQL embebido (DuckDB) para los cruces de pedidos con zonas y catálogo.
+
+La parte relacional de la carga (cruce de los pedidos con la zona de cada POS y con las
+ofertas regionales y nacionales del catálogo, precio mínimo por POS, orden y producto, y
+la clasificación de cada oferta) se resuelve en DuckDB, en el mismo proceso y con todos
+los núcleos. DuckDB lee los DataFrames ya cargados sin copiarlos y devuelve un plan con
+una fila por pedido y oferta: la fila de pedido, la fila de zona y la fila de catálogo
+de cada oferta, más precio_minimo_orders y clasificacion. Las columnas del resultado se
+toman de los DataFrames originales con ese plan (app.clasificar_pedidos_sql), así que
+los dtypes, el orden de filas y los valores coinciden exactamente con los de
+enriquecer_pedidos + clasificar_pedidos.
+
+Los nulos se pasan a DuckDB como NULL (tipos nullable de pandas): un NaN de float se
+compararía como mayor que cualquier número, no como desconocido.
+
+DuckDB es opcional: sin el paquete, DUCKDB_DISPONIBLE es False y la carga usa pandas.
+
+Uso:
+    plan = plan_clasificacion(df_pedidos, pos_geo_zones, catalogo)
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+DUCKDB_DISPONIBLE = duckdb is not None
+
+# Hilos de DuckDB (por defecto, todos los núcleos)
+HILOS = int(os.environ.get('PHARMA_DUCKDB_HILOS', '0')) or None
+
+COLUMNAS_PLAN = ['fila_pedido', 'fila_zona', 'fila_catalogo', 'precio_minimo_orders', 'clasificacion']
+
+# Mismo orden de filas que buscar_ofertas: primero las ofertas regionales y después las
+# nacionales; dentro de cada bloque, en el orden de los pedidos (y de las zonas de su POS,
+# como el merge left de enriquecer_pedidos) y luego del catálogo. Las reglas de
+# clasificación son las de agregar_columna_clasificacion y el precio mínimo por POS,
+# orden y producto el de clasificar_pedidos.
+CONSULTA_CLASIFICACION = """
+WITH pedidos_zonas AS (
+    SELECT p._fila AS fila_pedido, z._fila AS fila_zona, p.point_of_sale_id, p.order_id,
+           p.super_catalog_id, p.precio_minimo, z.geo_zone
+    FROM pedidos p
+    LEFT JOIN zonas z ON p.point_of_sale_id IS NOT DISTINCT FROM z.point_of_sale_id
+    WHERE p.unidades_pedidas > 0
+),
+ofertas AS (
+    SELECT 0 AS bloque, pz.*, c._fila AS fila_catalogo, c.precio_vendedor
+    FROM pedidos_zonas pz
+    JOIN catalogo c ON c.super_catalog_id = pz.super_catalog_id
+        AND NOT c.es_nacional AND c.name = pz.geo_zone
+    UNION ALL
+    SELECT 1 AS bloque, pz.*, c._fila AS fila_catalogo, c.precio_vendedor
+    FROM pedidos_zonas pz
+    JOIN catalogo c ON c.super_catalog_id = pz.super_catalog_id AND c.es_nacional
+),
+ordenadas AS (
+    SELECT *, row_number() OVER (ORDER BY bloque, fila_pedido, fila_zona NULLS LAST, fila_catalogo) AS fila
+    FROM ofertas
+)
+SELECT
+    fila_pedido,
+    fila_zona,
+    fila_catalogo,
+    CASE WHEN point_of_sale_id IS NULL OR order_id IS NULL OR super_catalog_id IS NULL THEN NULL
+         ELSE min(precio_minimo) OVER (PARTITION BY point_of_sale_id, order_id, super_catalog_id)
+    END AS precio_minimo_orders,
+    CASE WHEN order_id IS NULL OR super_catalog_id IS NULL THEN ''
+         WHEN first_value(precio_minimo) OVER grupo < precio_vendedor THEN 'Precio droguería minimo'
+         WHEN precio_vendedor = min(precio_vendedor) OVER (PARTITION BY order_id, super_catalog_id)
+             THEN 'Precio vendor minimo'
+         ELSE 'Precio vendor no minimo'
+    END AS clasificacion
+FROM ordenadas
+WINDOW grupo AS (PARTITION BY order_id, super_catalog_id ORDER BY fila)
+ORDER BY fila
+"""
+
+
+def _tabla_sql(df, columnas):
+    """
+    Proyección de un DataFrame para DuckDB, con la posición de cada fila en _fila
+
+    Los floats pasan a Float64 y los textos y categorías a object con None, para que NaN
+    llegue como NULL.
+    """
+    tabla = {'_fila': np.arange(len(df), dtype=np.int64)}
+    for columna in columnas:
+        serie = df[columna]
+        if serie.dtype.kind == 'f':
+            serie = serie.astype('Float64')
+        elif serie.dtype == object or isinstance(serie.dtype, pd.CategoricalDtype):
+            serie = serie.astype(object).where(serie.notna(), None)
+        tabla[columna] = serie.array
+    return pd.DataFrame(tabla)
+
+
+def plan_clasificacion(df_pedidos, pos_geo_zones, catalogo):
+    """
+    Resuelve en DuckDB las ofertas aplicables a cada pedido y su clasificación
+
+    Args:
+        df_pedidos: DataFrame de pedidos normalizado
+        pos_geo_zones: DataFrame con la zona geográfica de cada POS
+        catalogo: DataFrame de catálogo normalizado con precio_vendedor
+
+    Returns:
+        DataFrame con COLUMNAS_PLAN, una fila por pedido y oferta en el orden de
+        enriquecer_pedidos: posiciones (fila_zona = -1 si el POS no tiene zona),
+        precio_minimo_orders (NaN si falta alguna clave) y clasificacion
+
+    Raises:
+        ImportError: Si DuckDB no está instalado
+    """
+    if not DUCKDB_DISPONIBLE:
+        raise ImportError("El backend SQL requiere el paquete duckdb")
+
+    catalogo_sql = _tabla_sql(catalogo, ['super_catalog_id', 'name', 'precio_vendedor'])
+    catalogo_sql['es_nacional'] = (catalogo['name'] == 'México').to_numpy()
+
+    con = duckdb.connect()
+    try:
+        if HILOS:
+            con.execute(f"SET threads = {HILOS}")
+        con.register('pedidos', _tabla_sql(df_pedidos, ['point_of_sale_id', 'order_id', 'super_catalog_id',
+                                                        'unidades_pedidas', 'precio_minimo']))
+        con.register('zonas', _tabla_sql(pos_geo_zones, ['point_of_sale_id', 'geo_zone']))
+        con.register('catalogo', catalogo_sql)
+        plan = con.execute(CONSULTA_CLASIFICACION).df()
+    finally:
+        con.close()
+
+    return pd.DataFrame({
+        'fila_pedido': plan['fila_pedido'].to_numpy(dtype=np.int64),
+        'fila_zona': plan['fila_zona'].fillna(-1).to_numpy(dtype=np.int64),
+        'fila_catalogo': plan['fila_catalogo'].to_numpy(dtype=np.int64),
+        'precio_minimo_orders': plan['precio_minimo_orders'].to_numpy(dtype=float, na_value=np.nan),
+        'clasificacion': plan['clasificacion'].to_numpy(dtype=object),
+    }, columns=COLUMNAS_PLAN)
@@ -0,0 +1,273 @@
+"""
+Recarga en caliente de los datos cuando cambian los archivos de entrada.
+
+Cada conjunto de datos recargable (crear_conjunto) declara sus archivos de entrada y la
+función que lo construye. La primera vez que se pide (snapshot_actual) se construye en el
+momento; después, un hilo vigilante (iniciar_vigilancia) revisa los archivos cada
+INTERVALO_SEGUNDOS:
+  - si el tamaño y el mtime no cambiaron, no hace nada
+  - si cambiaron, compara el hash del contenido; un archivo copiado de nuevo sin cambios
+    (solo otro mtime) no dispara la recarga
+  - si el contenido cambió, reconstruye el conjunto en el hilo vigilante y reemplaza el
+    snapshot en una sola asignación cuando terminó
+
+Mientras se reconstruye, las sesiones siguen recibiendo el snapshot anterior; un
+snapshot no se modifica después de publicado, así que cada rerun trabaja sobre un único
+snapshot aunque la recarga termine en el medio. Si la reconstrucción falla (o el
+resultado no pasa la validación del conjunto) se conserva el snapshot anterior y se
+vuelve a intentar cuando el archivo cambie otra vez.
+
+Un archivo que todavía se está escribiendo (su tamaño o mtime cambian mientras se calcula
+el hash) se deja para la revisión siguiente.
+
+Un conjunto puede depender también de fuentes que no son archivos (por ejemplo, los
+upserts directos al almacén local): cada una declara una función que devuelve su versión
+y el vigilante reconstruye el conjunto cuando la versión cambia.
+
+Uso:
+    datos = crear_conjunto('datos_pos', ['pos_address.csv', ...], construir_datos_por_pos)
+    iniciar_vigilancia([datos])
+    snapshot = snapshot_actual(datos)   # {'datos': ..., 'generado': datetime, ...}
+"""
+import os
+import threading
+from datetime import datetime
+
+from snapshots import hash_archivo, hash_vigente
+
+# Segundos entre revisiones de los archivos de entrada (configurable por variable de entorno)
+INTERVALO_SEGUNDOS = float(os.environ.get('PHARMA_RECARGA_INTERVALO', '10'))
+
+# Permite desactivar el hilo vigilante (los datos se cargan una vez por proceso)
+RECARGA_HABILITADA = os.environ.get('PHARMA_RECARGA', '1') != '0'
+
+
+def _estado_archivo(ruta):
+    """Tamaño y mtime de un archivo, o None si no existe"""
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return {'size': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def huellas_archivos(archivos):
+    """
+    Calcula la huella (tamaño, mtime y hash) de cada archivo
+
+    El hash se reutiliza del manifiesto de snapshots si el tamaño y el mtime coinciden
+    (snapshots.hash_vigente): con snapshots vigentes, la carga inicial no vuelve a leer
+    los archivos completos para calcularlo.
+
+    Args:
+        archivos: Lista de rutas
+
+    Returns:
+        Diccionario ruta -> huella ({'size', 'mtime_ns', 'sha256'}), None si el archivo no
+        existe
+    """
+    huellas = {}
+    for archivo in archivos:
+        estado = _estado_archivo(archivo)
+        huellas[archivo] = None if estado is None else dict(estado, sha256=hash_vigente(archivo))
+    return huellas
+
+
+def _huellas_versiones(conjunto, nombres):
+    """Versión actual de las fuentes indicadas del conjunto, como huellas"""
+    return {nombre: {'version': conjunto['versiones'][nombre]()} for nombre in nombres}
+
+
+def crear_conjunto(nombre, archivos, construir, validar=None, versiones=None):
+    """
+    Declara un conjunto de datos recargable
+
+    Args:
+        nombre: Nombre del conjunto (para los mensajes y el diagnóstico)
+        archivos: Archivos de entrada que, al cambiar, obligan a reconstruirlo
+        construir: Función sin argumentos que construye los datos
+        validar: Función opcional datos -> bool; una recarga cuyo resultado no es válido
+            se descarta y se conserva el snapshot anterior
+        versiones: Diccionario opcional nombre -> función sin argumentos que devuelve la
+            versión de una fuente que no es un archivo; al cambiar, el conjunto se
+            reconstruye como si hubiera cambiado un archivo con ese nombre
+
+    Returns:
+        Diccionario con la declaración y el estado del conjunto
+    """
+    return {
+        'nombre': nombre,
+        'archivos': list(archivos),
+        'construir': construir,
+        'validar': validar,
+        'versiones': dict(versiones or {}),
+        'snapshot': None,
+        'huellas': {},
+        'lock': threading.Lock(),
+        'recargando': [],
+        'ultimo_error': None,
+    }
+
+
+def _construir_snapshot(conjunto, version):
+    # La huella se toma antes de construir: si un archivo cambia durante la construcción,
+    # la revisión siguiente lo detecta y vuelve a recargar
+    huellas = huellas_archivos(conjunto['archivos'])
+    huellas.update(_huellas_versiones(conjunto, conjunto['versiones']))
+    datos = conjunto['construir']()
+    snapshot = {'datos': datos, 'generado': datetime.now(), 'version': version,
+                'huellas': huellas}
+    return snapshot, huellas
+
+
+def snapshot_actual(conjunto):
+    """
+    Devuelve el snapshot vigente del conjunto, construyéndolo si todavía no existe
+
+    Solo la primera llamada del proceso espera la construcción; después devuelve el
+    snapshot publicado sin bloquear, aunque haya una recarga en curso.
+
+    Args:
+        conjunto: Conjunto de crear_conjunto
+
+    Returns:
+        Diccionario con 'datos', 'generado' (datetime de la construcción), 'version'
+        (1 en la carga inicial, +1 por recarga) y 'huellas' de los archivos usados
+    """
+    snapshot = conjunto['snapshot']
+    if snapshot is not None:
+        return snapshot
+    with conjunto['lock']:
+        if conjunto['snapshot'] is None:
+            snapshot, huellas = _construir_snapshot(conjunto, 1)
+            conjunto['huellas'] = dict(huellas)
+            conjunto['snapshot'] = snapshot
+    return conjunto['snapshot']
+
+
+def archivos_cambiados(conjunto):
+    """
+    Compara los archivos de entrada con las huellas del snapshot vigente
+
+    Los archivos con otro mtime pero el mismo contenido se registran con el mtime nuevo y
+    no cuentan como cambiados.
+
+    Args:
+        conjunto: Conjunto de crear_conjunto
+
+    Returns:
+        Lista de archivos cuyo contenido cambió (o que aparecieron o se borraron)
+    """
+    cambiados = []
+    for archivo in conjunto['archivos']:
+        conocida = conjunto['huellas'].get(archivo)
+        estado = _estado_archivo(archivo)
+        if estado is None or conocida is None:
+            if (estado is None) != (conocida is None):
+                cambiados.append(archivo)
+            continue
+        if estado['size'] == conocida['size'] and estado['mtime_ns'] == conocida['mtime_ns']:
+            continue
+        sha256 = hash_archivo(archivo)
+        if _estado_archivo(archivo) != estado:
+            # Se está escribiendo: se revisa en la vuelta siguiente
+            continue
+        if sha256 == conocida['sha256']:
+            conjunto['huellas'][archivo] = dict(estado, sha256=sha256)
+        else:
+            cambiados.append(archivo)
+    return cambiados
+
+
+def versiones_cambiadas(conjunto):
+    """
+    Compara las versiones de las fuentes que no son archivos con las del snapshot vigente
+
+    Args:
+        conjunto: Conjunto de crear_conjunto
+
+    Returns:
+        Lista de nombres de fuentes cuya versión cambió
+    """
+    return [nombre for nombre, version in conjunto['versiones'].items()
+            if conjunto['huellas'].get(nombre) != {'version': version()}]
+
+
+def revisar_conjunto(conjunto):
+    """
+    Recarga el conjunto si cambió alguno de sus archivos de entrada
+
+    La reconstrucción corre en el hilo que llama (el vigilante) y el snapshot nuevo se
+    publica con una sola asignación al terminar.
+
+    Args:
+        conjunto: Conjunto de crear_conjunto (ya cargado con snapshot_actual)
+
+    Returns:
+        Lista de archivos cambiados que dispararon la recarga (vacía si no hubo recarga)
+    """
+    anterior = conjunto['snapshot']
+    if anterior is None:
+        return []
+    cambiados = archivos_cambiados(conjunto) + versiones_cambiadas(conjunto)
+    if not cambiados:
+        return []
+
+    with conjunto['lock']:
+        conjunto['recargando'] = cambiados
+        try:
+            snapshot, huellas = _construir_snapshot(conjunto, anterior['version'] + 1)
+            if conjunto['validar'] is not None and not conjunto['validar'](snapshot['datos']):
+                raise ValueError("el resultado de la recarga no es válido")
+        except Exception as e:
+            print(f"Error al recargar {conjunto['nombre']} (cambió {', '.join(cambiados)}), "
+                  f"se mantiene el snapshot anterior: {e}")
+            conjunto['ultimo_error'] = {'momento': datetime.now(), 'archivos': cambiados, 'error': str(e)}
+            # No se reintenta hasta que los archivos vuelvan a cambiar
+            conjunto['huellas'].update(huellas_archivos(
+                [archivo for archivo in cambiados if archivo in conjunto['archivos']]))
+            conjunto['huellas'].update(_huellas_versiones(
+                conjunto, [nombre for nombre in cambiados if nombre in conjunto['versiones']]))
+            return []
+        finally:
+            conjunto['recargando'] = []
+        conjunto['huellas'] = dict(huellas)
+        conjunto['ultimo_error'] = None
+        conjunto['snapshot'] = snapshot
+    return cambiados
+
+
+def _vigilar(conjuntos, intervalo, detener):
+    while not detener.wait(intervalo):
+        for conjunto in conjuntos:
+            try:
+                cambiados = revisar_conjunto(conjunto)
+            except Exception as e:
+                print(f"Error al revisar los archivos de {conjunto['nombre']}: {e}")
+                continue
+            if cambiados:
+                print(f"{conjunto['nombre']} recargado (cambió {', '.join(cambiados)})")
+
+
+def iniciar_vigilancia(conjuntos, intervalo=None):
+    """
+    Inicia el hilo vigilante que recarga los conjuntos cuando cambian sus archivos
+
+    Los conjuntos se revisan y recargan de a uno, en el orden dado.
+
+    Args:
+        conjuntos: Lista de conjuntos de crear_conjunto
+        intervalo: Segundos entre revisiones (por defecto INTERVALO_SEGUNDOS)
+
+    Returns:
+        threading.Event que detiene el vigilante al activarlo, o None si la recarga está
+        desactivada (PHARMA_RECARGA=0)
+    """
+    if not RECARGA_HABILITADA:
+        return None
+    detener = threading.Event()
+    hilo = threading.Thread(target=_vigilar, args=(conjuntos, intervalo or INTERVALO_SEGUNDOS, detener),
+                            name='recarga_datos', daemon=True)
+    hilo.start()
+    return detener
+
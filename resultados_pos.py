@@ -0,0 +1,172 @@
+"""
+Resultados por POS materializados en un único archivo Parquet.
+
+La carga puede precalcular los resultados de la página de todos los POS (tablas de
+detalle, estadísticas de drug manufacturers, métricas de la intersección, análisis de
+vendors e insight de más de $20,000) y guardarlos en ARCHIVO_RESULTADOS, ordenados por
+point_of_sale_id. Al seleccionar un POS la página lee solo sus filas
+(leer_resultados_pos): el filtro por point_of_sale_id descarta con las estadísticas de
+cada grupo de filas el resto del archivo.
+
+Todas las tablas comparten el archivo: cada fila indica su POS y su tabla, y las
+columnas de cada tabla llevan el nombre de la tabla como prefijo ('vendors:Status').
+Cada POS y tabla guarda también su índice original (_indice) y los dtypes, la cantidad
+de filas y si las columnas eran un RangeIndex, como las de pd.DataFrame() (_tipos), para
+devolver exactamente el DataFrame calculado; una tabla vacía ocupa una sola fila de marca. Los diccionarios de escalares (métricas) se guardan como
+una tabla de una fila.
+
+El manifiesto registra la huella de las entradas con las que se calcularon los
+resultados (huella_resultados). Si el archivo no existe o su huella no coincide con la
+de los datos que muestra la página, leer_resultados_pos devuelve None y la página
+calcula el POS en el momento.
+
+Uso:
+    guardar_resultados(((pos_id, resultados) for pos_id in pos_list), huella)
+    resultados = leer_resultados_pos(pos_id, huella)   # None si falta o está vencido
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from snapshots import SNAPSHOT_DIR, _escribir_atomico, _leer_manifiesto, _volcar_json
+
+# Archivo de resultados y su manifiesto (junto a los snapshots)
+ARCHIVO_RESULTADOS = os.path.join(SNAPSHOT_DIR, 'resultados_pos.parquet')
+
+# Incrementar si cambia el cálculo de los resultados o el formato del archivo
+VERSION_RESULTADOS = 2
+
+# Filas por grupo del Parquet: grupos chicos permiten leer un POS sin leer sus vecinos
+FILAS_POR_GRUPO = 5000
+
+
+def _ruta_manifiesto(ruta):
+    return os.path.splitext(ruta)[0] + '.json'
+
+
+def huella_resultados(hashes):
+    """
+    Huella de los resultados para un conjunto de archivos de entrada
+
+    Args:
+        hashes: Diccionario archivo -> hash SHA-256 del contenido (None si no existe)
+
+    Returns:
+        Hash hexadecimal de los hashes de entrada y VERSION_RESULTADOS
+    """
+    contenido = json.dumps({'version': VERSION_RESULTADOS, 'archivos': sorted(hashes.items())})
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def resultados_vigentes(huella, ruta=None):
+    """
+    Indica si el archivo de resultados existe y corresponde a la huella indicada
+
+    Args:
+        huella: Huella de las entradas (huella_resultados)
+        ruta: Archivo de resultados (por defecto ARCHIVO_RESULTADOS)
+
+    Returns:
+        True si se puede leer con leer_resultados_pos
+    """
+    ruta = ruta or ARCHIVO_RESULTADOS
+    manifiesto = _leer_manifiesto(_ruta_manifiesto(ruta))
+    return manifiesto is not None and manifiesto.get('huella') == huella and os.path.exists(ruta)
+
+
+def _filas_tabla(pos_id, nombre, valor):
+    """Filas del archivo para una tabla (o diccionario de escalares) de un POS"""
+    df = pd.DataFrame([valor]) if isinstance(valor, dict) else valor
+    tipos = json.dumps({
+        'escalares': isinstance(valor, dict),
+        'filas': len(df),
+        'columnas': [str(columna) for columna in df.columns],
+        'rango': isinstance(df.columns, pd.RangeIndex),
+        'dtypes': [str(dtype) for dtype in df.dtypes],
+    })
+    filas = df.rename(columns=lambda columna: f"{nombre}:{columna}")
+    indice = df.index.to_numpy()
+    if filas.empty:
+        # Una fila de marca para que el POS tenga la tabla (vacía) con sus columnas
+        filas = pd.DataFrame(index=[0])
+        indice = [None]
+    return filas.reset_index(drop=True).assign(point_of_sale_id=pos_id, _tabla=nombre, _indice=indice,
+                                               _tipos=tipos)
+
+
+def guardar_resultados(resultados_por_pos, huella, ruta=None):
+    """
+    Guarda los resultados de todos los POS en un único archivo, de forma atómica
+
+    El manifiesto anterior se borra antes de escribir y el nuevo se escribe al final: una
+    escritura interrumpida deja el archivo sin manifiesto y la página calcula en el
+    momento.
+
+    Args:
+        resultados_por_pos: Iterable de (pos_id, diccionario nombre -> DataFrame o
+            diccionario de escalares)
+        huella: Huella de las entradas con las que se calcularon (huella_resultados)
+        ruta: Archivo de resultados (por defecto ARCHIVO_RESULTADOS)
+
+    Returns:
+        Cantidad de POS guardados
+    """
+    ruta = ruta or ARCHIVO_RESULTADOS
+    ruta_manifiesto = _ruta_manifiesto(ruta)
+    partes = []
+    cantidad = 0
+    for pos_id, resultados in resultados_por_pos:
+        partes.extend(_filas_tabla(pos_id, nombre, valor) for nombre, valor in resultados.items())
+        cantidad += 1
+
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    if os.path.exists(ruta_manifiesto):
+        os.remove(ruta_manifiesto)
+    df = pd.concat(partes, ignore_index=True, sort=False) if partes else pd.DataFrame(columns=['point_of_sale_id'])
+    # Orden por POS: las estadísticas de cada grupo de filas permiten saltear los demás POS
+    df = df.sort_values('point_of_sale_id', kind='stable')
+    _escribir_atomico(ruta, lambda p: df.to_parquet(p, index=False, row_group_size=FILAS_POR_GRUPO))
+    _escribir_atomico(ruta_manifiesto, lambda p: _volcar_json({'huella': huella, 'pos': cantidad}, p))
+    return cantidad
+
+
+def leer_resultados_pos(pos_id, huella, ruta=None):
+    """
+    Lee los resultados de un POS del archivo materializado
+
+    Args:
+        pos_id: ID del POS
+        huella: Huella de los datos que muestra la página (huella_resultados)
+        ruta: Archivo de resultados (por defecto ARCHIVO_RESULTADOS)
+
+    Returns:
+        Diccionario nombre -> DataFrame (o diccionario de escalares) igual al guardado, o
+        None si el archivo no existe, no corresponde a la huella, no tiene el POS o no se
+        puede leer
+    """
+    ruta = ruta or ARCHIVO_RESULTADOS
+    if not resultados_vigentes(huella, ruta):
+        return None
+    try:
+        filas = pd.read_parquet(ruta, filters=[('point_of_sale_id', '==', pos_id)])
+    except Exception as e:
+        print(f"Error al leer los resultados materializados de {ruta}: {e}")
+        return None
+    if filas.empty:
+        return None
+
+    resultados = {}
+    for nombre, grupo in filas.groupby('_tabla', sort=False):
+        tipos = json.loads(grupo['_tipos'].iloc[0])
+        grupo = grupo.iloc[:tipos['filas']]
+        df = grupo[[f"{nombre}:{columna}" for columna in tipos['columnas']]]
+        df.columns = pd.RangeIndex(len(tipos['columnas'])) if tipos['rango'] else tipos['columnas']
+        df = df.astype(dict(zip(df.columns, tipos['dtypes'])))
+        df.index = pd.Index(grupo['_indice'].to_numpy(dtype='int64')) if tipos['filas'] else df.index[:0]
+        if tipos['escalares']:
+            resultados[nombre] = {columna: df[columna].iloc[0] for columna in df.columns}
+        else:
+            resultados[nombre] = df
+    return resultados
@@ -0,0 +1,389 @@
+"""
+Caché en disco de los CSV de entrada en formato columnar (Parquet).
+
+Cada CSV se parsea y normaliza una sola vez; el resultado se guarda como snapshot
+Parquet junto con un manifiesto que registra el tamaño, el mtime y el hash SHA-256 del
+archivo fuente. En los arranques siguientes se carga el snapshot en lugar de volver a
+parsear el CSV, y se reconstruye automáticamente cuando el archivo cambia.
+
+En el mismo directorio se guardan memos persistentes (leer_memo / guardar_memo): tablas
+de resultados ya calculados por clave, por ejemplo la zona de cada dirección, y los
+resultados de las etapas de la carga (leer_etapa / guardar_etapa, ver cache_etapas.py).
+
+Requiere un motor Parquet (pyarrow, en requirements.txt); sin él la caché se desactiva
+al importar el módulo y los CSV se parsean en cada carga, sin hashearlos.
+"""
+import hashlib
+import importlib
+import json
+import os
+
+import pandas as pd
+
+# Directorio donde se guardan los snapshots y sus manifiestos
+SNAPSHOT_DIR = os.environ.get('PHARMA_SNAPSHOT_DIR', '.snapshots')
+
+
+
+def _motor_parquet():
+    """Primer motor Parquet de pandas que se puede importar, o None si no hay ninguno"""
+    for modulo in ('pyarrow', 'fastparquet'):
+        try:
+            importlib.import_module(modulo)
+            return modulo
+        except ImportError:
+            continue
+    return None
+
+
+# Sin motor Parquet no se puede guardar ningún snapshot, memo ni etapa: se detecta una vez
+# al importar y la caché queda desactivada, en lugar de hashear y parsear cada CSV para
+# después fallar al escribir
+MOTOR_PARQUET = _motor_parquet()
+PARQUET_DISPONIBLE = MOTOR_PARQUET is not None
+if not PARQUET_DISPONIBLE:
+    print("Sin pyarrow ni fastparquet: los snapshots Parquet están desactivados (pip install pyarrow)")
+
+# Permite desactivar la caché (por ejemplo para medir el arranque sin snapshots)
+SNAPSHOTS_HABILITADOS = os.environ.get('PHARMA_SNAPSHOTS', '1') != '0' and PARQUET_DISPONIBLE
+
+# Errores esperables al escribir un snapshot con el motor disponible (disco lleno, permisos,
+# columnas que Parquet no admite; los de pyarrow heredan de estos)
+ERRORES_ESCRITURA = (OSError, ValueError, TypeError, NotImplementedError)
+
+# Incrementar si cambia el formato del manifiesto o de los snapshots
+VERSION_FORMATO = 2
+
+# Atributo del DataFrame (df.attrs, que pandas guarda en los metadatos del Parquet) con las
+# categorías de los categóricos numéricos
+_ATRIBUTO_CATEGORIAS = 'categorias_numericas'
+
+
+def hash_archivo(ruta, tamano_bloque=1 << 20):
+    """
+    Calcula el hash SHA-256 del contenido de un archivo
+
+    Args:
+        ruta: Ruta del archivo
+        tamano_bloque: Tamaño de los bloques de lectura en bytes
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tamano_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def huella_archivo(ruta, con_hash=True):
+    """
+    Obtiene la huella de un archivo: tamaño, mtime y (opcionalmente) hash del contenido
+
+    Args:
+        ruta: Ruta del archivo
+        con_hash: Si es True, incluye el hash SHA-256 del contenido
+
+    Returns:
+        Diccionario con size, mtime_ns y sha256
+    """
+    info = os.stat(ruta)
+    return {
+        'size': info.st_size,
+        'mtime_ns': info.st_mtime_ns,
+        'sha256': hash_archivo(ruta) if con_hash else None,
+    }
+
+
+def _rutas_snapshot(ruta, snapshot_dir):
+    # El nombre lleva un hash corto de la ruta absoluta: dos CSV con el mismo nombre en
+    # distintos directorios no comparten snapshot ni manifiesto
+    nombre = os.path.splitext(os.path.basename(ruta))[0]
+    sufijo = hashlib.sha256(os.path.normcase(os.path.abspath(ruta)).encode('utf-8')).hexdigest()[:12]
+    base = os.path.join(snapshot_dir, f"{nombre}_{sufijo}")
+    return base + '.parquet', base + '.json'
+
+
+def _leer_manifiesto(ruta_manifiesto):
+    try:
+        with open(ruta_manifiesto, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_atomico(ruta, escribir):
+    # Escribir en un temporal y renombrar, para no dejar snapshots a medio escribir
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    try:
+        escribir(temporal)
+        os.replace(temporal, ruta)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+def _escribir_parquet(df, ruta, **kwargs):
+    """
+    Guarda un DataFrame en Parquet registrando las categorías de los categóricos numéricos
+
+    pyarrow devuelve un categórico de números (por ejemplo status en
+    vendor_pos_relations.csv) como la columna numérica decodificada; sus categorías se
+    guardan en df.attrs para restaurarlo al leer (_leer_parquet).
+    """
+    categorias = {
+        columna: {'categorias': df[columna].cat.categories.tolist(), 'ordenado': bool(df[columna].cat.ordered)}
+        for columna in df.columns
+        if isinstance(df[columna].dtype, pd.CategoricalDtype) and df[columna].cat.categories.dtype.kind in 'iufb'
+    }
+    if categorias:
+        df = df.copy(deep=False)
+        df.attrs = {**df.attrs, _ATRIBUTO_CATEGORIAS: categorias}
+    df.to_parquet(ruta, **kwargs)
+
+
+def _leer_parquet(ruta, **kwargs):
+    """Lee un Parquet guardado con _escribir_parquet, con sus categóricos numéricos"""
+    df = pd.read_parquet(ruta, **kwargs)
+    categorias = df.attrs.pop(_ATRIBUTO_CATEGORIAS, None)
+    if categorias:
+        df = df.astype({columna: pd.CategoricalDtype(dtype['categorias'], ordered=dtype['ordenado'])
+                        for columna, dtype in categorias.items() if columna in df.columns})
+    return df
+
+
+def leer_csv_con_snapshot(ruta, normalizar=None, version='1', snapshot_dir=None, **read_csv_kwargs):
+    """
+    Lee un CSV usando un snapshot Parquet cuando el archivo fuente no ha cambiado
+
+    El snapshot se considera válido si el manifiesto coincide con el tamaño y mtime del
+    archivo. Si solo cambió el mtime (por ejemplo, el archivo se volvió a copiar sin
+    cambios), se compara el hash del contenido y, si coincide, se reutiliza el snapshot.
+    En cualquier otro caso se vuelve a parsear el CSV y se reescribe el snapshot.
+
+    Args:
+        ruta: Ruta del archivo CSV
+        normalizar: Función opcional DataFrame -> DataFrame aplicada tras el parseo
+        version: Versión de la normalización; al cambiarla se invalidan los snapshots
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+        **read_csv_kwargs: Argumentos adicionales para pd.read_csv
+
+    Returns:
+        DataFrame parseado y normalizado
+    """
+    def parsear():
+        df = pd.read_csv(ruta, **read_csv_kwargs)
+        return normalizar(df) if normalizar is not None else df
+
+    if not SNAPSHOTS_HABILITADOS:
+        return parsear()
+
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    ruta_parquet, ruta_manifiesto = _rutas_snapshot(ruta, snapshot_dir)
+    clave = f"{VERSION_FORMATO}:{version}:{sorted(read_csv_kwargs.items())!r}"
+
+    # os.stat lanza FileNotFoundError si el CSV no existe, igual que pd.read_csv
+    huella = huella_archivo(ruta, con_hash=False)
+    manifiesto = _leer_manifiesto(ruta_manifiesto)
+
+    if manifiesto is not None and manifiesto.get('clave') == clave and os.path.exists(ruta_parquet):
+        vigente = manifiesto['size'] == huella['size'] and manifiesto['mtime_ns'] == huella['mtime_ns']
+        if not vigente and manifiesto['size'] == huella['size']:
+            huella['sha256'] = hash_archivo(ruta)
+            vigente = manifiesto['sha256'] == huella['sha256']
+            if vigente:
+                # Mismo contenido con otro mtime: actualizar el manifiesto y reutilizar
+                manifiesto['mtime_ns'] = huella['mtime_ns']
+                try:
+                    _escribir_atomico(ruta_manifiesto, lambda p: _volcar_json(manifiesto, p))
+                except OSError:
+                    pass
+        if vigente:
+            try:
+                return _leer_parquet(ruta_parquet)
+            except Exception as e:
+                print(f"Error al leer snapshot {ruta_parquet}, se reconstruye: {e}")
+
+    # La huella se toma antes de parsear: si el CSV cambia durante la lectura, el
+    # siguiente arranque detecta la diferencia y vuelve a construir el snapshot
+    if huella['sha256'] is None:
+        huella = huella_archivo(ruta)
+    df = parsear()
+
+    try:
+        os.makedirs(snapshot_dir, exist_ok=True)
+        _escribir_atomico(ruta_parquet, lambda p: _escribir_parquet(df, p, index=False))
+        _escribir_atomico(ruta_manifiesto, lambda p: _volcar_json(dict(huella, clave=clave), p))
+    except ERRORES_ESCRITURA as e:
+        # Sin permisos de escritura la app sigue funcionando sin caché
+        print(f"No se pudo guardar el snapshot de {ruta}: {e}")
+
+    return df
+
+
+def _volcar_json(datos, ruta):
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+
+
+def _ruta_memo(nombre, snapshot_dir):
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"memo_{nombre}.parquet")
+
+
+def leer_memo(nombre, snapshot_dir=None):
+    """
+    Lee un memo persistente guardado con guardar_memo
+
+    Args:
+        nombre: Nombre del memo (incluye su versión, por ejemplo 'geo_zonas_v1')
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+
+    Returns:
+        DataFrame del memo, o None si no existe, no se puede leer o los snapshots están
+        desactivados
+    """
+    ruta = _ruta_memo(nombre, snapshot_dir)
+    if not SNAPSHOTS_HABILITADOS or not os.path.exists(ruta):
+        return None
+    try:
+        return _leer_parquet(ruta)
+    except Exception as e:
+        print(f"Error al leer el memo {ruta}, se descarta: {e}")
+        return None
+
+
+def guardar_memo(nombre, df, snapshot_dir=None):
+    """
+    Guarda un memo persistente (DataFrame) junto a los snapshots, de forma atómica
+
+    Args:
+        nombre: Nombre del memo (ver leer_memo)
+        df: DataFrame a guardar
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+    """
+    if not SNAPSHOTS_HABILITADOS:
+        return
+    ruta = _ruta_memo(nombre, snapshot_dir)
+    try:
+        os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+        _escribir_atomico(ruta, lambda p: _escribir_parquet(df, p, index=False))
+    except ERRORES_ESCRITURA as e:
+        print(f"No se pudo guardar el memo {ruta}: {e}")
+
+
+def hash_vigente(ruta, snapshot_dir=None):
+    """
+    Hash SHA-256 actual de un CSV de entrada, reutilizando el de su snapshot
+
+    Si el manifiesto del snapshot (leer_csv_con_snapshot) coincide con el tamaño y mtime
+    del archivo se usa el hash registrado; si no, se calcula.
+
+    Args:
+        ruta: Ruta del archivo
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+
+    Returns:
+        Hash hexadecimal del contenido
+    """
+    huella = huella_archivo(ruta, con_hash=False)
+    manifiesto = _leer_manifiesto(_rutas_snapshot(ruta, snapshot_dir or SNAPSHOT_DIR)[1])
+    if (SNAPSHOTS_HABILITADOS and manifiesto is not None and manifiesto.get('sha256')
+            and manifiesto['size'] == huella['size'] and manifiesto['mtime_ns'] == huella['mtime_ns']):
+        return manifiesto['sha256']
+    return hash_archivo(ruta)
+
+
+def _ruta_etapa(nombre, snapshot_dir, parte=None, extension='json'):
+    sufijo = '' if parte is None else f"_{parte}"
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"etapa_{nombre}{sufijo}.{extension}")
+
+
+def leer_manifiesto_etapa(nombre, snapshot_dir=None):
+    """
+    Lee el manifiesto de una etapa guardada con guardar_etapa
+
+    Args:
+        nombre: Nombre de la etapa
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+
+    Returns:
+        Diccionario con huella, dependencias y partes, o None si no existe o los snapshots
+        están desactivados
+    """
+    if not SNAPSHOTS_HABILITADOS:
+        return None
+    manifiesto = _leer_manifiesto(_ruta_etapa(nombre, snapshot_dir))
+    if manifiesto is None or manifiesto.get('formato') != VERSION_FORMATO:
+        return None
+    return manifiesto
+
+
+def leer_etapa(nombre, huella, snapshot_dir=None):
+    """
+    Lee el resultado guardado de una etapa si corresponde a la huella indicada
+
+    Args:
+        nombre: Nombre de la etapa
+        huella: Huella actual de la etapa (de sus entradas y dependencias)
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+
+    Returns:
+        Resultado de la etapa (DataFrame, tupla de DataFrames u otro objeto), o None si no
+        hay un resultado guardado con esa huella o no se puede leer
+    """
+    manifiesto = leer_manifiesto_etapa(nombre, snapshot_dir)
+    if manifiesto is None or manifiesto['huella'] != huella or manifiesto['partes'] is None:
+        return None
+    try:
+        partes = [_leer_parquet(_ruta_etapa(nombre, snapshot_dir, i, 'parquet')) if tipo == 'parquet'
+                  else pd.read_pickle(_ruta_etapa(nombre, snapshot_dir, i, 'pkl'))
+                  for i, tipo in enumerate(manifiesto['partes'])]
+    except Exception as e:
+        print(f"Error al leer la etapa {nombre}, se recalcula: {e}")
+        return None
+    return tuple(partes) if manifiesto['tupla'] else partes[0]
+
+
+def guardar_etapa(nombre, huella, resultado, dependencias=None, persistir=True, snapshot_dir=None):
+    """
+    Guarda el resultado de una etapa junto a los snapshots, de forma atómica
+
+    Los DataFrames (o cada DataFrame de una tupla) se guardan en Parquet y el resto con
+    pickle. El manifiesto se escribe al final: una escritura interrumpida deja la etapa
+    sin resultado válido y se recalcula en la carga siguiente.
+
+    Args:
+        nombre: Nombre de la etapa
+        huella: Huella de la etapa (de sus entradas y dependencias)
+        resultado: Resultado de la etapa
+        dependencias: Diccionario con la huella de cada entrada y etapa previa, para
+            informar qué cambió en la carga siguiente
+        persistir: Si es False solo se guarda el manifiesto (sin resultado)
+        snapshot_dir: Directorio de snapshots (por defecto SNAPSHOT_DIR)
+    """
+    if not SNAPSHOTS_HABILITADOS:
+        return
+    manifiesto = {'formato': VERSION_FORMATO, 'huella': huella, 'dependencias': dependencias or {},
+                  'tupla': isinstance(resultado, tuple), 'partes': None}
+    ruta_manifiesto = _ruta_etapa(nombre, snapshot_dir)
+    try:
+        os.makedirs(snapshot_dir or SNAPSHOT_DIR, exist_ok=True)
+        # Sin manifiesto mientras se reescriben las partes, para no combinar el manifiesto
+        # anterior con partes nuevas
+        if os.path.exists(ruta_manifiesto):
+            os.remove(ruta_manifiesto)
+        if persistir:
+            manifiesto['partes'] = []
+            for i, parte in enumerate(resultado if manifiesto['tupla'] else [resultado]):
+                if isinstance(parte, pd.DataFrame):
+                    _escribir_atomico(_ruta_etapa(nombre, snapshot_dir, i, 'parquet'),
+                                      lambda p, parte=parte: _escribir_parquet(parte, p))
+                    manifiesto['partes'].append('parquet')
+                else:
+                    _escribir_atomico(_ruta_etapa(nombre, snapshot_dir, i, 'pkl'),
+                                      lambda p, parte=parte: pd.to_pickle(parte, p))
+                    manifiesto['partes'].append('pkl')
+        _escribir_atomico(ruta_manifiesto, lambda p: _volcar_json(manifiesto, p))
+    except ERRORES_ESCRITURA as e:
+        print(f"No se pudo guardar la etapa {nombre}: {e}")
@@ -0,0 +1,245 @@
+"""
+Procesamiento del archivo de pedidos por bloques, con memoria acotada.
+
+load_and_process_data carga el historial completo de pedidos y lo cruza con el catálogo
+(ofertas nacionales y regionales), así que el pico de memoria crece con el historial.
+Este módulo lee los pedidos por bloques de órdenes completas, cruza cada bloque con el
+índice de precios construido una sola vez (construir_indice_precios) y lo reduce a los
+agregados parciales que necesita el análisis de vendors de todos los POS antes de leer el
+siguiente:
+  - total comprado por POS y droguería (pos_vendor_totals)
+  - suma y cantidad de órdenes por POS (pos_order_stats)
+  - valor potencial por POS y vendor (calcular_potenciales_por_vendor)
+  - primera compra a un drug manufacturer y primer 'Precio droguería minimo' de cada POS y
+    producto (lo único que usa calcular_valor_compras_ganadores_dm)
+
+El estado acumulado crece con la cantidad de claves distintas (POS x vendor, POS x
+producto), no con la longitud del historial; el pico de memoria queda acotado por el
+tamaño de bloque.
+
+Las líneas de una misma orden deben estar contiguas en el archivo (como en el exporte,
+ordenado por orden): la última orden de cada bloque se completa con el bloque siguiente.
+Si una orden reaparece más adelante, leer_pedidos_por_bloques lanza ValueError en lugar
+de contarla dos veces.
+
+Uso:
+    resultado = procesar_pedidos_por_bloques(tamano_bloque=100_000)
+    vendor_df = resultado['vendor_df']
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from app import (ARCHIVO_PEDIDOS, armar_vendor_analysis, calcular_pos_geo_zones,
+                 calcular_potenciales_por_vendor, cargar_entradas, clasificar_pedidos, construir_indice_precios,
+                 construir_indice_status, enriquecer_pedidos, normalizar_pedidos)
+from esquemas import ESQUEMAS, aplicar_esquema
+
+# Líneas de pedido por bloque (configurable por variable de entorno)
+TAMANO_BLOQUE = int(os.environ.get('PHARMA_TAMANO_BLOQUE', 200_000))
+
+# Columna auxiliar con la fila del archivo de pedidos de cada línea
+_FILA = '_fila_pedido'
+
+CLAVES_PRODUCTO = ['point_of_sale_id', 'super_catalog_id']
+
+
+def leer_pedidos_por_bloques(ruta=ARCHIVO_PEDIDOS, tamano_bloque=None):
+    """
+    Lee el archivo de pedidos por bloques que contienen solo órdenes completas
+
+    Args:
+        ruta: Ruta del archivo de pedidos
+        tamano_bloque: Líneas leídas por bloque (por defecto TAMANO_BLOQUE)
+
+    Returns:
+        Generador de DataFrames normalizados, con la columna _fila_pedido (fila en el archivo)
+
+    Raises:
+        ValueError: Si las líneas de una orden no están contiguas en el archivo
+    """
+    tamano_bloque = tamano_bloque or TAMANO_BLOQUE
+    esquema = ESQUEMAS[ARCHIVO_PEDIDOS]
+    usecols = [columna for columna in pd.read_csv(ruta, nrows=0).columns if columna in esquema]
+
+    fila = 0
+    pendiente = None
+    emitidas = set()
+    for bloque in pd.read_csv(ruta, usecols=usecols, chunksize=tamano_bloque):
+        bloque = normalizar_pedidos(aplicar_esquema(bloque, esquema))
+        bloque[_FILA] = np.arange(fila, fila + len(bloque))
+        fila += len(bloque)
+        if pendiente is not None:
+            bloque = pd.concat([pendiente, bloque], ignore_index=True)
+
+        # La última orden del bloque puede continuar en el siguiente: se guarda para él
+        order_ids = bloque['order_id'].to_numpy()
+        otras = order_ids[::-1] != order_ids[-1]
+        corte = len(bloque) - int(otras.argmax()) if otras.any() else 0
+        pendiente = bloque.iloc[corte:]
+        if corte:
+            _registrar_ordenes(order_ids[:corte], emitidas)
+            yield bloque.iloc[:corte].reset_index(drop=True)
+
+    if pendiente is not None and not pendiente.empty:
+        _registrar_ordenes(pendiente['order_id'].to_numpy(), emitidas)
+        yield pendiente.reset_index(drop=True)
+
+
+def _registrar_ordenes(order_ids, emitidas):
+    """
+    Agrega las órdenes de un bloque a las ya emitidas, verificando que cada una esté en un
+    solo tramo contiguo del archivo
+    """
+    order_ids = order_ids[~pd.isna(order_ids)]
+    tramos = pd.Series(order_ids[np.r_[True, order_ids[1:] != order_ids[:-1]]] if len(order_ids) else order_ids)
+    repetidas = set(tramos[tramos.duplicated() | tramos.isin(emitidas)])
+    if repetidas:
+        raise ValueError(f"Las líneas de las órdenes {sorted(repetidas)[:10]} no están contiguas en el archivo de "
+                         f"pedidos: el procesamiento por bloques requiere el archivo ordenado por orden")
+    emitidas.update(tramos.tolist())
+
+
+def reducir_bloque(df_bloque, contexto):
+    """
+    Reduce un bloque de pedidos a los agregados parciales del análisis de vendors
+
+    Args:
+        df_bloque: Bloque de leer_pedidos_por_bloques
+        contexto: Diccionario con pos_geo_zones, catalogo (construir_indice_precios),
+            df_vendors_pos y dm_ids (IDs de drug manufacturers)
+
+    Returns:
+        Diccionario con los agregados parciales del bloque
+    """
+    total_compra = df_bloque['unidades_pedidas'] * df_bloque['precio_minimo']
+    df_bloque = df_bloque.assign(total_compra=total_compra)
+
+    totales = df_bloque.groupby(['point_of_sale_id', 'vendor_id'])['total_compra'].sum()
+    ordenes = df_bloque.groupby(['point_of_sale_id', 'order_id'])['total_compra'].sum()
+    ordenes_pos = ordenes.groupby(level='point_of_sale_id').agg(['sum', 'count'])
+
+    # Primera compra a un drug manufacturer de cada POS y producto
+    compras_dm = df_bloque[df_bloque['vendor_id'].isin(contexto['dm_ids'])]
+    primeras_compras = compras_dm.drop_duplicates(CLAVES_PRODUCTO)[CLAVES_PRODUCTO + ['vendor_id', _FILA]]
+
+    df_pedidos_proveedores = enriquecer_pedidos(
+        df_bloque, contexto['pos_geo_zones'], contexto['catalogo'], contexto['df_vendors_pos']
+    )
+    _, df_clasificado = clasificar_pedidos(df_pedidos_proveedores)
+    if df_clasificado.empty:
+        potenciales = pd.Series(dtype=float)
+        primeros_ganadores = pd.DataFrame(columns=CLAVES_PRODUCTO + ['valor_vendedor', 'bloque', _FILA])
+    else:
+        potenciales = (calcular_potenciales_por_vendor(df_bloque, df_clasificado)
+                       .set_index(['point_of_sale_id', 'Vendor ID'])['potencial'])
+        # Primer 'Precio droguería minimo' de cada POS y producto en el orden de
+        # df_clasificado: ofertas regionales antes que nacionales y, dentro de cada grupo,
+        # por fila del archivo de pedidos
+        ganadores = df_clasificado[df_clasificado['clasificacion'] == 'Precio droguería minimo']
+        primeros_ganadores = (ganadores
+                              .assign(bloque=(ganadores['name'] == 'México').astype(np.int8))
+                              .drop_duplicates(CLAVES_PRODUCTO)
+                              [CLAVES_PRODUCTO + ['valor_vendedor', 'bloque', _FILA]])
+
+    return {
+        'totales': totales,
+        'ordenes_pos': ordenes_pos,
+        'potenciales': potenciales,
+        'primeras_compras': primeras_compras,
+        'primeros_ganadores': primeros_ganadores,
+    }
+
+
+def _combinar(estado, parcial):
+    """Incorpora los agregados parciales de un bloque al estado acumulado"""
+    if estado is None:
+        return parcial
+
+    def sumar(a, b):
+        return a.add(b, fill_value=0) if not a.empty else b
+
+    primeras_compras = pd.concat([estado['primeras_compras'], parcial['primeras_compras']], ignore_index=True)
+    primeros_ganadores = pd.concat([estado['primeros_ganadores'], parcial['primeros_ganadores']], ignore_index=True)
+    return {
+        'totales': sumar(estado['totales'], parcial['totales']),
+        'ordenes_pos': sumar(estado['ordenes_pos'], parcial['ordenes_pos']),
+        'potenciales': sumar(estado['potenciales'], parcial['potenciales']),
+        # Las filas del estado son anteriores en el archivo: se conserva la primera
+        'primeras_compras': primeras_compras.drop_duplicates(CLAVES_PRODUCTO),
+        'primeros_ganadores': (primeros_ganadores
+                               .sort_values(['bloque', _FILA], kind='stable')
+                               .drop_duplicates(CLAVES_PRODUCTO)),
+    }
+
+
+def procesar_pedidos_por_bloques(ruta=ARCHIVO_PEDIDOS, tamano_bloque=None, entradas=None, log=None):
+    """
+    Calcula los agregados por POS y el análisis de vendors de todos los POS leyendo los
+    pedidos por bloques
+
+    Args:
+        ruta: Ruta del archivo de pedidos
+        tamano_bloque: Líneas leídas por bloque (por defecto TAMANO_BLOQUE)
+        entradas: Diccionario de cargar_entradas(incluir_pedidos=False); si es None se cargan
+        log: Flujo donde se escribe el progreso (None para no escribir)
+
+    Returns:
+        Diccionario con pos_vendor_totals, pos_order_stats, vendor_df (mismas columnas que
+        calcular_vendor_analysis_todos_pos), bloques y filas procesadas
+    """
+    entradas = entradas if entradas is not None else cargar_entradas(incluir_pedidos=False)
+    pos_geo_zones = calcular_pos_geo_zones(entradas['df_pos_address'])
+    df_vendor_dm = entradas['df_vendor_dm']
+    contexto = {
+        'pos_geo_zones': pos_geo_zones,
+        'catalogo': construir_indice_precios(entradas['df_proveedores']),
+        'df_vendors_pos': entradas['df_vendors_pos'],
+        'dm_ids': pd.to_numeric(df_vendor_dm['drug_manufacturer_id'], errors='coerce').dropna().unique()
+        if not df_vendor_dm.empty else np.array([]),
+    }
+
+    estado, bloques, filas = None, 0, 0
+    for df_bloque in leer_pedidos_por_bloques(ruta, tamano_bloque):
+        estado = _combinar(estado, reducir_bloque(df_bloque, contexto))
+        bloques += 1
+        filas += len(df_bloque)
+        if log is not None:
+            print(f"[bloque {bloques}] {filas:,} líneas de pedido", file=log)
+
+    if estado is None:
+        vacio = pd.DataFrame()
+        return {'pos_vendor_totals': vacio, 'pos_order_stats': vacio, 'vendor_df': vacio,
+                'bloques': 0, 'filas': 0}
+
+    pos_vendor_totals = estado['totales'].sort_index().rename('total_compra').reset_index()
+    ordenes_pos = estado['ordenes_pos'].sort_index()
+    pos_order_stats = pd.DataFrame({
+        'point_of_sale_id': ordenes_pos.index.to_numpy(),
+        'promedio_por_orden': (ordenes_pos['sum'] / ordenes_pos['count']).to_numpy(),
+        'numero_ordenes': ordenes_pos['count'].astype('int64').to_numpy(),
+    })
+
+    potenciales = estado['potenciales'].rename('potencial').reset_index()
+    primeros_ganadores = estado['primeros_ganadores'].assign(clasificacion='Precio droguería minimo')
+    vendor_df = armar_vendor_analysis(
+        pos_vendor_totals, potenciales, estado['primeras_compras'].sort_values(_FILA, kind='stable'),
+        primeros_ganadores, df_vendor_dm, construir_indice_status(entradas['df_vendors_pos']),
+        pos_geo_zones, entradas['df_min_purchase']
+    )
+
+    return {
+        'pos_vendor_totals': pos_vendor_totals,
+        'pos_order_stats': pos_order_stats,
+        'vendor_df': vendor_df,
+        'bloques': bloques,
+        'filas': filas,
+    }
+
+
+if __name__ == '__main__':
+    resultado = procesar_pedidos_por_bloques(log=sys.stderr)
+    print(f"{resultado['filas']:,} líneas en {resultado['bloques']} bloques; "
+          f"{len(resultado['vendor_df']):,} filas de análisis de vendors")